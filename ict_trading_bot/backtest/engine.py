@@ -1,17 +1,16 @@
-from backtest.metrics import calculate_metrics
+"""
+Backtest entry point.
 
-def run_backtest(data, strategy):
-    trades = []
-    equity = 10000
-    curve = []
+The per-candle callback loop that used to live here never updated equity;
+backtests now run on backtest.vectorized, which this wraps.
+"""
+from backtest.vectorized import run_vector_backtest
 
-    for candle in data:
-        signal = strategy(candle)
 
-        if signal:
-            trades.append(signal)
-
-        curve.append(equity)
-
-    stats = calculate_metrics(trades, curve)
-    return stats
+def run_backtest(htf, mtf, ltf, **kwargs):
+    """
+    Metrics (backtest.metrics.calculate_metrics) of
+    run_vector_backtest(htf, mtf, ltf, **kwargs); call that directly for
+    the trades and the equity curve.
+    """
+    return run_vector_backtest(htf, mtf, ltf, **kwargs)["metrics"]
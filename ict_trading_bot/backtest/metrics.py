@@ -1,23 +1,313 @@
+"""
+Performance metrics over closed trades and an equity curve.
+
+calculate_metrics() is the batch form used by the backtests; every pass is
+a NumPy reduction over arrays pulled out of the trade dicts once.
+MetricsAccumulator keeps the same figures up to date one closed trade at a
+time, in O(1) per trade, for live use.
+
+Trades are dicts with "result" (account currency) and optionally "r" (the
+result in multiples of initial risk), "symbol", "time" / "exit_time"
+(epoch seconds) and "bars_held".  Ratios with a zero denominator are
+inf / 0.0 rather than sentinel values: profit_factor is inf for wins
+without losses and 0.0 without wins.
+"""
+import math
+import threading
+
 import numpy as np
 
-def calculate_metrics(trades, equity_curve):
-    wins = [t for t in trades if t["result"] > 0]
-    losses = [t for t in trades if t["result"] < 0]
+SECONDS_PER_YEAR = 365.25 * 86400
 
-    return {
-        "trades": len(trades),
-        "win_rate": len(wins) / len(trades) if trades else 0,
-        "profit_factor": abs(sum(t["result"] for t in wins) /
-                              sum(t["result"] for t in losses)) if losses else 999,
-        "max_drawdown": max_drawdown(equity_curve),
-        "expectancy": np.mean([t["result"] for t in trades]) if trades else 0
+# periods per year assumed for Sharpe / Sortino / CAGR without timestamps
+DEFAULT_PERIODS_PER_YEAR = 252
+
+
+def _column(trades, key, dtype=float):
+    return np.fromiter((t[key] for t in trades), dtype=dtype, count=len(trades))
+
+
+def _ratio(num, den):
+    if den:
+        return float(num / den)
+    return math.inf if num > 0 else 0.0
+
+
+# -------------------------
+# TRADES
+# -------------------------
+def trade_metrics(results, r=None):
+    """Counts, win rate, profit factor and expectancy of result (and R) arrays."""
+    results = np.asarray(results, dtype=float)
+    n = len(results)
+    gross_profit = float(results[results > 0].sum())
+    gross_loss = float(-results[results < 0].sum())
+    out = {
+        "trades": n,
+        "win_rate": float((results > 0).mean()) if n else 0.0,
+        "profit_factor": _ratio(gross_profit, gross_loss),
+        "expectancy": float(results.mean()) if n else 0.0,
+        "net_profit": float(results.sum()),
+    }
+    if r is not None:
+        out["expectancy_r"] = float(np.mean(r)) if n else 0.0
+    return out
+
+
+def by_symbol(trades):
+    """trade_metrics per symbol, from one grouped pass."""
+    if not trades:
+        return {}
+    symbols, group = np.unique([t.get("symbol") or "" for t in trades], return_inverse=True)
+    results = _column(trades, "result")
+    has_r = all("r" in t for t in trades)
+    r = _column(trades, "r") if has_r else None
+
+    k = len(symbols)
+    count = np.bincount(group, minlength=k)
+    wins = np.bincount(group, results > 0, minlength=k)
+    profit = np.bincount(group, np.where(results > 0, results, 0), minlength=k)
+    loss = np.bincount(group, np.where(results < 0, -results, 0), minlength=k)
+    r_sum = np.bincount(group, r, minlength=k) if has_r else None
+
+    out = {}
+    for i, symbol in enumerate(symbols.tolist()):
+        out[symbol] = {
+            "trades": int(count[i]),
+            "win_rate": float(wins[i] / count[i]),
+            "profit_factor": _ratio(profit[i], loss[i]),
+            "expectancy": float((profit[i] - loss[i]) / count[i]),
+            "net_profit": float(profit[i] - loss[i]),
+        }
+        if has_r:
+            out[symbol]["expectancy_r"] = float(r_sum[i] / count[i])
+    return out
+
+
+# -------------------------
+# EQUITY CURVE
+# -------------------------
+def drawdown(curve, times=None):
+    """
+    Max drawdown of an equity curve: absolute (<= 0, as before), percent of
+    the running peak, and the longest stretch below a peak in points (and
+    seconds, given the points' epoch `times`).
+    """
+    curve = np.asarray(curve, dtype=float)
+    if not len(curve):
+        return {"max_drawdown": 0, "max_drawdown_pct": 0.0, "max_drawdown_duration": 0}
+
+    peak = np.maximum.accumulate(curve)
+    dd = curve - peak
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(peak > 0, dd / peak, 0.0)
+    index = np.arange(len(curve))
+    last_peak = np.maximum.accumulate(np.where(dd == 0, index, 0))
+    under = index - last_peak
+
+    out = {
+        "max_drawdown": float(dd.min()),
+        "max_drawdown_pct": float(pct.min() * 100),
+        "max_drawdown_duration": int(under.max()),
     }
+    if times is not None:
+        times = np.asarray(times, dtype=np.int64)
+        out["max_drawdown_seconds"] = int((times - times[last_peak]).max())
+    return out
 
 
 def max_drawdown(curve):
-    peak = curve[0]
-    dd = 0
-    for x in curve:
-        peak = max(peak, x)
-        dd = min(dd, x - peak)
-    return dd
+    return drawdown(curve)["max_drawdown"]
+
+
+def _periods_per_year(curve, times):
+    times = None if times is None else np.asarray(times, dtype=np.int64)
+    if times is not None and len(times) > 1 and times[-1] > times[0]:
+        return (len(curve) - 1) / ((times[-1] - times[0]) / SECONDS_PER_YEAR)
+    return DEFAULT_PERIODS_PER_YEAR
+
+
+def return_metrics(curve, times=None, initial_equity=None):
+    """Annualized Sharpe and Sortino of per-point returns (risk-free 0) and CAGR."""
+    curve = np.asarray(curve, dtype=float)
+    start = float(initial_equity) if initial_equity is not None else (curve[0] if len(curve) else 0.0)
+    if len(curve) < 2 or start <= 0:
+        return {"sharpe": 0.0, "sortino": 0.0, "cagr": 0.0}
+
+    levels = np.r_[start, curve] if initial_equity is not None else curve
+    returns = np.diff(levels) / levels[:-1]
+    ppy = _periods_per_year(curve, times)
+    scale = math.sqrt(ppy)
+
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    downside = math.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+    mean = returns.mean()
+    years = len(returns) / ppy
+    final = levels[-1]
+    return {
+        "sharpe": float(mean / std * scale) if std > 0 else 0.0,
+        "sortino": float(mean / downside * scale) if downside > 0 else 0.0,
+        "cagr": float((final / start) ** (1 / years) - 1) if final > 0 and years > 0 else -1.0,
+    }
+
+
+def exposure(trades, curve_length, times=None):
+    """Fraction of the tested period with a position open."""
+    if not trades or not curve_length:
+        return 0.0
+    if times is not None and len(times) > 1 and all("exit_time" in t for t in trades):
+        held = (_column(trades, "exit_time", np.int64) - _column(trades, "time", np.int64)).sum()
+        return float(min(held / (times[-1] - times[0]), 1.0)) if times[-1] > times[0] else 0.0
+    if all("bars_held" in t for t in trades):
+        return float(min(_column(trades, "bars_held").sum() / curve_length, 1.0))
+    return 0.0
+
+
+def calculate_metrics(trades, equity_curve, times=None, initial_equity=None):
+    """
+    Trade, drawdown, return and exposure metrics.  `times` are the equity
+    curve's epoch timestamps (annualization and durations); without them
+    DEFAULT_PERIODS_PER_YEAR is assumed.  Adds a by_symbol breakdown when
+    trades carry a "symbol".
+    """
+    results = _column(trades, "result")
+    r = _column(trades, "r") if trades and all("r" in t for t in trades) else None
+    times = None if times is None else np.asarray(times, dtype=np.int64)
+
+    metrics = trade_metrics(results, r)
+    metrics.update(drawdown(equity_curve, times))
+    metrics.update(return_metrics(equity_curve, times, initial_equity))
+    metrics["exposure"] = exposure(trades, len(equity_curve), times)
+    if any(t.get("symbol") for t in trades):
+        metrics["by_symbol"] = by_symbol(trades)
+    return metrics
+
+
+# -------------------------
+# INCREMENTAL
+# -------------------------
+class _Running:
+    """Trade counters for one symbol (or the whole book)."""
+
+    __slots__ = ("trades", "wins", "gross_profit", "gross_loss", "r_sum", "r_count")
+
+    def __init__(self):
+        self.trades = self.wins = self.r_count = 0
+        self.gross_profit = self.gross_loss = self.r_sum = 0.0
+
+    def add(self, result, r):
+        self.trades += 1
+        if result > 0:
+            self.wins += 1
+            self.gross_profit += result
+        elif result < 0:
+            self.gross_loss -= result
+        if r is not None:
+            self.r_sum += r
+            self.r_count += 1
+
+    def snapshot(self):
+        n = self.trades
+        out = {
+            "trades": n,
+            "win_rate": self.wins / n if n else 0.0,
+            "profit_factor": _ratio(self.gross_profit, self.gross_loss),
+            "expectancy": (self.gross_profit - self.gross_loss) / n if n else 0.0,
+            "net_profit": self.gross_profit - self.gross_loss,
+        }
+        if self.r_count:
+            out["expectancy_r"] = self.r_sum / self.r_count
+        return out
+
+
+class MetricsAccumulator:
+    """
+    Live counterpart of calculate_metrics, updated per closed trade in O(1).
+
+    The equity curve is the trade-by-trade one (a point per exit), so
+    drawdowns are measured on realized equity and Sharpe / Sortino are per
+    trade, annualized by the observed trades per year.  Thread-safe.
+    """
+
+    def __init__(self, initial_equity=10000.0):
+        self.initial_equity = float(initial_equity)
+        self._lock = threading.Lock()
+        self._total = _Running()
+        self._symbols = {}
+        self._equity = self.initial_equity
+        self._peak = self.initial_equity
+        self._peak_time = None
+        self._max_dd = 0.0
+        self._max_dd_pct = 0.0
+        self._max_dd_seconds = 0
+        self._first_time = None
+        self._last_time = None
+        self._held = 0
+        # Welford running mean / variance of per-trade returns
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._down_sq = 0.0
+
+    def update(self, trade):
+        result = float(trade["result"])
+        r = trade.get("r")
+        opened = trade.get("time")
+        closed = trade.get("exit_time", opened)
+        with self._lock:
+            self._total.add(result, r)
+            symbol = trade.get("symbol")
+            if symbol:
+                self._symbols.setdefault(symbol, _Running()).add(result, r)
+
+            ret = result / self._equity if self._equity > 0 else 0.0
+            n = self._total.trades
+            delta = ret - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (ret - self._mean)
+            self._down_sq += min(ret, 0.0) ** 2
+
+            self._equity += result
+            if opened is not None:
+                if self._first_time is None:
+                    self._first_time = self._peak_time = opened
+                self._held += max(0, closed - opened)
+                self._last_time = closed
+            if self._equity >= self._peak:
+                self._peak = self._equity
+                self._peak_time = self._last_time
+            else:
+                self._max_dd = min(self._max_dd, self._equity - self._peak)
+                self._max_dd_pct = min(self._max_dd_pct, (self._equity - self._peak) / self._peak * 100)
+                if self._peak_time is not None and self._last_time is not None:
+                    self._max_dd_seconds = max(self._max_dd_seconds, self._last_time - self._peak_time)
+
+    def snapshot(self):
+        with self._lock:
+            n = self._total.trades
+            metrics = self._total.snapshot()
+            metrics.update({
+                "max_drawdown": self._max_dd,
+                "max_drawdown_pct": self._max_dd_pct,
+                "max_drawdown_seconds": self._max_dd_seconds,
+                "equity": self._equity,
+            })
+
+            span = None
+            if self._first_time is not None and self._last_time > self._first_time:
+                span = self._last_time - self._first_time
+            per_year = n / (span / SECONDS_PER_YEAR) if span else DEFAULT_PERIODS_PER_YEAR
+            std = math.sqrt(self._m2 / (n - 1)) if n > 1 else 0.0
+            downside = math.sqrt(self._down_sq / n) if n else 0.0
+            scale = math.sqrt(per_year)
+            metrics["sharpe"] = self._mean / std * scale if std > 0 else 0.0
+            metrics["sortino"] = self._mean / downside * scale if downside > 0 else 0.0
+            years = span / SECONDS_PER_YEAR if span else n / DEFAULT_PERIODS_PER_YEAR
+            growth = self._equity / self.initial_equity
+            if not n:
+                metrics["cagr"] = 0.0
+            else:
+                metrics["cagr"] = growth ** (1 / years) - 1 if growth > 0 and years > 0 else -1.0
+            metrics["exposure"] = min(self._held / span, 1.0) if span else 0.0
+            if self._symbols:
+                metrics["by_symbol"] = {s: acc.snapshot() for s, acc in self._symbols.items()}
+            return metrics
@@ -0,0 +1,309 @@
+"""
+Parameter search and rolling walk-forward over run_vector_backtest.
+
+    bars = {"htf": h4, "mtf": h1, "ltf": m15}
+    space = {"rr": [2, 3, 4], "tolerance": [0.0002, 0.0003, 0.0005]}
+    ranked = optimize(bars, grid(space), workers=8)
+    folds = walk_forward(bars, grid(space), in_sample_days=180, out_of_sample_days=30)
+    write_results(ranked, "optimizer_results.csv")
+
+The bar arrays are copied once into shared memory and every pool worker
+maps them read-only, so a task is just a parameter dict and a time range
+and returns one metrics row.  Tasks are independent backtests with no
+shared writes, so throughput scales with the worker count.
+
+Tunable parameters (run_vector_backtest keywords): rr, tolerance, cooldown,
+swing_lookback, window, ob_window, risk_percent, and threshold when a
+`model` is given.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest.vectorized import run_vector_backtest
+from data.mt5_connector import TIMEFRAME_SECONDS
+from ict_concepts.ict_state import OB_WINDOW, SWING_WINDOW
+
+PARAMS = ("rr", "tolerance", "cooldown", "swing_lookback", "window", "ob_window",
+          "risk_percent", "threshold")
+
+TIMEFRAMES = {"htf": "H4", "mtf": "H1", "ltf": "M15"}
+
+METRICS = ("trades", "win_rate", "profit_factor", "expectancy", "expectancy_r", "net_profit",
+           "max_drawdown", "max_drawdown_pct", "sharpe", "sortino", "cagr", "exposure")
+
+INITIAL_EQUITY = 10000.0
+
+
+# -------------------------
+# SEARCH SPACES
+# -------------------------
+def _check(params):
+    unknown = set(params) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"unknown optimizer parameters: {sorted(unknown)}")
+    return params
+
+
+def grid(space):
+    """Every combination of { name: [values] }."""
+    _check(space)
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+
+def random_search(space, n, seed=0):
+    """
+    `n` random draws from `space`: a list is a set of choices, a (low, high)
+    tuple a uniform range (integers when both ends are).
+    """
+    _check(space)
+    rng = np.random.default_rng(seed)
+    draws = []
+    for _ in range(n):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = int(rng.integers(low, high + 1))
+                else:
+                    params[name] = float(rng.uniform(low, high))
+            else:
+                params[name] = values[int(rng.integers(len(values)))]
+        draws.append(params)
+    return draws
+
+
+# -------------------------
+# SHARED BARS
+# -------------------------
+def bars_from_store(store, symbol, start=None, end=None):
+    """
+    htf/mtf/ltf rates for `symbol` from a data.bar_store.BarStore, [start,
+    end) by bar open time.  Timeframes not in the store are resampled from
+    the finest one that is.
+    """
+    from mt5_sim.history import resample
+
+    stored = store.timeframes(symbol)
+    if not stored:
+        raise ValueError(f"no bars stored for {symbol}")
+    finest = min(stored, key=TIMEFRAME_SECONDS.get)
+    bars = {}
+    for key, tf in TIMEFRAMES.items():
+        if tf in stored:
+            bars[key] = store.read(symbol, tf, start, end)
+        else:
+            bars[key] = resample(store.read(symbol, finest, start, end), tf)
+    return bars
+
+
+class SharedBars:
+    """The htf/mtf/ltf rates, copied once into shared memory."""
+
+    def __init__(self, bars):
+        self._blocks = []
+        self.spec = {}
+        for key in TIMEFRAMES:
+            rates = np.ascontiguousarray(bars[key])
+            block = shared_memory.SharedMemory(create=True, size=max(rates.nbytes, 1))
+            np.ndarray(rates.shape, rates.dtype, buffer=block.buf)[:] = rates
+            self._blocks.append(block)
+            self.spec[key] = (block.name, rates.shape, rates.dtype)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# per-worker views of the shared bars, set by _attach
+_BARS = {}
+_BLOCKS = []
+_MODEL = None
+
+
+def _attach(spec, model=None):
+    global _MODEL
+    for key, (name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=name)
+        rates = np.ndarray(shape, dtype, buffer=block.buf)
+        rates.flags.writeable = False
+        _BLOCKS.append(block)
+        _BARS[key] = rates
+    _MODEL = model
+
+
+def _detach():
+    global _MODEL
+    _BARS.clear()
+    _MODEL = None
+    while _BLOCKS:
+        _BLOCKS.pop().close()
+
+
+# -------------------------
+# TASKS
+# -------------------------
+def _warmup(params):
+    # closed bars each timeframe's detectors look back over before the first
+    # tradable candle: HTF structure, MTF liquidity / range / OBs, LTF FVGs
+    window = params.get("window", SWING_WINDOW)
+    swings = window + params.get("swing_lookback", 1) + 3
+    return {
+        "htf": swings,
+        "mtf": max(swings, params.get("ob_window", OB_WINDOW) + 2),
+        "ltf": window + 2,
+    }
+
+
+def _slice(rates, timeframe, start, end, warmup):
+    times = rates["time"]
+    lo = 0 if start is None else np.searchsorted(times, start - warmup * TIMEFRAME_SECONDS[timeframe])
+    hi = len(rates) if end is None else np.searchsorted(times, end)
+    return rates[lo:hi]
+
+
+def _evaluate(task):
+    params, start, end = task
+    warmup = _warmup(params)
+    htf, mtf, ltf = (_slice(_BARS[key], tf, start, end, warmup[key])
+                     for key, tf in TIMEFRAMES.items())
+    row = dict(params, start=start, end=end)
+
+    kwargs = dict(params)
+    if _MODEL is None:
+        kwargs.pop("threshold", None)
+    result = run_vector_backtest(htf, mtf, ltf, initial_equity=INITIAL_EQUITY, model=_MODEL,
+                                 trade_from=start, **kwargs) if len(ltf) else {"metrics": {}}
+    row["trades"] = len(result.get("trades", []))
+    row.update({name: float(result["metrics"].get(name, 0)) for name in METRICS[1:]})
+    return row
+
+
+@contextmanager
+def evaluator(bars, workers=None, model=None):
+    """
+    Yields run(tasks) -> result rows in task order, for (params, start, end)
+    tasks.  Runs on `workers` processes (default: all cores) attached to
+    one shared copy of `bars`; workers=1 runs in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    with SharedBars(bars) as shared:
+        if workers == 1:
+            _attach(shared.spec, model)
+            try:
+                yield lambda tasks: [_evaluate(task) for task in tasks]
+            finally:
+                _detach()
+            return
+        with ProcessPoolExecutor(workers, initializer=_attach,
+                                 initargs=(shared.spec, model)) as pool:
+            # one task per message: runtimes vary with the parameters, and
+            # a backtest dwarfs the IPC for its one-row result
+            yield lambda tasks: list(pool.map(_evaluate, tasks, chunksize=1))
+
+
+def run_tasks(bars, tasks, workers=None, model=None):
+    with evaluator(bars, workers, model) as run:
+        return run(tasks)
+
+
+# -------------------------
+# SEARCH
+# -------------------------
+def rank(rows, objective="expectancy", min_trades=10):
+    """
+    Sort best first by `objective`; rows with fewer than `min_trades`
+    trades rank below every row that has enough.
+    """
+    ranked = sorted(rows, key=lambda r: (r["trades"] >= min_trades, r[objective]), reverse=True)
+    return [dict(row, rank=i + 1) for i, row in enumerate(ranked)]
+
+
+def optimize(bars, param_sets, start=None, end=None, workers=None, model=None,
+             objective="expectancy", min_trades=10):
+    """Backtest every parameter set over [start, end) and rank the results."""
+    tasks = [(_check(params), start, end) for params in param_sets]
+    return rank(run_tasks(bars, tasks, workers, model), objective, min_trades)
+
+
+def walk_forward_windows(bars, in_sample_days, out_of_sample_days, step_days=None, warmup=None):
+    """
+    Rolling (is_start, is_end, oos_end) windows in epoch seconds: each fold
+    fits on `in_sample_days` and tests on the `out_of_sample_days` right
+    after, then the whole window moves on by `step_days` (default: the
+    out-of-sample length, so test windows tile the history).
+    """
+    warmup = _warmup({}) if warmup is None else warmup
+    first = max(int(bars[key]["time"][min(warmup[key], len(bars[key]) - 1)])
+                for key in TIMEFRAMES)
+    last = int(bars["ltf"]["time"][-1]) + TIMEFRAME_SECONDS[TIMEFRAMES["ltf"]]
+    is_len, oos_len = in_sample_days * 86400, out_of_sample_days * 86400
+    step = (step_days or out_of_sample_days) * 86400
+
+    windows = []
+    start = first
+    while start + is_len + oos_len <= last:
+        windows.append((start, start + is_len, start + is_len + oos_len))
+        start += step
+    return windows
+
+
+def walk_forward(bars, param_sets, in_sample_days, out_of_sample_days, step_days=None,
+                 workers=None, model=None, objective="expectancy", min_trades=10):
+    """
+    Rolling walk-forward: per fold, the best in-sample parameter set is
+    re-run out of sample.  Returns one row per fold with the chosen
+    parameters, is_* and oos_* metrics.  Every fold's in-sample grid goes
+    to the pool in one batch, then all out-of-sample runs in another.
+    """
+    param_sets = [_check(params) for params in param_sets]
+    warmup = {key: max(_warmup(params)[key] for params in param_sets) for key in TIMEFRAMES}
+    windows = walk_forward_windows(bars, in_sample_days, out_of_sample_days, step_days, warmup)
+
+    width = len(param_sets)
+    with evaluator(bars, workers, model) as run:
+        results = run([(params, a, b) for a, b, _ in windows for params in param_sets])
+        best = [rank(results[i * width:(i + 1) * width], objective, min_trades)[0]
+                for i in range(len(windows))]
+        chosen = [{name: row[name] for name in param_sets[0]} for row in best]
+        oos = run([(params, b, c) for params, (_, b, c) in zip(chosen, windows)])
+
+    folds = []
+    for fold, (params, is_row, oos_row) in enumerate(zip(chosen, best, oos), 1):
+        row = {"fold": fold, "is_start": is_row["start"], "is_end": is_row["end"],
+               "oos_end": oos_row["end"], **params}
+        row.update({f"is_{name}": is_row[name] for name in METRICS})
+        row.update({f"oos_{name}": oos_row[name] for name in METRICS})
+        folds.append(row)
+    return folds
+
+
+def write_results(rows, path):
+    """Results table as CSV (epoch columns as UTC ISO times)."""
+    table = pd.DataFrame(rows)
+    for column in ("start", "end", "is_start", "is_end", "oos_end"):
+        if column in table:
+            table[column] = [
+                None if pd.isna(t) else datetime.fromtimestamp(t, timezone.utc).isoformat()
+                for t in table[column]
+            ]
+    if "rank" in table:
+        table = table[["rank"] + [c for c in table.columns if c != "rank"]]
+    table.to_csv(path, index=False)
+    return table
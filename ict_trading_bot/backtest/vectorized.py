@@ -0,0 +1,463 @@
+"""
+Vectorized ICT backtest over NumPy OHLC arrays.
+
+Replays the live decision made after every closed LTF candle -- HTF trend,
+MTF liquidity sweep, MTF fib zone, LTF FVG inside an MTF order block
+(strategy.entry_model.check_entry), SL/TP (risk.sl_tp_engine.calculate_sl_tp)
+-- for the whole history at once.  Every detector is computed in array
+passes as a function of "bars closed so far" on its timeframe, with the
+same windows ICTState keeps live, so a signal here is the signal the bot
+would have produced at that candle close.  Only the trade walk (one open
+position at a time, per-order-block cooldown, SL/TP exits) is sequential.
+
+Inputs are MT5-style rates (structured arrays or dicts of arrays with
+time/open/high/low/close); time is the bar open in epoch seconds.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backtest.metrics import calculate_metrics
+from data.mt5_connector import TIMEFRAME_SECONDS
+from ict_concepts.fvg import fvg_masks
+from ict_concepts.ict_state import OB_WINDOW, SWING_WINDOW
+from market_structure.swing_points import rolling_max, rolling_min, swing_indices, swing_masks
+from risk.protection import TRADE_COOLDOWN
+
+# rows per chunk when scanning FVG / OB windows
+CHUNK = 8192
+
+# main.scan_symbol's fixed ATR feature for the ML filter
+ML_ATR = 0.0012
+
+
+def _arrays(rates):
+    return tuple(np.asarray(rates[k], dtype=float) for k in ("open", "high", "low", "close"))
+
+
+def aggregate_bars(rates, timeframe):
+    """Resample rates into `timeframe` bars (e.g. M15 -> H1)."""
+    period = TIMEFRAME_SECONDS[timeframe]
+    time = np.asarray(rates["time"], dtype=np.int64)
+    bucket = time // period
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(time)] - 1
+
+    out = np.zeros(len(starts), dtype=[("time", "i8"), ("open", "f8"), ("high", "f8"),
+                                       ("low", "f8"), ("close", "f8")])
+    out["time"] = bucket[starts] * period
+    out["open"] = np.asarray(rates["open"], dtype=float)[starts]
+    out["high"] = np.maximum.reduceat(np.asarray(rates["high"], dtype=float), starts)
+    out["low"] = np.minimum.reduceat(np.asarray(rates["low"], dtype=float), starts)
+    out["close"] = np.asarray(rates["close"], dtype=float)[ends]
+    return out
+
+
+def _closed_counts(rates, timeframe, at):
+    """Bars of `rates` closed by each epoch time in `at`."""
+    closes = np.asarray(rates["time"], dtype=np.int64) + TIMEFRAME_SECONDS[timeframe]
+    return np.searchsorted(closes, at, side="right")
+
+
+def _interval_reduce(starts, ends, values, size, ufunc, fill):
+    """out[c] = ufunc-reduce of values[k] over all k with starts[k] <= c <= ends[k]."""
+    out = np.full(size, fill, dtype=float)
+    starts = np.clip(starts, 0, size)
+    lengths = np.clip(ends + 1, 0, size) - starts
+    keep = lengths > 0
+    starts, lengths, values = starts[keep], lengths[keep], values[keep]
+    if not len(starts):
+        return out
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    pos = np.arange(lengths.sum()) - offsets + np.repeat(starts, lengths)
+    ufunc.at(out, pos, np.repeat(values, lengths))
+    return out
+
+
+# -------------------------
+# PER-TIMEFRAME STATE (indexed by bars closed, 0..n)
+# -------------------------
+def _fractals(high, low, lookback=1):
+    # ICTState's 3-bar fractal at lookback=1; bars 0-1 are never evaluated.
+    # A swing at i is known once bar i + lookback + 1 has closed, i.e. from
+    # count i + lookback + 2 on.
+    swing_high, swing_low = swing_masks(high, low, lookback, strict=True)
+    swing_high[:max(2, lookback)] = False
+    swing_low[:max(2, lookback)] = False
+    return swing_high, swing_low
+
+
+def dealing_range(high, low, window=SWING_WINDOW):
+    """(range_high, range_low) of the last `window` closed bars, per count."""
+    n = len(high)
+    hi = np.full(n + 1, np.nan)
+    lo = np.full(n + 1, np.nan)
+    head = min(window - 1, n)
+    hi[1:head + 1] = np.maximum.accumulate(high[:head])
+    lo[1:head + 1] = np.minimum.accumulate(low[:head])
+    if n >= window:
+        hi[window:] = rolling_max(high, window)
+        lo[window:] = rolling_min(low, window)
+    return hi, lo
+
+
+def structure_trend(high, low, window=SWING_WINDOW, swing_lookback=1):
+    """
+    detect_structure over the windowed swings, per count: 1 bullish,
+    -1 bearish, 0 range or not enough swings.
+    """
+    n = len(high)
+    swing_high, swing_low = _fractals(high, low, swing_lookback)
+    trend = np.zeros(n + 1, dtype=np.int8)
+    delay = swing_lookback + 2
+    if n < delay:
+        return trend
+
+    counts = np.arange(delay, n + 1)
+    first = np.maximum(counts - window, 0) + 2
+    direction = []
+    for mask, price in ((swing_high, high), (swing_low, low)):
+        # last and second-to-last swing at or before each index
+        last = np.maximum.accumulate(np.where(mask, np.arange(n), -1))
+        l1 = last[counts - delay]
+        l2 = np.where(l1 > 0, last[np.maximum(l1 - 1, 0)], -1)
+        valid = l2 >= first
+        up = valid & (price[l1] > price[l2])
+        down = valid & (price[l1] < price[l2])
+        direction.append((valid, up, down))
+
+    (_, hu, hd), (_, lu, ld) = direction
+    trend[delay:] = np.where(hu & lu, 1, np.where(hd & ld, -1, 0))
+    return trend
+
+
+def liquidity_levels(high, low, window=SWING_WINDOW, tolerance=0.0003, swing_lookback=1):
+    """
+    Equal highs / lows, per count: the highest first price of any EQL pair
+    (NaN if none) and the lowest first price of any EQH pair, which is all
+    liquidity_taken needs.
+    """
+    n = len(high)
+    swing_high, swing_low = _fractals(high, low, swing_lookback)
+    idx, is_high = swing_indices(swing_high, swing_low)
+    idx = np.asarray(idx, dtype=np.int64)
+    is_high = np.asarray(is_high, dtype=bool)
+    if len(idx) < 2:
+        return np.full(n + 1, np.nan), np.full(n + 1, np.nan)
+
+    price = np.where(is_high, high[idx], low[idx])
+    a, b = idx[:-1], idx[1:]
+    pa, pb = price[:-1], price[1:]
+    # the previous swing must still be in the window when b is confirmed
+    known = b + swing_lookback + 2
+    paired = (np.abs(pa - pb) <= tolerance) & (a >= np.maximum(known - 1 - window, 0) + 2)
+    starts = known
+    ends = a + window - 2
+
+    eqh = paired & is_high[:-1]
+    eql = paired & ~is_high[:-1]
+    eql_max = _interval_reduce(starts[eql], ends[eql], pa[eql], n + 1, np.fmax, -np.inf)
+    eqh_min = _interval_reduce(starts[eqh], ends[eqh], pa[eqh], n + 1, np.fmin, np.inf)
+    eql_max[np.isinf(eql_max)] = np.nan
+    eqh_min[np.isinf(eqh_min)] = np.nan
+    return eql_max, eqh_min
+
+
+def _first_in_window(lows, highs, pad, counts, width, offset, inside):
+    """
+    For each row, the first bar k in [count + offset - pad, ...) (width bars)
+    whose zone passes `inside(zone_low, zone_high, row_slice)`.  Returns the
+    bar index, or -1.
+    """
+    front = np.full(pad, np.nan)
+    lows_w = sliding_window_view(np.r_[front, lows], width)
+    highs_w = sliding_window_view(np.r_[front, highs], width)
+
+    found = np.full(len(counts), -1, dtype=np.int64)
+    for s in range(0, len(counts), CHUNK):
+        rows = slice(s, s + CHUNK)
+        start = counts[rows] + offset
+        hit = inside(lows_w[start], highs_w[start], rows)
+        first = hit.argmax(axis=1)
+        ok = hit[np.arange(len(first)), first]
+        found[rows] = np.where(ok, start - pad + first, -1)
+    return found
+
+
+# -------------------------
+# SIGNALS
+# -------------------------
+def entry_signals(htf, mtf, ltf, rr=3, tolerance=0.0003, window=SWING_WINDOW,
+                  ob_window=OB_WINDOW, htf_tf="H4", mtf_tf="H1", ltf_tf="M15",
+                  swing_lookback=1):
+    """
+    The live entry decision after every LTF candle close, as arrays over
+    LTF bars: direction (1 buy, -1 sell, 0 none), entry (the close), sl,
+    tp, fvg_index (LTF bar), ob_index (MTF bar) and features (the ML
+    filter's input row, NaN where there is no signal).
+
+    swing_lookback widens the HTF/MTF fractal (live ICTState: 1).
+    """
+    _, h_high, h_low, _ = _arrays(htf)
+    _, m_high, m_low, _ = _arrays(mtf)
+    _, l_high, l_low, l_close = _arrays(ltf)
+    n = len(l_close)
+
+    at = np.asarray(ltf["time"], dtype=np.int64) + TIMEFRAME_SECONDS[ltf_tf]
+    c_htf = _closed_counts(htf, htf_tf, at)
+    c_mtf = _closed_counts(mtf, mtf_tf, at)
+    c_ltf = np.arange(1, n + 1)
+    price = l_close
+
+    # HTF trend -> direction
+    trend = structure_trend(h_high, h_low, window, swing_lookback)[c_htf]
+
+    # MTF liquidity sweep (strategy.liquidity_filter.liquidity_taken)
+    eql_max, eqh_min = liquidity_levels(m_high, m_low, window, tolerance, swing_lookback)
+    swept_buy = eql_max[c_mtf] > price
+    swept_sell = eqh_min[c_mtf] < price
+
+    # MTF fib zone (check_entry step 1)
+    hi, lo = dealing_range(m_high, m_low, window)
+    hi, lo = hi[c_mtf], lo[c_mtf]
+    f025 = lo + 0.25 * (hi - lo)
+    f05 = lo + 0.5 * (hi - lo)
+    f075 = lo + 0.75 * (hi - lo)
+
+    buy = (trend == 1) & swept_buy & (f025 <= price) & (price <= f05)
+    sell = (trend == -1) & swept_sell & (f05 <= price) & (price <= f075)
+
+    direction = np.zeros(n, dtype=np.int8)
+    sl = np.full(n, np.nan)
+    tp = np.full(n, np.nan)
+    fvg_index = np.full(n, -1, dtype=np.int64)
+    ob_index = np.full(n, -1, dtype=np.int64)
+    features = np.full((n, 4), np.nan)
+
+    bull_fvg, bear_fvg = fvg_masks(l_high, l_low)
+    l_prev_high = np.r_[np.nan, np.nan, l_high[:-2]]
+    l_prev_low = np.r_[np.nan, np.nan, l_low[:-2]]
+    fvg_zones = {
+        1: (np.where(bull_fvg, l_prev_high, np.nan), np.where(bull_fvg, l_low, np.nan)),
+        -1: (np.where(bear_fvg, l_high, np.nan), np.where(bear_fvg, l_prev_low, np.nan)),
+    }
+
+    # a swing high marks the candle before it as a bearish OB, a swing low
+    # as a bullish one
+    swing_high, swing_low = _fractals(m_high, m_low, swing_lookback)
+    m_prev_high = np.r_[np.nan, m_high[:-1]]
+    m_prev_low = np.r_[np.nan, m_low[:-1]]
+    ob_zones = {
+        1: (np.where(swing_low, m_prev_low, np.nan), np.where(swing_low, m_prev_high, np.nan)),
+        -1: (np.where(swing_high, m_prev_low, np.nan), np.where(swing_high, m_prev_high, np.nan)),
+    }
+
+    for side, rows in ((1, np.flatnonzero(buy)), (-1, np.flatnonzero(sell))):
+        if not len(rows):
+            continue
+
+        # check_entry step 2: oldest same-side FVG in the LTF window holding price
+        p = price[rows]
+        fvg_low, fvg_high = fvg_zones[side]
+        k = _first_in_window(
+            fvg_low, fvg_high, window, c_ltf[rows], window - 2, 2,
+            lambda zl, zh, r: (zl <= p[r, None]) & (p[r, None] <= zh),
+        )
+        rows, k = rows[k >= 0], k[k >= 0]
+        if not len(rows):
+            continue
+
+        # check_entry step 3: oldest same-side MTF OB containing that FVG
+        fl, fh = fvg_low[k], fvg_high[k]
+        ob_low, ob_high = ob_zones[side]
+        i = _first_in_window(
+            ob_low, ob_high, ob_window, c_mtf[rows], ob_window - swing_lookback - 3, 2,
+            lambda zl, zh, r: (zl <= fl[r, None]) & (fh[r, None] <= zh),
+        )
+        rows, k, i = rows[i >= 0], k[i >= 0], i[i >= 0]
+
+        # calculate_sl_tp
+        entry = price[rows]
+        if side == 1:
+            stop = ob_low[i]
+            target = entry + (entry - stop) * rr
+        else:
+            stop = ob_high[i]
+            target = entry - (stop - entry) * rr
+
+        direction[rows] = side
+        sl[rows] = stop
+        tp[rows] = target
+        fvg_index[rows] = k
+        ob_index[rows] = i
+        # main.scan_symbol's ML feature row
+        features[rows] = np.column_stack([
+            np.full(len(rows), ML_ATR),
+            np.abs(fvg_high[k] - fvg_low[k]),
+            np.abs(ob_high[i] - ob_low[i]),
+            np.abs(entry - f05[rows]),
+        ])
+
+    return {
+        "direction": direction,
+        "entry": price.copy(),
+        "sl": sl,
+        "tp": tp,
+        "fvg_index": fvg_index,
+        "ob_index": ob_index,
+        "features": features,
+    }
+
+
+# -------------------------
+# TRADES
+# -------------------------
+def _first_exit(high, low, start, side, sl, tp):
+    """(bar, hit_sl) of the first bar from `start` touching SL or TP; SL wins ties."""
+    n = len(high)
+    step = 256
+    while start < n:
+        end = min(n, start + step)
+        if side == 1:
+            hit_sl = low[start:end] <= sl
+            hit_tp = high[start:end] >= tp
+        else:
+            hit_sl = high[start:end] >= sl
+            hit_tp = low[start:end] <= tp
+        hit = hit_sl | hit_tp
+        if hit.any():
+            j = int(hit.argmax())
+            return start + j, bool(hit_sl[j])
+        start = end
+        step *= 2
+    return None, False
+
+
+def label_outcomes(high, low, rows, side, sl, tp, horizon=64, block=1 << 20):
+    """
+    _first_exit for many independent entries at once: (exit_bar, hit_sl)
+    arrays for entries at bars `rows` (exits from the next bar on, SL first
+    on a tie).  exit_bar is -1 where neither level is touched by the end
+    of the data.  The look-ahead window grows 4x for rows still open, and
+    entries are scanned `block` window cells at a time.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    rows = np.asarray(rows, dtype=np.int64)
+    up = np.asarray(side) == 1
+    sl = np.asarray(sl, dtype=float)
+    tp = np.asarray(tp, dtype=float)
+    n = len(high)
+
+    exit_bar = np.full(len(rows), -1, dtype=np.int64)
+    hit_sl = np.zeros(len(rows), dtype=bool)
+    start = rows + 1
+    pending = np.flatnonzero(start < n)
+    while len(pending):
+        # NaN padding never touches a level, so windows can run past the end
+        pad = np.full(horizon, np.nan)
+        highs = sliding_window_view(np.r_[high, pad], horizon)
+        lows = sliding_window_view(np.r_[low, pad], horizon)
+        for part in np.array_split(pending, -(-len(pending) * horizon // block)):
+            s = start[part]
+            h, lo = highs[s], lows[s]
+            u = up[part, None]
+            stop, target = sl[part, None], tp[part, None]
+            stopped = np.where(u, lo <= stop, h >= stop)
+            hit = stopped | np.where(u, h >= target, lo <= target)
+            found = hit.any(axis=1)
+            j = hit.argmax(axis=1)
+            exit_bar[part[found]] = s[found] + j[found]
+            hit_sl[part[found]] = stopped[found, j[found]]
+        start[pending] += horizon
+        pending = pending[(exit_bar[pending] < 0) & (start[pending] < n)]
+        horizon *= 4
+    return exit_bar, hit_sl
+
+
+def run_vector_backtest(htf, mtf, ltf, rr=3, tolerance=0.0003, risk_percent=1.0,
+                        initial_equity=10000.0, window=SWING_WINDOW, ob_window=OB_WINDOW,
+                        cooldown=TRADE_COOLDOWN, swing_lookback=1, model=None, threshold=0.65,
+                        trade_from=None):
+    """
+    Backtest the ICT pipeline on one symbol.
+
+    Entries fill at the signal candle's close; exits fill at SL or TP from
+    the next candle on (SL first when a candle spans both).  One position at
+    a time, `risk_percent` of equity risked per trade.  An order block is
+    traded again only `cooldown` seconds after its last entry, like the
+    live risk.protection.can_trade (None: once per order block).  With a
+    `model`, signals whose predict_proba falls below `threshold` are
+    dropped (ml.ml_filter.ml_quality_filter).  Bars before `trade_from`
+    (epoch seconds) only warm up the detectors.  A position still open at
+    the end is closed at the last close.
+
+    Returns { trades, equity_curve (per LTF bar), metrics, signals }.
+    """
+    signals = entry_signals(htf, mtf, ltf, rr, tolerance, window, ob_window,
+                            swing_lookback=swing_lookback)
+    _, high, low, close = _arrays(ltf)
+    times = np.asarray(ltf["time"], dtype=np.int64)
+    n = len(close)
+
+    direction = signals["direction"].copy()
+    if trade_from is not None:
+        direction[times < trade_from] = 0
+    rows = np.flatnonzero(direction)
+    if model is not None and len(rows):
+        probability = model.predict_proba(signals["features"][rows])[:, 1]
+        direction[rows[probability < threshold]] = 0
+        rows = rows[probability >= threshold]
+
+    pnl = np.zeros(n)
+    trades = []
+    equity = initial_equity
+    free_from = 0
+    last_trade = {}
+
+    for t in rows.tolist():
+        if t < free_from:
+            continue
+        side = int(direction[t])
+        ob = (int(signals["ob_index"][t]), side)
+        entry, sl, tp = signals["entry"][t], signals["sl"][t], signals["tp"][t]
+        risk = abs(entry - sl)
+        if risk <= 0 or ob in last_trade and (
+                cooldown is None or times[t] - last_trade[ob] < cooldown):
+            continue
+        last_trade[ob] = times[t]
+
+        exit_bar, stopped = _first_exit(high, low, t + 1, side, sl, tp)
+        if exit_bar is None:
+            exit_bar, exit_price, reason = n - 1, close[-1], "open"
+        else:
+            exit_price, reason = (sl, "sl") if stopped else (tp, "tp")
+
+        r = side * (exit_price - entry) / risk
+        result = equity * risk_percent / 100 * r
+        equity += result
+        pnl[exit_bar] += result
+        free_from = exit_bar + 1
+
+        trades.append({
+            "time": int(times[t]),
+            "exit_time": int(times[exit_bar]),
+            "direction": "buy" if side == 1 else "sell",
+            "entry": float(entry),
+            "sl": float(sl),
+            "tp": float(tp),
+            "exit": float(exit_price),
+            "exit_reason": reason,
+            "r": float(r),
+            "result": float(result),
+            "bars_held": exit_bar - t,
+            "fvg_index": int(signals["fvg_index"][t]),
+            "ob_index": ob[0],
+        })
+
+    equity_curve = initial_equity + np.cumsum(pnl)
+    return {
+        "trades": trades,
+        "equity_curve": equity_curve,
+        "metrics": calculate_metrics(trades, equity_curve, times, initial_equity) if n else {},
+        "signals": signals,
+    }
@@ -1,6 +1,14 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 import threading
 
+from data.mt5_connector import BAR_CACHE
+from utils.bar_scheduler import SCHEDULER
+from strategy.scanner import SCANNER
+from dashboard.bridge import WRITER
+from ml.model_registry import MODELS
+from utils.profiler import PROFILER
+from utils.stage_metrics import STAGE_METRICS, render_gauges
+
 app = Flask("bot_api")
 
 state = {
@@ -16,7 +24,27 @@ def health():
 
 @app.route("/status", methods=["GET"])
 def status():
-    return jsonify(state)
+    return jsonify({
+        **state,
+        "bar_cache": BAR_CACHE.stats(),
+        "scheduler": SCHEDULER.stats(),
+        "scanner": SCANNER.stats(),
+        "persistence": WRITER.stats(),
+        "stages": STAGE_METRICS.stats(),
+        "model": MODELS.stats(),
+        "profiler": PROFILER.stats(),
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus text format: stage histograms plus the /status counters as gauges."""
+    lines = [STAGE_METRICS.render().rstrip("\n")]
+    lines.append(f"ict_running {int(state['running'])}")
+    for name, source in (("bar_cache", BAR_CACHE), ("scheduler", SCHEDULER),
+                         ("scanner", SCANNER), ("persistence", WRITER), ("model", MODELS)):
+        lines.extend(render_gauges(f"ict_{name}", source.stats()))
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/control", methods=["POST"])
@@ -29,6 +57,24 @@ def control():
     if action == "start":
         state["running"] = True
         return jsonify({"result": "started"})
+    if action == "profile_start":
+        # {"action": "profile_start", "duration": 30, "interval": 0.01}
+        try:
+            run = PROFILER.start(data.get("duration"), data.get("interval"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except RuntimeError as e:
+            return jsonify({"error": str(e)}), 409
+        return jsonify({"result": "profiling", **run})
+    if action == "profile_stop":
+        # stops early, or collects a run that already hit its duration;
+        # {"format": "collapsed"} returns the stacks instead of the summary
+        summary = PROFILER.stop()
+        if summary is None:
+            return jsonify({"error": "no profile recorded"}), 400
+        if data.get("format") == "collapsed":
+            return Response(PROFILER.collapsed(), mimetype="text/plain")
+        return jsonify({"result": "stopped", **summary})
     return jsonify({"error": "unknown action"}), 400
 
 
@@ -50,6 +50,10 @@ class BotConfig(DefaultBotConfig):
     BOT_ENABLED = os.getenv("BOT_ENABLED", "true").lower() == "true"
     API_PORT = int(os.getenv("API_PORT", "8000"))
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
+
+    # Threads used to analyse symbols (see strategy/scanner.py: terminal
+    # calls are serialized, so more than 1 rarely shortens a cycle)
+    SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "1"))
     
     @classmethod
     def validate(cls):
@@ -1,11 +1,15 @@
+import atexit
 import os
 import time
 import logging
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from supabase import create_client
 
+from dashboard.outbox import IDEMPOTENCY_KEY, Outbox
+from dashboard.write_behind import WriteBehindQueue
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +35,16 @@ def _get_supabase_client():
         return None
 
 
+def _supabase_configured():
+    """
+    Cheap check for the persist_* callers: the client itself is built on
+    the write-behind thread, its first create_client costs a few hundred ms.
+    """
+    if _SUPABASE_CLIENT or (os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY")):
+        return True
+    return _get_supabase_client() is not None  # logs why persistence is off
+
+
 def _with_retries(func, max_attempts=3, base_delay=0.5, *args, **kwargs):
     attempt = 0
     while attempt < max_attempts:
@@ -46,8 +60,40 @@ def _with_retries(func, max_attempts=3, base_delay=0.5, *args, **kwargs):
     return None
 
 
+def _insert_rows(table: str, rows: List[Dict[str, Any]]):
+    """
+    Multi-row insert, run on the write-behind thread.  Rows replayed from
+    the outbox may already be stored; their idempotency key makes the
+    second insert a no-op.
+    """
+    client = _get_supabase_client()
+    if not client:
+        return None
+
+    def _insert():
+        return client.table(table).upsert(
+            rows, on_conflict=IDEMPOTENCY_KEY, ignore_duplicates=True
+        ).execute()
+
+    return _with_retries(_insert)
+
+
+# persist_* append to the outbox and enqueue; the writer thread batches rows
+# per table, absorbs Supabase latency and retry backoff off the trading loop,
+# and replays whatever Supabase has not acknowledged yet
+OUTBOX = Outbox(os.getenv("BRIDGE_OUTBOX_PATH", "data/bridge_outbox.db"))
+WRITER = WriteBehindQueue(
+    _insert_rows,
+    max_queue=int(os.getenv("SUPABASE_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("SUPABASE_BATCH_SIZE", "100")),
+    flush_interval=float(os.getenv("SUPABASE_FLUSH_SECONDS", "1.0")),
+    outbox=OUTBOX,
+)
+atexit.register(WRITER.flush)
+
+
 def push_trade(trade: Dict[str, Any]):
-    """Persist trade record for admin inspection. Best-effort with retries."""
+    """Persist trade record for admin inspection. Best-effort, written behind."""
     try:
         persist_log_to_supabase("trade", trade)
     except Exception:
@@ -55,9 +101,8 @@ def push_trade(trade: Dict[str, Any]):
 
 
 def persist_log_to_supabase(event_type: str, payload: Dict[str, Any]):
-    """Persist a simple log record to Supabase `bot_logs` table."""
-    client = _get_supabase_client()
-    if not client:
+    """Queue a simple log record for the Supabase `bot_logs` table."""
+    if not _supabase_configured():
         return
 
     record = {
@@ -66,20 +111,13 @@ def persist_log_to_supabase(event_type: str, payload: Dict[str, Any]):
         "created_at": datetime.utcnow().isoformat(),
     }
 
-    def _insert():
-        return client.table(os.getenv("BOT_LOGS_TABLE", "bot_logs")).insert(record).execute()
-
-    res = _with_retries(_insert)
-    if res is None:
-        logger.error("persist_log_to_supabase: failed to insert log: %s", record)
-    else:
-        logger.debug("persist_log_to_supabase: inserted log: %s", event_type)
+    if WRITER.put(os.getenv("BOT_LOGS_TABLE", "bot_logs"), record):
+        logger.debug("persist_log_to_supabase: queued log: %s", event_type)
 
 
 def persist_signal_to_supabase(signal: Dict[str, Any]):
-    """Persist a generated trading signal to Supabase `bot_signals` table with retries and logging."""
-    client = _get_supabase_client()
-    if not client:
+    """Queue a generated trading signal for the Supabase `bot_signals` table."""
+    if not _supabase_configured():
         return
 
     table = os.getenv("BOT_SIGNALS_TABLE", "bot_signals")
@@ -97,11 +135,5 @@ def persist_signal_to_supabase(signal: Dict[str, Any]):
         "created_at": datetime.utcnow().isoformat(),
     }
 
-    def _insert_signal():
-        return client.table(table).insert(record).execute()
-
-    res = _with_retries(_insert_signal)
-    if res is None:
-        logger.error("persist_signal_to_supabase: failed to insert signal: %s", record)
-    else:
-        logger.debug("persist_signal_to_supabase: inserted signal for %s", record.get("symbol"))
+    if WRITER.put(table, record):
+        logger.debug("persist_signal_to_supabase: queued signal for %s", record.get("symbol"))
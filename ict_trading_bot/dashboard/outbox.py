@@ -0,0 +1,128 @@
+"""
+Durable local outbox for dashboard persistence.
+
+Every record is appended to a SQLite table (WAL journal, synchronous=NORMAL,
+so an append is a single un-fsynced commit) before anything is sent to
+Supabase.  Rows carry an idempotency key and leave the outbox only when the
+insert that carried them is acknowledged, so a Supabase outage or a restart
+delays records instead of losing them; replaying a row twice is harmless.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Tuple
+
+IDEMPOTENCY_KEY = "idempotency_key"
+
+
+class Outbox:
+    def __init__(self, path: str, compact_every: int = 1000):
+        self.path = path
+        self.compact_every = compact_every
+        self._conn = None
+        self._lock = threading.Lock()
+
+        self.appended = 0
+        self.acked = 0
+        self.compactions = 0
+        self._acked_since_compact = 0
+        self.max_append_us = 0.0
+        self._total_append_us = 0.0
+
+    def _db(self):
+        # opened lazily so importing the bridge never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " tbl TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    # -------------------------
+    # APPEND / REPLAY / ACK
+    # -------------------------
+    def append(self, table: str, record: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Store one row; returns (seq, record with its idempotency key)."""
+        started = time.perf_counter()
+        record = dict(record)
+        record.setdefault(IDEMPOTENCY_KEY, uuid.uuid4().hex)
+        payload = json.dumps(record, default=str)
+
+        with self._lock:
+            cur = self._db().execute(
+                "INSERT INTO outbox (tbl, payload, created) VALUES (?, ?, ?)",
+                (table, payload, time.time()),
+            )
+            elapsed_us = 1e6 * (time.perf_counter() - started)
+            self.appended += 1
+            self._total_append_us += elapsed_us
+            self.max_append_us = max(self.max_append_us, elapsed_us)
+        return cur.lastrowid, record
+
+    def pending(self, limit: int = 500) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Oldest unacknowledged rows as (seq, table, record), in append order."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT seq, tbl, payload FROM outbox ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [(seq, table, json.loads(payload)) for seq, table, payload in rows]
+
+    def ack(self, seqs: Iterable[int]):
+        seqs = list(seqs)
+        if not seqs:
+            return
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN")
+            db.executemany("DELETE FROM outbox WHERE seq = ?", [(s,) for s in seqs])
+            db.execute("COMMIT")
+            self.acked += len(seqs)
+            self._acked_since_compact += len(seqs)
+            due = self._acked_since_compact >= self.compact_every
+        if due:
+            self.compact()
+
+    def compact(self):
+        """Fold the WAL back into the database and return freed pages to the OS."""
+        with self._lock:
+            db = self._db()
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            db.execute("PRAGMA incremental_vacuum")
+            self.compactions += 1
+            self._acked_since_compact = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self):
+        pending = len(self)
+        with self._lock:
+            return {
+                "pending": pending,
+                "appended": self.appended,
+                "acked": self.acked,
+                "compactions": self.compactions,
+                "avg_append_us": self._total_append_us / self.appended if self.appended else 0.0,
+                "max_append_us": self.max_append_us,
+            }
@@ -0,0 +1,247 @@
+"""
+Write-behind queue for dashboard persistence.
+
+Callers on the trading loop only append a record to a bounded in-memory
+queue and return.  A single writer thread drains it, coalesces records per
+table into multi-row inserts and flushes a table once it holds `batch_size`
+rows or its oldest row has waited `flush_interval` seconds.  Retries and
+their backoff sleeps happen on the writer thread, never on the caller's.
+
+With an Outbox attached, put() first appends the record to it and a row
+only leaves the outbox once its insert succeeded.  Rows whose insert failed
+(or that did not fit the queue, or were left over from a previous run) are
+replayed from the outbox in append order whenever the writer is idle.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Flush:
+    """Queue marker: flush everything buffered, then set `done`."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class WriteBehindQueue:
+    """
+    sink(table, rows) -> result, or None when the insert failed for good
+    """
+
+    MAX_REPLAY_DELAY = 60.0
+
+    def __init__(self, sink: Callable[[str, List[Dict[str, Any]]], Any],
+                 max_queue: int = 10000, batch_size: int = 100, flush_interval: float = 1.0,
+                 outbox=None):
+        self._sink = sink
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.outbox = outbox
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        # table -> (first_enqueued_at, [(seq, row)])
+        self._buffers = {}
+        self._replay_at = 0.0
+        self._replay_delay = flush_interval
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.deferred = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self.replayed_rows = 0
+        self.replay_rows_per_s = 0.0
+        self.max_depth = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    # -------------------------
+    # PRODUCER SIDE
+    # -------------------------
+    def put(self, table: str, record: Dict[str, Any]) -> bool:
+        """
+        Queue one row for `table`.  Never blocks on the network.  Without an
+        outbox, returns False (row dropped) if the queue is full.
+        """
+        seq = None
+        if self.outbox is not None:
+            seq, record = self.outbox.append(table, record)
+
+        self.start()
+        try:
+            self._queue.put_nowait((table, seq, record))
+        except queue.Full:
+            with self._lock:
+                if seq is not None:
+                    # safe in the outbox; the next replay sends it
+                    self.deferred += 1
+                    return True
+                self.dropped += 1
+            logger.warning("write-behind queue full; dropping %s row", table)
+            return False
+
+        depth = self._queue.qsize()
+        with self._lock:
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, depth)
+        return True
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until everything queued so far has been written (or timeout)."""
+        if self._thread is None:
+            return True
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    # -------------------------
+    # WRITER THREAD
+    # -------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def _next_deadline(self):
+        if self._buffers:
+            return min(first for first, _ in self._buffers.values()) + self.flush_interval
+        if self.outbox is not None:
+            return max(self._replay_at, time.monotonic() + self.flush_interval)
+        return None
+
+    def _run(self):
+        # rows left over from a previous run go out first
+        self._replay()
+        while True:
+            deadline = self._next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _Flush):
+                self._flush_all()
+                if self.outbox is not None:
+                    self._replay(force=True)
+                item.done.set()
+                continue
+
+            if item is not None:
+                table, seq, record = item
+                first, rows = self._buffers.setdefault(table, (time.monotonic(), []))
+                rows.append((seq, record))
+                if len(rows) >= self.batch_size:
+                    self._flush_table(table)
+
+            now = time.monotonic()
+            for table in [t for t, (first, _) in self._buffers.items() if now - first >= self.flush_interval]:
+                self._flush_table(table)
+
+            if item is None and not self._buffers:
+                self._replay()
+
+    def _flush_all(self):
+        for table in list(self._buffers):
+            self._flush_table(table)
+
+    def _send(self, table, entries):
+        """Insert one batch of (seq, row); acks the outbox on success."""
+        rows = [record for _, record in entries]
+        started = time.perf_counter()
+        try:
+            result = self._sink(table, rows)
+        except Exception:
+            logger.exception("write-behind: insert into %s raised", table)
+            result = None
+        elapsed_ms = 1000 * (time.perf_counter() - started)
+
+        with self._lock:
+            self.flushes += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+            if result is None:
+                self.failed_rows += len(rows)
+            else:
+                self.flushed_rows += len(rows)
+
+        if result is None:
+            if self.outbox is None:
+                logger.error("write-behind: dropped %d %s rows after failed insert", len(rows), table)
+            else:
+                # back off before the outbox is replayed again
+                self._replay_at = time.monotonic() + self._replay_delay
+                self._replay_delay = min(2 * self._replay_delay, self.MAX_REPLAY_DELAY)
+            return False
+
+        if self.outbox is not None:
+            self.outbox.ack(seq for seq, _ in entries)
+        return True
+
+    def _flush_table(self, table):
+        _, entries = self._buffers.pop(table)
+        self._send(table, entries)
+
+    def _replay(self, force=False):
+        """Send outbox rows in append order, one bulk insert per table per batch."""
+        if self.outbox is None or (not force and time.monotonic() < self._replay_at):
+            return
+        started = time.perf_counter()
+        sent = 0
+        while self._queue.empty() or force:
+            pending = self.outbox.pending(self.batch_size)
+            if not pending:
+                break
+            by_table = {}
+            for seq, table, record in pending:
+                by_table.setdefault(table, []).append((seq, record))
+            for table, entries in by_table.items():
+                if not self._send(table, entries):
+                    return
+                sent += len(entries)
+            self._replay_delay = self.flush_interval
+            if len(pending) < self.batch_size:
+                break
+
+        if sent:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.replayed_rows += sent
+                self.replay_rows_per_s = sent / elapsed if elapsed > 0 else 0.0
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "queue_depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "deferred": self.deferred,
+                "flushes": self.flushes,
+                "flushed_rows": self.flushed_rows,
+                "failed_rows": self.failed_rows,
+                "replayed_rows": self.replayed_rows,
+                "replay_rows_per_s": self.replay_rows_per_s,
+                "last_flush_ms": self.last_flush_ms,
+                "avg_flush_ms": self._total_flush_ms / self.flushes if self.flushes else 0.0,
+                "max_flush_ms": self.max_flush_ms,
+            }
+        if self.outbox is not None:
+            stats["outbox"] = self.outbox.stats()
+        return stats
@@ -0,0 +1,257 @@
+"""
+Local on-disk bar store.
+
+One append-only file per symbol and timeframe, <root>/<SYMBOL>/<TF>.npy,
+holding closed bars as MT5 rates records (mt5_sim.history.RATE_DTYPE) in
+time order.  The files are plain .npy, so np.load works on them, but the
+header is a fixed 256 bytes so an append only writes the new rows and
+rewrites the row count in place.
+
+Reads are read-only np.memmap slices: zero-copy, and drop-in wherever MT5
+rates arrays are used (detectors, ICTState, backtest.vectorized).  Time
+lookups bisect a sparse in-memory index (every INDEX_STRIDE-th bar time)
+and then one INDEX_STRIDE-row block of the file, so they are O(log n)
+without reading the time column.
+
+    store = BarStore("data/bars")
+    ingest(store, "EURUSD", "M15")                  # backfill, then only new bars
+    rates = store.read("EURUSD", "M15", start, end)  # [start, end) by bar open time
+"""
+import ast
+import os
+import threading
+
+import numpy as np
+
+from mt5_sim.history import RATE_DTYPE, as_rates
+
+HEADER_SIZE = 256
+MAGIC = b"\x93NUMPY\x01\x00"
+INDEX_STRIDE = 512
+
+
+def npy_header(count, dtype=RATE_DTYPE):
+    """Fixed HEADER_SIZE-byte .npy header for `count` rows of `dtype`."""
+    body = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.lib.format.dtype_to_descr(dtype), count)
+    pad = HEADER_SIZE - len(MAGIC) - 2 - len(body) - 1
+    if pad < 0:
+        raise ValueError("fixed .npy header overflow")
+    body = (body + " " * pad + "\n").encode("latin1")
+    return MAGIC + (len(body)).to_bytes(2, "little") + body
+
+
+def read_npy_count(f):
+    """Row count in the header of a file written with npy_header()."""
+    head = f.read(HEADER_SIZE)
+    if len(head) < HEADER_SIZE or not head.startswith(MAGIC):
+        raise ValueError(f"not a fixed-header .npy file: {f.name}")
+    return int(ast.literal_eval(head[10:].decode("latin1"))["shape"][0])
+
+
+class _Mapped:
+    __slots__ = ("stamp", "rates", "index")
+
+    def __init__(self, stamp, rates, index):
+        self.stamp = stamp
+        self.rates = rates
+        self.index = index
+
+
+class BarStore:
+    """
+    Per-symbol/timeframe bar files under `root`.  Safe for many reader
+    threads and one writer per file; readers in other processes pick up
+    appends on their next read (maps are keyed on file size and mtime).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._maps = {}
+        self._lock = threading.Lock()
+        self.appends = 0
+        self.bars_appended = 0
+        self.remaps = 0
+
+    def path(self, symbol, timeframe):
+        return os.path.join(self.root, symbol, f"{timeframe}.npy")
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def timeframes(self, symbol):
+        folder = os.path.join(self.root, symbol)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(name[:-4] for name in os.listdir(folder) if name.endswith(".npy"))
+
+    # -------------------------
+    # READS
+    # -------------------------
+    def _mapped(self, symbol, timeframe):
+        path = self.path(symbol, timeframe)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_size, st.st_mtime_ns)
+        key = (symbol, timeframe)
+        mapped = self._maps.get(key)
+        if mapped is not None and mapped.stamp == stamp:
+            return mapped
+
+        with open(path, "rb") as f:
+            count = read_npy_count(f)
+        # a torn append can leave rows past the header's count; ignore them
+        count = min(count, (st.st_size - HEADER_SIZE) // RATE_DTYPE.itemsize)
+        if count:
+            rates = np.memmap(path, dtype=RATE_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            rates = np.zeros(0, dtype=RATE_DTYPE)
+        index = np.array(rates["time"][::INDEX_STRIDE])
+        mapped = _Mapped(stamp, rates, index)
+        with self._lock:
+            self._maps[key] = mapped
+            self.remaps += 1
+        return mapped
+
+    def _position(self, mapped, t):
+        """First row with time >= t."""
+        j = int(np.searchsorted(mapped.index, t, side="left"))
+        lo = max(j - 1, 0) * INDEX_STRIDE
+        hi = min(j * INDEX_STRIDE, len(mapped.rates))
+        return lo + int(np.searchsorted(mapped.rates["time"][lo:hi], t, side="left"))
+
+    def read(self, symbol, timeframe, start=None, end=None):
+        """Bars opening in [start, end) (epoch seconds; None = open-ended), read-only."""
+        mapped = self._mapped(symbol, timeframe)
+        if mapped is None:
+            return np.zeros(0, dtype=RATE_DTYPE)
+        lo = 0 if start is None else self._position(mapped, start)
+        hi = len(mapped.rates) if end is None else self._position(mapped, end)
+        return mapped.rates[lo:max(lo, hi)]
+
+    def tail(self, symbol, timeframe, count):
+        """The last `count` stored bars."""
+        mapped = self._mapped(symbol, timeframe)
+        if mapped is None:
+            return np.zeros(0, dtype=RATE_DTYPE)
+        return mapped.rates[max(len(mapped.rates) - count, 0):]
+
+    def count(self, symbol, timeframe):
+        mapped = self._mapped(symbol, timeframe)
+        return 0 if mapped is None else len(mapped.rates)
+
+    def last_time(self, symbol, timeframe):
+        mapped = self._mapped(symbol, timeframe)
+        if mapped is None or not len(mapped.rates):
+            return None
+        return int(mapped.rates["time"][-1])
+
+    def fetch(self, symbol, timeframe, start_pos, count):
+        """
+        BarCache fetch over the store, copy_rates_from_pos style.  The store
+        only holds closed bars, so start_pos 1 (MT5's newest closed bar) is
+        the last stored bar.
+        """
+        mapped = self._mapped(symbol, timeframe)
+        if mapped is None:
+            return None
+        end = len(mapped.rates) - max(start_pos - 1, 0)
+        rates = mapped.rates[max(end - count, 0):max(end, 0)]
+        return rates if len(rates) else None
+
+    # -------------------------
+    # WRITES
+    # -------------------------
+    def append(self, symbol, timeframe, rates):
+        """
+        Append the bars of `rates` newer than the last stored one (older or
+        duplicate bars are skipped).  Returns the number of bars written.
+        """
+        rates = as_rates(rates)
+        rates.sort(order="time", kind="stable")
+        if len(rates):
+            # keep the last copy of a repeated bar time
+            keep = np.r_[rates["time"][1:] != rates["time"][:-1], True]
+            rates = rates[keep]
+
+        path = self.path(symbol, timeframe)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            mode = "r+b" if os.path.exists(path) else "w+b"
+            with open(path, mode) as f:
+                if mode == "w+b":
+                    count = 0
+                    f.write(npy_header(0))
+                else:
+                    count = read_npy_count(f)
+                f.seek(0, os.SEEK_END)
+                count = min(count, (f.tell() - HEADER_SIZE) // RATE_DTYPE.itemsize)
+
+                if count:
+                    f.seek(HEADER_SIZE + (count - 1) * RATE_DTYPE.itemsize)
+                    last = np.frombuffer(f.read(RATE_DTYPE.itemsize), dtype=RATE_DTYPE)["time"][0]
+                    rates = rates[rates["time"] > last]
+                if not len(rates):
+                    return 0
+
+                # rows first, then the count: a crash in between leaves the
+                # old count, and the torn rows are overwritten next time
+                f.seek(HEADER_SIZE + count * RATE_DTYPE.itemsize)
+                f.truncate()
+                f.write(rates.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+                f.seek(0)
+                f.write(npy_header(count + len(rates)))
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.appends += 1
+            self.bars_appended += len(rates)
+        return len(rates)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "root": self.root,
+                "files": len(self._maps),
+                "appends": self.appends,
+                "bars_appended": self.bars_appended,
+                "remaps": self.remaps,
+            }
+
+
+# -------------------------
+# INGESTION
+# -------------------------
+def ingest(store, symbol, timeframe, fetch=None, now=None, max_bars=100_000):
+    """
+    Append the bars that closed on the terminal since the store's last one.
+    An empty store is backfilled with up to `max_bars` (the terminal's
+    history cap applies).  Returns the number of bars appended.
+
+    fetch(symbol, timeframe, start_pos, count) -> MT5 rates (default: the
+    terminal); now(symbol) -> broker time (default: BAR_CACHE's clock).
+    """
+    # imported here: data.mt5_connector builds BAR_CACHE from this module
+    from data.mt5_connector import BAR_CACHE, TIMEFRAME_SECONDS, _copy_rates
+
+    fetch = fetch or _copy_rates
+    now = now or BAR_CACHE.now
+    last = store.last_time(symbol, timeframe)
+    if last is None:
+        count = max_bars
+    else:
+        # closed bars since `last`, plus `last` itself as overlap
+        count = int((now(symbol) - last) // TIMEFRAME_SECONDS[timeframe])
+        if count < 2:
+            return 0
+        count = min(count, max_bars)
+
+    rates = fetch(symbol, timeframe, 1, count)
+    if rates is None or not len(rates):
+        return 0
+    return store.append(symbol, timeframe, rates)
@@ -0,0 +1,320 @@
+"""
+Historical ML feature store: every candidate setup, its filter features
+and its SL/TP outcome.
+
+build_features() replays a symbol's stored bars through the vectorized
+pipeline (backtest.vectorized.entry_signals: the same decision main.py
+makes after each M15 close), keeps every candidate -- not just the ones a
+one-position-at-a-time backtest would take -- and labels each by walking
+its own SL/TP forward (label_outcomes): win = TP before SL.  The feature
+row is main.scan_symbol's (atr, fvg size, ob size, distance to fib 0.5).
+
+Layout: <root>/<SYMBOL>/<YYYY-MM>/<column>.npy, one column per file,
+partitioned by the candidate's month.  Columns use the bar store's
+fixed-header .npy trick (data.bar_store), so np.load reads them and an
+append writes only the new rows, then each header's count.  A reader
+takes the smallest count across a partition's columns, so a crash
+mid-append shows either the old rows or the new ones, never a torn row.
+
+Runs are incremental: <root>/<SYMBOL>/state.json records the time from
+which candidates are still open (SL/TP not hit yet).  The next run only
+replays bars from there, minus the detectors' warm-up, and appends
+nothing it already stored.
+
+    build_features(FeatureStore("data/features"), BarStore("data/bars"), "EURUSD")
+    export_csv(store, "features.csv")   # ml.trainer input
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from data.bar_store import HEADER_SIZE, npy_header, read_npy_count
+
+FEATURES = ("atr", "fvg_size", "ob_size", "fib_distance")
+COLUMNS = {
+    "time": np.dtype("<i8"),        # signal candle open (epoch seconds)
+    "direction": np.dtype("i1"),    # 1 buy, -1 sell
+    "entry": np.dtype("<f8"),
+    "sl": np.dtype("<f8"),
+    "tp": np.dtype("<f8"),
+    **{name: np.dtype("<f8") for name in FEATURES},
+    "exit_time": np.dtype("<i8"),   # open of the candle that hit SL or TP
+    "win": np.dtype("i1"),
+}
+
+
+def _month(t):
+    return datetime.fromtimestamp(int(t), timezone.utc).strftime("%Y-%m")
+
+
+class FeatureStore:
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self.appends = 0
+        self.rows_appended = 0
+
+    def path(self, symbol, month, column):
+        return os.path.join(self.root, symbol, month, f"{column}.npy")
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def months(self, symbol):
+        folder = os.path.join(self.root, symbol)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(d for d in os.listdir(folder) if os.path.isdir(os.path.join(folder, d)))
+
+    # -------------------------
+    # READS
+    # -------------------------
+    def _count(self, symbol, month):
+        counts = []
+        for column, dtype in COLUMNS.items():
+            path = self.path(symbol, month, column)
+            try:
+                with open(path, "rb") as f:
+                    count = read_npy_count(f)
+                    size = os.fstat(f.fileno()).st_size
+            except (FileNotFoundError, ValueError):
+                # missing, or torn before its header was complete
+                return 0
+            counts.append(min(count, (size - HEADER_SIZE) // dtype.itemsize))
+        return min(counts)
+
+    def read(self, symbol, month, columns=None):
+        """{column: read-only array} of one partition, in time order."""
+        count = self._count(symbol, month)
+        out = {}
+        for column in columns or COLUMNS:
+            dtype = COLUMNS[column]
+            if count:
+                out[column] = np.memmap(self.path(symbol, month, column), dtype=dtype, mode="r",
+                                        offset=HEADER_SIZE, shape=(count,))
+            else:
+                out[column] = np.zeros(0, dtype=dtype)
+        return out
+
+    def scan(self, symbols=None, columns=None):
+        """Yield (symbol, month, columns) for every partition."""
+        for symbol in symbols or self.symbols():
+            for month in self.months(symbol):
+                yield symbol, month, self.read(symbol, month, columns)
+
+    def count(self, symbol=None):
+        symbols = [symbol] if symbol else self.symbols()
+        return sum(self._count(s, m) for s in symbols for m in self.months(s))
+
+    def last_time(self, symbol):
+        for month in reversed(self.months(symbol)):
+            times = self.read(symbol, month, ["time"])["time"]
+            if len(times):
+                return int(times[-1])
+        return None
+
+    # -------------------------
+    # WRITES
+    # -------------------------
+    def append(self, symbol, rows):
+        """
+        Append candidate rows ({column: array}, any order) newer than the
+        symbol's last stored one, split into month partitions.  Returns the
+        number of rows written.
+        """
+        order = np.argsort(rows["time"], kind="stable")
+        rows = {column: np.asarray(rows[column], dtype=dtype)[order] for column, dtype in COLUMNS.items()}
+        with self._lock:
+            last = self.last_time(symbol)
+            if last is not None:
+                keep = rows["time"] > last
+                rows = {column: values[keep] for column, values in rows.items()}
+            if not len(rows["time"]):
+                return 0
+            months = np.array([_month(t) for t in rows["time"]])
+            for month in dict.fromkeys(months):
+                mask = months == month
+                self._append_partition(symbol, month, {c: v[mask] for c, v in rows.items()})
+            self.appends += 1
+            self.rows_appended += len(months)
+        return len(months)
+
+    def _append_partition(self, symbol, month, rows):
+        os.makedirs(os.path.dirname(self.path(symbol, month, "time")), exist_ok=True)
+        count = self._count(symbol, month)
+        added = len(rows["time"])
+        files = {}
+        try:
+            # every column's rows first, then every column's count
+            for column, dtype in COLUMNS.items():
+                path = self.path(symbol, month, column)
+                f = files[column] = open(path, "r+b" if os.path.exists(path) else "w+b")
+                if not count:
+                    f.write(npy_header(0, dtype))
+                f.seek(HEADER_SIZE + count * dtype.itemsize)
+                f.truncate()
+                f.write(rows[column].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            for column, dtype in COLUMNS.items():
+                f = files[column]
+                f.seek(0)
+                f.write(npy_header(count + added, dtype))
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            for f in files.values():
+                f.close()
+
+    # -------------------------
+    # INCREMENTAL STATE
+    # -------------------------
+    def _state_path(self, symbol):
+        return os.path.join(self.root, symbol, "state.json")
+
+    def state(self, symbol):
+        try:
+            with open(self._state_path(symbol)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save_state(self, symbol, state):
+        path = self._state_path(symbol)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "root": self.root,
+                "appends": self.appends,
+                "rows_appended": self.rows_appended,
+            }
+
+
+# -------------------------
+# BUILD
+# -------------------------
+def candidate_rows(bars, rr=3, from_time=None):
+    """
+    Labelled candidates of htf/mtf/ltf `bars` with time >= from_time, plus
+    the time of the first candidate still open at the end of the data
+    (None if all resolved).  Rows at or after that time are left out so
+    the store stays in time order; they are re-labelled next run.
+    """
+    from backtest.vectorized import entry_signals, label_outcomes
+
+    ltf = bars["ltf"]
+    signals = entry_signals(bars["htf"], bars["mtf"], ltf, rr=rr)
+    times = np.asarray(ltf["time"], dtype=np.int64)
+    rows = np.flatnonzero(signals["direction"])
+    if from_time is not None:
+        rows = rows[times[rows] >= from_time]
+
+    side = signals["direction"][rows]
+    exit_bar, hit_sl = label_outcomes(ltf["high"], ltf["low"], rows, side,
+                                      signals["sl"][rows], signals["tp"][rows])
+    open_ = exit_bar < 0
+    pending = int(times[rows[open_][0]]) if open_.any() else None
+    done = ~open_ if pending is None else times[rows] < pending
+
+    rows, side, exit_bar, hit_sl = rows[done], side[done], exit_bar[done], hit_sl[done]
+    features = signals["features"][rows]
+    return {
+        "time": times[rows],
+        "direction": side,
+        "entry": signals["entry"][rows],
+        "sl": signals["sl"][rows],
+        "tp": signals["tp"][rows],
+        **{name: features[:, k] for k, name in enumerate(FEATURES)},
+        "exit_time": times[exit_bar],
+        "win": (~hit_sl).astype(np.int8),
+    }, pending
+
+
+def replay_start(bar_store, symbol, pending):
+    """
+    Open time of the first bar to replay so that every timeframe's
+    detectors are warm at `pending`.  Counted in bars of the finest stored
+    timeframe (weekends hold no bars) and floored to an HTF bar open, so
+    the resampled higher timeframes start on whole bars.
+    """
+    from backtest.optimizer import TIMEFRAMES, _warmup
+    from data.mt5_connector import TIMEFRAME_SECONDS
+
+    finest = min(bar_store.timeframes(symbol), key=TIMEFRAME_SECONDS.get)
+    step = TIMEFRAME_SECONDS[finest]
+    bars = max(-(-n * TIMEFRAME_SECONDS[TIMEFRAMES[key]] // step) for key, n in _warmup({}).items())
+    history = bar_store.read(symbol, finest, end=pending)
+    if len(history) <= bars:
+        return None
+    start = int(history["time"][-bars - 1])
+    return start - start % TIMEFRAME_SECONDS[TIMEFRAMES["htf"]]
+
+
+def build_features(store, bar_store, symbol, rr=3):
+    """
+    Append `symbol`'s newly resolved candidates from `bar_store` to
+    `store`.  Only bars since the last run's open candidates (minus the
+    warm-up) are replayed.  Returns the number of rows appended.
+    """
+    from backtest.optimizer import bars_from_store
+
+    state = store.state(symbol)
+    pending = state.get("pending_from")
+    start = None if pending is None else replay_start(bar_store, symbol, pending)
+    bars = bars_from_store(bar_store, symbol, start)
+    if not len(bars["ltf"]):
+        return 0
+
+    rows, still_open = candidate_rows(bars, rr, from_time=pending)
+    added = store.append(symbol, rows)
+    last_bar = int(bars["ltf"]["time"][-1])
+    store.save_state(symbol, {
+        # no open candidates: the next candidate can only come after last_bar
+        "pending_from": still_open if still_open is not None else last_bar + 1,
+        "last_bar": last_bar,
+        "rows": store.count(symbol),
+    })
+    return added
+
+
+# -------------------------
+# EXPORT
+# -------------------------
+def export_csv(store, path, symbols=None):
+    """
+    ml.trainer input (time, symbol, exit_time, features..., win), month by
+    month so only one month of candidates is in memory; exit_time sizes
+    the trainer's purge.  Returns the row count.
+    """
+    import pandas as pd
+
+    symbols = symbols or store.symbols()
+    months = sorted({m for s in symbols for m in store.months(s)})
+    columns = ["time", "exit_time", *FEATURES, "win"]
+    total = 0
+    with open(path + ".tmp", "w", newline="") as f:
+        f.write(",".join(["time", "symbol", "exit_time", *FEATURES, "win"]) + "\n")
+        for month in months:
+            frames = []
+            for symbol in symbols:
+                part = store.read(symbol, month, columns)
+                if len(part["time"]):
+                    frame = pd.DataFrame({c: np.asarray(v) for c, v in part.items()})
+                    frame.insert(1, "symbol", symbol)
+                    frames.append(frame)
+            if frames:
+                frame = pd.concat(frames).sort_values("time", kind="stable")
+                frame.to_csv(f, header=False, index=False)
+                total += len(frame)
+    os.replace(path + ".tmp", path)
+    return total
@@ -0,0 +1,251 @@
+"""
+Cached MT5 bar access shared by the ict_concepts detectors.
+
+Every detector used to call `mt5.copy_rates_from_pos` on its own, so one
+top-down pass cost ~15 broker round trips per symbol.  `get_rates` serves
+all of them from a single closed-bar series per (symbol, timeframe) and
+only asks the terminal for the bars that closed since the last fetch.
+"""
+import os
+import threading
+
+import numpy as np
+
+from utils import clock
+
+# the terminal connection is one per process and its IPC is not
+# documented as thread-safe, while scanner workers, the position manager
+# and the order pool all call it: every mt5.* call takes this lock
+MT5_LOCK = threading.RLock()
+
+
+class _Serialized:
+    """`module` with each of its functions called under MT5_LOCK."""
+
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with MT5_LOCK:
+                # looked up per call so a patched module function is honoured
+                return getattr(self._module, name)(*args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+
+if os.getenv("MT5_BACKEND", "").lower() == "sim":
+    # offline replay against on-disk bars (see mt5_sim)
+    import mt5_sim as mt5
+else:
+    try:
+        import MetaTrader5 as mt5
+    except ImportError:  # MetaTrader5 only ships Windows wheels
+        mt5 = None
+if mt5 is not None:
+    mt5 = _Serialized(mt5)
+
+
+TIMEFRAME_SECONDS = {
+    'M1': 60,
+    'M5': 300,
+    'M15': 900,
+    'M30': 1800,
+    'H1': 3600,
+    'H4': 14400,
+    'D1': 86400,
+}
+
+
+def tf_to_mt5(tf):
+    if mt5 is None:
+        return tf
+    mapping = {
+        'M1': mt5.TIMEFRAME_M1,
+        'M5': mt5.TIMEFRAME_M5,
+        'M15': mt5.TIMEFRAME_M15,
+        'M30': mt5.TIMEFRAME_M30,
+        'H1': mt5.TIMEFRAME_H1,
+        'H4': mt5.TIMEFRAME_H4,
+        'D1': mt5.TIMEFRAME_D1,
+    }
+    return mapping.get(tf, tf)
+
+
+def _copy_rates(symbol, timeframe, start_pos, count):
+    if mt5 is None:
+        raise RuntimeError("MetaTrader5 package is not available")
+    return mt5.copy_rates_from_pos(symbol, tf_to_mt5(timeframe), start_pos, count)
+
+
+def _tick_time(symbol):
+    if mt5 is None:
+        return None
+    tick = mt5.symbol_info_tick(symbol)
+    return float(tick.time) if tick is not None else None
+
+
+class _Series:
+    __slots__ = ("rates", "expires")
+
+    def __init__(self, rates, expires):
+        self.rates = rates
+        self.expires = expires
+
+
+class BarCache:
+    """
+    Closed-bar cache keyed by (symbol, timeframe, bars).
+
+    All windows of one symbol/timeframe are sliced from a single series that
+    holds the largest window requested so far, so the 200-bar and 500-bar
+    detectors share one fetch.  A series stays valid until the bar forming at
+    fetch time closes; after that only the newly closed bars are requested.
+
+    fetch(symbol, timeframe, start_pos, count) -> MT5 rates array
+    now(symbol) -> current broker (server) time in epoch seconds
+    """
+
+    # how long to wait before asking again when no new bar has appeared
+    # (weekends, holidays, halted symbols)
+    RETRY_SECONDS = 30
+
+    def __init__(self, fetch=None, now=None):
+        self._fetch = fetch or _copy_rates
+        self._now = now or self.server_time
+        self._series = {}
+        self._offsets = {}
+        # counters only; symbols are scanned by one worker at a time, so the
+        # series themselves are never shared between threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.bars_fetched = 0
+
+    # -------------------------
+    # CLOCK
+    # -------------------------
+    def server_time(self, symbol):
+        # MT5 bar times are broker server time; keep a per-symbol offset to
+        # the local clock, rounded to 30 min so a stale tick does not skew it
+        offset = self._offsets.get(symbol)
+        if offset is None:
+            tick_time = _tick_time(symbol)
+            offset = 0.0
+            if tick_time is not None:
+                offset = round((tick_time - clock.now()) / 1800.0) * 1800.0
+            self._offsets[symbol] = offset
+        return clock.now() + offset
+
+    def now(self, symbol):
+        """Broker server time for `symbol` as seen by this cache."""
+        return self._now(symbol)
+
+    # -------------------------
+    # FETCHING
+    # -------------------------
+    def _pull(self, symbol, timeframe, count):
+        rates = self._fetch(symbol, timeframe, 1, count)
+        fetched = 0 if rates is None else len(rates)
+        with self._lock:
+            self.fetches += 1
+            self.bars_fetched += fetched
+        return rates if fetched else None
+
+    def get(self, symbol, timeframe, bars=200):
+        """Return the last `bars` closed candles (read-only MT5 rates array)."""
+        key = (symbol, timeframe)
+        series = self._series.get(key)
+        now = self._now(symbol)
+
+        if series is not None and len(series.rates) >= bars and now < series.expires:
+            with self._lock:
+                self.hits += 1
+            return series.rates[-bars:]
+
+        with self._lock:
+            self.misses += 1
+        # re-learn the server offset on the next lookup (DST switches)
+        self._offsets.pop(symbol, None)
+        period = TIMEFRAME_SECONDS.get(timeframe)
+
+        if series is None or len(series.rates) < bars or period is None:
+            capacity = max(bars, len(series.rates) if series is not None else 0)
+            rates = self._pull(symbol, timeframe, capacity)
+            if rates is None:
+                return rates
+        else:
+            capacity = len(series.rates)
+            last = series.rates['time'][-1]
+            # closed bars that opened after `last`, plus `last` itself as overlap
+            count = min(int((now - last) // period), capacity)
+            new = self._pull(symbol, timeframe, max(count, 1))
+            if new is None:
+                series.expires = now + self.RETRY_SECONDS
+                return series.rates[-bars:]
+
+            if new['time'][0] > last and len(new) >= count:
+                # no overlap with the cached tail: we may have missed bars
+                rates = self._pull(symbol, timeframe, capacity)
+                if rates is None:
+                    return series.rates[-bars:]
+            else:
+                new = new[new['time'] > last]
+                rates = np.concatenate([series.rates, new])[-capacity:] if len(new) else series.rates
+
+        rates = np.array(rates, copy=True)
+        rates.flags.writeable = False
+
+        if period is None:
+            expires = now
+        else:
+            expires = rates['time'][-1] + 2 * period
+            if expires <= now:
+                expires = now + self.RETRY_SECONDS
+
+        self._series[key] = _Series(rates, expires)
+        return rates[-bars:]
+
+    def invalidate(self, symbol=None):
+        if symbol is None:
+            self._series.clear()
+            self._offsets.clear()
+            return
+        for key in [k for k in self._series if k[0] == symbol]:
+            del self._series[key]
+        self._offsets.pop(symbol, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "fetches": self.fetches,
+            "bars_fetched": self.bars_fetched,
+            "series": len(self._series),
+        }
+
+
+def _bar_fetch():
+    # BAR_SOURCE=store serves the detectors from the local bar store
+    # (data.bar_store) instead of the terminal
+    if os.getenv("BAR_SOURCE", "").lower() != "store":
+        return None
+    from data.bar_store import BarStore
+
+    return BarStore(os.getenv("BAR_STORE_PATH", "data/bars")).fetch
+
+
+BAR_CACHE = BarCache(fetch=_bar_fetch())
+
+
+def get_rates(symbol, timeframe, bars=200):
+    """Closed bars for symbol/timeframe from the shared cache."""
+    return BAR_CACHE.get(symbol, timeframe, bars)
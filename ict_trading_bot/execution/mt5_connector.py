@@ -1,6 +1,4 @@
-import MetaTrader5 as mt5
-import time
-
+from data.mt5_connector import mt5
 from utils.mt5_credentials import fetch_mt5_credentials
 
 def connect(credentials=None):
@@ -62,6 +60,7 @@ def get_open_positions():
     for p in positions:
         try:
             out.append({
+                "ticket": p.ticket,
                 "symbol": p.symbol,
                 "volume": p.volume,
                 "price": p.price_open,
@@ -73,3 +72,11 @@ def get_open_positions():
             continue
 
     return out
+
+
+def get_open_tickets():
+    """Tickets of all open positions, or None if the terminal call failed."""
+    positions = mt5.positions_get()
+    if positions is None:
+        return None
+    return {p.ticket for p in positions}
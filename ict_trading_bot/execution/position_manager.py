@@ -0,0 +1,216 @@
+"""
+Background position manager.
+
+Owns every open trade the bot placed.  A daemon thread polls one price per
+symbol, runs risk.trade_management.manage_trade on each trade (BE, partial,
+trail) and hands the resulting modifications to a small worker pool, so
+neither tick polling nor order_send ever blocks the signal scan.
+
+Broker access is injected (see main.py) so this module has no MT5 import.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from risk.trade_management import manage_trade
+
+
+class PositionManager:
+    """
+    get_price(symbol) -> float
+    modify_sl(ticket, symbol, sl, tp) -> result or None on failure
+    close_partial(ticket, symbol, direction, volume) -> result or None
+    open_tickets() -> set of open position tickets, or None if unknown
+    """
+
+    def __init__(self, get_price, modify_sl, close_partial, open_tickets=None,
+                 poll_interval=0.5, reconcile_every=10, workers=2,
+                 retry_base=1.0, retry_max=60.0, max_retries=5):
+        self._get_price = get_price
+        self._modify_sl = modify_sl
+        self._close_partial = close_partial
+        self._open_tickets = open_tickets
+        self.poll_interval = poll_interval
+        self.reconcile_every = reconcile_every
+        # a rejected modification (market closed, stop inside the freeze
+        # level, position already gone) is retried after retry_base,
+        # 2 * retry_base, ... up to retry_max seconds; after max_retries
+        # failures in a row that modification is abandoned
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_retries = max_retries
+
+        self._trades = {}
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._orders = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="orders")
+        self._stop = threading.Event()
+        self._thread = None
+        self._polls = 0
+
+        self.modifications = 0
+        self.failures = 0
+        self.abandoned = 0
+        self.last_poll_ms = 0.0
+
+    # -------------------------
+    # TRADES
+    # -------------------------
+    def add(self, trade):
+        """
+        trade = { ticket, symbol, direction, entry, sl, tp, lot }
+        """
+        trade = dict(trade)
+        trade.setdefault("stage", 0)
+        trade.setdefault("risk", abs(trade["entry"] - trade["sl"]))
+        trade["sent_sl"] = trade["sl"]
+        trade["abandoned_sl"] = None
+        trade["failures"] = 0
+        trade["retry_at"] = 0.0
+        with self._lock:
+            self._trades[trade["ticket"]] = trade
+
+    def remove(self, ticket):
+        with self._lock:
+            self._trades.pop(ticket, None)
+
+    def open_trades(self):
+        with self._lock:
+            return [dict(t) for t in self._trades.values()]
+
+    # -------------------------
+    # LOOP
+    # -------------------------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="position-manager", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._orders.shutdown(wait=False)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print("Position manager error:", e)
+
+    def poll(self):
+        """One management pass over every open trade."""
+        started = time.perf_counter()
+        self._polls += 1
+        if self._open_tickets is not None and (self._polls - 1) % self.reconcile_every == 0:
+            self._reconcile()
+
+        now = time.monotonic()
+        with self._lock:
+            trades = [t for ticket, t in self._trades.items()
+                      if ticket not in self._in_flight and t["retry_at"] <= now]
+
+        prices = {}
+        for trade in trades:
+            symbol = trade["symbol"]
+            if symbol not in prices:
+                try:
+                    prices[symbol] = self._get_price(symbol)
+                except Exception:
+                    prices[symbol] = None
+            if prices[symbol] is None:
+                continue
+
+            self._dispatch(trade, manage_trade(trade, prices[symbol]))
+
+        self.last_poll_ms = 1000 * (time.perf_counter() - started)
+
+    def _reconcile(self):
+        # positions closed by SL/TP (or by hand) on the broker side
+        tickets = self._open_tickets()
+        if tickets is None:
+            return
+        with self._lock:
+            for ticket in [t for t in self._trades if t not in tickets]:
+                del self._trades[ticket]
+
+    # -------------------------
+    # MODIFICATIONS
+    # -------------------------
+    def _dispatch(self, trade, action):
+        if action and action.get("action") == "partial_close":
+            volume = round(trade["lot"] * action["percent"], 2)
+            if volume > 0:
+                self._submit(trade, self._send_partial, volume)
+            return
+
+        # move_sl / trail, or a stop that failed to go out earlier; trailing
+        # returns an action on every tick, so only send real changes
+        if trade["sl"] != trade["sent_sl"] and trade["sl"] != trade["abandoned_sl"]:
+            self._submit(trade, self._send_sl, trade["sl"])
+
+    def _submit(self, trade, fn, value):
+        with self._lock:
+            self._in_flight.add(trade["ticket"])
+        self._orders.submit(fn, trade, value)
+
+    def _send_sl(self, trade, sl):
+        try:
+            result = self._modify_sl(trade["ticket"], trade["symbol"], sl, trade["tp"])
+        except Exception as e:
+            print("SL modify error:", e)
+            result = None
+        with self._lock:
+            self._in_flight.discard(trade["ticket"])
+            if result is None:
+                if self._failed(trade, f"SL modify to {sl}"):
+                    trade["abandoned_sl"] = sl
+                return
+            self._succeeded(trade)
+            trade["sent_sl"] = sl
+
+    def _send_partial(self, trade, volume):
+        try:
+            result = self._close_partial(trade["ticket"], trade["symbol"], trade["direction"], volume)
+        except Exception as e:
+            print("Partial close error:", e)
+            result = None
+        with self._lock:
+            self._in_flight.discard(trade["ticket"])
+            if result is None:
+                if not self._failed(trade, f"partial close of {volume}"):
+                    # let manage_trade fire the partial again after the backoff
+                    trade["stage"] = 1
+                return
+            self._succeeded(trade)
+            trade["lot"] = round(trade["lot"] - volume, 2)
+
+    def _failed(self, trade, what):
+        """Count a rejection and back off; True once the modification is abandoned."""
+        self.failures += 1
+        trade["failures"] += 1
+        delay = min(self.retry_max, self.retry_base * 2 ** (trade["failures"] - 1))
+        trade["retry_at"] = time.monotonic() + delay
+        if trade["failures"] < self.max_retries:
+            return False
+        self.abandoned += 1
+        print(f"Position manager: giving up on {what} for ticket {trade['ticket']} "
+              f"after {trade['failures']} failures")
+        return True
+
+    def _succeeded(self, trade):
+        self.modifications += 1
+        trade["failures"] = 0
+        trade["retry_at"] = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "open_trades": len(self._trades),
+                "in_flight": len(self._in_flight),
+                "modifications": self.modifications,
+                "failures": self.failures,
+                "abandoned": self.abandoned,
+                "last_poll_ms": self.last_poll_ms,
+            }
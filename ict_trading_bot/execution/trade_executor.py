@@ -1,6 +1,7 @@
-import MetaTrader5 as mt5
 from datetime import datetime
 
+from data.mt5_connector import mt5
+
 
 def calculate_lot_size(
     symbol: str,
@@ -33,11 +34,14 @@ def execute_trade(
     direction: str,
     lot: float,
     sl_price: float,
-    tp_price: float
+    tp_price: float,
+    order_type: str = "market"
 ):
     """
     Execute a market order on MT5.
     direction: 'buy' or 'sell'
+    order_type: routing hint from order_router; only market execution is
+    implemented, so 'limit' is currently filled at market as well
     """
 
     tick = mt5.symbol_info_tick(symbol)
@@ -73,3 +77,60 @@ def execute_trade(
     )
 
     return result
+
+
+def modify_position_sl(ticket: int, symbol: str, sl: float, tp: float):
+    """
+    Move the stop (and keep the target) of an open position.
+    """
+    request = {
+        "action": mt5.TRADE_ACTION_SLTP,
+        "position": ticket,
+        "symbol": symbol,
+        "sl": sl,
+        "tp": tp,
+        "magic": 202401,
+    }
+
+    result = mt5.order_send(request)
+
+    if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+        print(f"[{datetime.now()}] SL modify failed:", getattr(result, "comment", mt5.last_error()))
+        return None
+
+    return result
+
+
+def close_position_partial(ticket: int, symbol: str, direction: str, volume: float):
+    """
+    Close `volume` lots of an open position with an opposite market deal.
+    direction: direction of the open position ('buy' or 'sell')
+    """
+    tick = mt5.symbol_info_tick(symbol)
+    if tick is None:
+        raise RuntimeError(f"No tick data for {symbol}")
+
+    is_buy = direction.lower() == "buy"
+
+    request = {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "position": ticket,
+        "symbol": symbol,
+        "volume": volume,
+        "type": mt5.ORDER_TYPE_SELL if is_buy else mt5.ORDER_TYPE_BUY,
+        "price": tick.bid if is_buy else tick.ask,
+        "deviation": 10,
+        "magic": 202401,
+        "comment": "ICT_PARTIAL",
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": mt5.ORDER_FILLING_IOC
+    }
+
+    result = mt5.order_send(request)
+
+    if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+        print(f"[{datetime.now()}] Partial close failed:", getattr(result, "comment", mt5.last_error()))
+        return None
+
+    print(f"[{datetime.now()}] Partial close → {symbol} #{ticket} | {volume} lots")
+    return result
@@ -1,10 +1,11 @@
 from fundamentals.news_api import is_high_impact_news_soon
 from fundamentals.news_manual import is_manual_news_block
 
-def news_allows_trade(symbol: str) -> bool:
+def news_allows_trade(symbol: str, when=None) -> bool:
     """
     Example:
     EURUSD → checks EUR + USD
+    when: UTC datetime to check the manual calendar at (default: now)
     """
 
     base = symbol[:3]
@@ -13,7 +14,7 @@ def news_allows_trade(symbol: str) -> bool:
     if is_high_impact_news_soon(base) or is_high_impact_news_soon(quote):
         return False
 
-    if is_manual_news_block(base) or is_manual_news_block(quote):
+    if is_manual_news_block(base, when) or is_manual_news_block(quote, when):
         return False
 
     return True
@@ -1,19 +1,173 @@
+"""
+Manually maintained news blackouts (fundamentals/news_calendar.csv).
+
+    date,currency,reason[,start,end]
+    2026-02-01,USD,FOMC Press Conference,18:30,20:00
+
+start/end are UTC HH:MM; a row without them blocks the whole day, and an
+end before its start runs past midnight into the next day.
+
+The file is parsed once into a (date, currency) -> windows index and only
+re-parsed when its mtime/size changes (re-stat at most every
+`check_every` seconds).  Each key holds its windows sorted by start with
+a running maximum of their ends, so "is currency X blocked at t" is one
+dict lookup and one bisect whatever the calendar's size, overlapping
+windows included.
+"""
 import csv
-from datetime import datetime
+import os
+import threading
+import time
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
 
 CSV_FILE = "fundamentals/news_calendar.csv"
 
+DAY = 24 * 3600
+
+
+def _seconds(value):
+    hours, minutes = value.split(":")
+    seconds = int(hours) * 3600 + int(minutes) * 60
+    if not 0 <= seconds <= DAY:
+        raise ValueError(f"bad time of day {value!r}")
+    return seconds
+
+
+def _utc(when):
+    """Naive datetimes are UTC, like datetime.utcnow()."""
+    if when is None:
+        return datetime.utcnow()
+    if when.tzinfo is not None:
+        return when.astimezone(timezone.utc).replace(tzinfo=None)
+    return when
+
+
+class NewsCalendar:
+    def __init__(self, path=CSV_FILE, check_every=5.0):
+        self.path = path
+        self.check_every = check_every
+        self._lock = threading.Lock()
+        # (date, currency) -> (starts, running max of ends, [(start, end, reason)])
+        self._index = {}
+        self._version = None
+        self._checked = None
+        self.loads = 0
+        self.events = 0
+        self.skipped_rows = 0
+        self.last_error = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    # -------------------------
+    # LOAD / RELOAD
+    # -------------------------
+    def load(self):
+        """(Re)parse the file if it changed since the last load."""
+        with self._lock:
+            self._checked = time.monotonic()
+            version = self._stat()
+            if version == self._version:
+                return self._index
+            try:
+                index, events, skipped = self._parse() if version else ({}, 0, 0)
+            except (OSError, ValueError, csv.Error) as e:
+                # unreadable or caught mid-edit (bad bytes, broken quoting):
+                # keep the previous calendar; retry on the next change
+                self.last_error = str(e)
+                print(f"News calendar load failed ({self.path}):", e)
+                return self._index
+            self._index, self._version = index, version
+            self.events, self.skipped_rows = events, skipped
+            self.loads += 1
+            return index
+
+    def _parse(self):
+        windows = {}
+        # a calendar repeats the same dates and times of day many times
+        days, starts, ends = {}, {"": 0}, {"": DAY}
+        events = skipped = 0
+        with open(self.path, newline="") as file:
+            for row in csv.DictReader(file):
+                try:
+                    raw = row["date"]
+                    day = days.get(raw)
+                    if day is None:
+                        day = days[raw] = date.fromisoformat(raw.strip())
+                    currency = row["currency"].strip().upper()
+                    raw = (row.get("start") or "").strip()
+                    start = starts[raw] if raw in starts else starts.setdefault(raw, _seconds(raw))
+                    raw = (row.get("end") or "").strip()
+                    end = ends[raw] if raw in ends else ends.setdefault(raw, _seconds(raw))
+                except (KeyError, ValueError, AttributeError, TypeError):
+                    skipped += 1
+                    continue
+                reason = (row.get("reason") or "").strip()
+                events += 1
+                if end > start:
+                    windows.setdefault((day, currency), []).append((start, end, reason))
+                else:
+                    # past midnight: the rest of `day`, then the next morning
+                    windows.setdefault((day, currency), []).append((start, DAY, reason))
+                    if end:
+                        windows.setdefault((day + timedelta(days=1), currency), []).append((0, end, reason))
+
+        index = {}
+        for key, entries in windows.items():
+            entries.sort()
+            reach, ends = 0, []
+            for _, end, _ in entries:
+                reach = max(reach, end)
+                ends.append(reach)
+            index[key] = ([s for s, _, _ in entries], ends, entries)
+        return index, events, skipped
+
+    def _current(self):
+        checked = self._checked
+        if checked is None or time.monotonic() - checked >= self.check_every:
+            return self.load()
+        return self._index
+
+    # -------------------------
+    # QUERIES
+    # -------------------------
+    def blocked(self, currency, when=None):
+        """True if `currency` has a blackout window covering `when` (default: now, UTC)."""
+        when = _utc(when)
+        entry = self._current().get((when.date(), currency.upper()))
+        if entry is None:
+            return False
+        starts, ends, _ = entry
+        t = when.hour * 3600 + when.minute * 60 + when.second
+        i = bisect_right(starts, t) - 1
+        return i >= 0 and ends[i] > t
+
+    def day_events(self, currency, day):
+        """[(start, end, reason)] windows of `currency` on `day`, seconds of day."""
+        entry = self._current().get((day, currency.upper()))
+        return list(entry[2]) if entry else []
 
-def is_manual_news_block(currency: str) -> bool:
-    today = datetime.utcnow().date()
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self.path,
+                "loaded": self._version is not None,
+                "mtime": self._version[0] / 1e9 if self._version else None,
+                "loads": self.loads,
+                "events": self.events,
+                "keys": len(self._index),
+                "skipped_rows": self.skipped_rows,
+                "last_error": self.last_error,
+            }
 
-    with open(CSV_FILE, newline="") as file:
-        reader = csv.DictReader(file)
 
-        for row in reader:
-            event_date = datetime.strptime(row["date"], "%Y-%m-%d").date()
+CALENDAR = NewsCalendar(CSV_FILE)
 
-            if event_date == today and row["currency"] == currency:
-                return True
 
-    return False
+def is_manual_news_block(currency: str, when=None) -> bool:
+    return CALENDAR.blocked(currency, when)
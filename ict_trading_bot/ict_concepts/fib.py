@@ -1,6 +1,7 @@
-import MetaTrader5 as mt5
 import pandas as pd
 
+from data.mt5_connector import get_rates
+
 
 def fib_dealing_range(high, low):
     return {
@@ -22,8 +23,7 @@ def in_premium(price, fib):
 
 def calculate_fib_levels(symbol, timeframe, bars=200):
     """Fetch recent bars for symbol/timeframe and return fib levels dict."""
-    tf = _tf_to_mt5(timeframe)
-    rates = mt5.copy_rates_from_pos(symbol, tf, 0, bars)
+    rates = get_rates(symbol, timeframe, bars)
     if rates is None or len(rates) == 0:
         raise RuntimeError(f"No rates for {symbol} {timeframe}")
 
@@ -32,16 +32,3 @@ def calculate_fib_levels(symbol, timeframe, bars=200):
     low = df['low'].min()
 
     return fib_dealing_range(high, low)
-
-
-def _tf_to_mt5(tf):
-    mapping = {
-        'M1': mt5.TIMEFRAME_M1,
-        'M5': mt5.TIMEFRAME_M5,
-        'M15': mt5.TIMEFRAME_M15,
-        'M30': mt5.TIMEFRAME_M30,
-        'H1': mt5.TIMEFRAME_H1,
-        'H4': mt5.TIMEFRAME_H4,
-        'D1': mt5.TIMEFRAME_D1,
-    }
-    return mapping.get(tf, tf)
@@ -1,69 +1,144 @@
-import MetaTrader5 as mt5
+import numpy as np
 import pandas as pd
 
+from data.mt5_connector import get_rates
+
+
+def _as_float(values):
+    try:
+        return np.asarray(values, dtype=float).ravel()
+    except (TypeError, ValueError):
+        # non-numeric cells become NaN, which never satisfies a gap comparison
+        return pd.to_numeric(pd.Series(list(values)), errors="coerce").to_numpy(dtype=float)
+
+
+def fvg_masks(high, low):
+    """
+    Shifted-comparison FVG kernel.
+
+    high / low: arrays shaped (bars,) or (symbols, bars).
+    Returns (bullish, bearish) boolean masks over candle 3 of each pattern,
+    i.e. mask[..., i] compares candle i-2 with candle i.  The first two
+    columns are always False.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+
+    bullish = np.zeros(high.shape, dtype=bool)
+    bearish = np.zeros(high.shape, dtype=bool)
+    if high.shape[-1] < 3:
+        return bullish, bearish
+
+    bullish[..., 2:] = high[..., :-2] < low[..., 2:]
+    bearish[..., 2:] = low[..., :-2] > high[..., 2:]
+    return bullish, bearish
+
+
+def _fvg_records(high, low, bullish, bearish):
+    bull_idx = np.flatnonzero(bullish)
+    bear_idx = np.flatnonzero(bearish)
 
-def detect_fvg_from_df(df):
     fvgs = []
+    # same ordering as a bar-by-bar scan: by index, bullish before bearish
+    order = np.argsort(np.concatenate([bull_idx * 2, bear_idx * 2 + 1]), kind="stable")
+    n_bull = len(bull_idx)
+    for k in order.tolist():
+        if k < n_bull:
+            i = int(bull_idx[k])
+            fvgs.append({
+                "type": "bullish",
+                "low": float(high[i - 2]),
+                "high": float(low[i]),
+                "index": i
+            })
+        else:
+            i = int(bear_idx[k - n_bull])
+            fvgs.append({
+                "type": "bearish",
+                "high": float(low[i - 2]),
+                "low": float(high[i]),
+                "index": i
+            })
+
+    return fvgs
+
+
+def detect_fvg_from_arrays(high, low):
+    """FVG records for one instrument from its high/low arrays."""
+    high = _as_float(high)
+    low = _as_float(low)
+    if len(high) < 3 or len(high) != len(low):
+        return []
+
+    bullish, bearish = fvg_masks(high, low)
+    return _fvg_records(high, low, bullish, bearish)
 
+
+def detect_fvg_from_df(df):
     # Defensive: require enough rows and necessary columns
     if df is None or len(df) < 3:
-        return fvgs
+        return []
     if not set(["high", "low"]).issubset(df.columns):
-        return fvgs
+        return []
+
+    return detect_fvg_from_arrays(df["high"].to_numpy(), df["low"].to_numpy())
+
+
+def detect_fvgs_batch(series):
+    """
+    FVGs for many symbols in one vectorized pass.
+
+    series: { symbol: bars } where bars is anything indexable by 'high' and
+    'low' (MT5 rates array, DataFrame, dict of arrays).
+    Returns { symbol: [fvg, ...] } with the same records as detect_fvg_from_df.
+    """
+    symbols = []
+    highs = []
+    lows = []
+    out = {}
 
-    for i in range(2, len(df)):
+    for symbol, bars in series.items():
         try:
-            c1 = df.iloc[i-2]
-            c2 = df.iloc[i-1]
-            c3 = df.iloc[i]
-
-            # Bullish FVG
-            if c1['high'] < c3['low']:
-                fvgs.append({
-                    "type": "bullish",
-                    "low": float(c1['high']),
-                    "high": float(c3['low']),
-                    "index": int(i)
-                })
-
-            # Bearish FVG
-            if c1['low'] > c3['high']:
-                fvgs.append({
-                    "type": "bearish",
-                    "high": float(c1['low']),
-                    "low": float(c3['high']),
-                    "index": int(i)
-                })
-        except Exception:
-            # skip malformed rows
+            high = _as_float(bars["high"])
+            low = _as_float(bars["low"])
+        except (KeyError, ValueError, IndexError, TypeError):
+            out[symbol] = []
             continue
+        if len(high) < 3 or len(high) != len(low):
+            out[symbol] = []
+            continue
+        symbols.append(symbol)
+        highs.append(high)
+        lows.append(low)
 
-    return fvgs
+    if not symbols:
+        return out
+
+    # ragged windows are right-padded with NaN, which never forms a gap
+    width = max(len(h) for h in highs)
+    high_2d = np.full((len(symbols), width), np.nan)
+    low_2d = np.full((len(symbols), width), np.nan)
+    for row, (high, low) in enumerate(zip(highs, lows)):
+        high_2d[row, :len(high)] = high
+        low_2d[row, :len(low)] = low
+
+    bullish, bearish = fvg_masks(high_2d, low_2d)
+    for row, symbol in enumerate(symbols):
+        out[symbol] = _fvg_records(high_2d[row], low_2d[row], bullish[row], bearish[row])
+
+    return out
 
 
 def detect_fvgs(symbol, timeframe, bars=200):
-    tf = _tf_to_mt5(timeframe)
-    rates = mt5.copy_rates_from_pos(symbol, tf, 0, bars)
+    rates = get_rates(symbol, timeframe, bars)
     if rates is None or len(rates) == 0:
         return []
 
-    df = pd.DataFrame(rates)
     # make sure numeric columns exist
-    for col in ['high', 'low']:
-        if col not in df.columns:
-            return []
-
-    return detect_fvg_from_df(df)
-
-
-def _tf_to_mt5(tf):
-    mapping = {
-        'M1': mt5.TIMEFRAME_M1,
-        'M5': mt5.TIMEFRAME_M5,
-        'M15': mt5.TIMEFRAME_M15,
-        'M30': mt5.TIMEFRAME_M30,
-        'H1': mt5.TIMEFRAME_H1,
-        'H4': mt5.TIMEFRAME_H4,
-        'D1': mt5.TIMEFRAME_D1,
-    }
-    return mapping.get(tf, tf)
+    try:
+        high = rates['high']
+        low = rates['low']
+    except (KeyError, ValueError, IndexError):
+        return []
+
+    return detect_fvg_from_arrays(high, low)
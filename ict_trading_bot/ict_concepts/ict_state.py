@@ -0,0 +1,268 @@
+"""
+Incremental ICT state per symbol/timeframe.
+
+The batch detectors in ict_concepts/* rescan a 200-500 bar window on every
+call although at most one candle closed since the last pass.  ICTState is
+fed one closed candle at a time and keeps swings, FVGs, order blocks,
+liquidity pairs, BOS events and the dealing range up to date in amortized
+O(1) per bar.  Its read methods return exactly what the batch functions
+return for the same window (indices relative to the window start).
+"""
+import heapq
+from collections import deque
+
+from data.mt5_connector import get_rates
+from ict_concepts.fib import fib_dealing_range
+from ict_concepts.market_structure import detect_structure
+
+SWING_WINDOW = 200   # get_swings / detect_fvgs / calculate_fib_levels default
+OB_WINDOW = 500      # detect_htf_order_blocks default
+
+
+class ICTState:
+    """
+    Closed-bar ICT state.
+
+    window: bars covered by swings, FVGs, liquidity and the dealing range
+    ob_window: bars covered by order blocks and BOS events
+    """
+
+    def __init__(self, window=SWING_WINDOW, ob_window=OB_WINDOW, tolerance=0.0003):
+        self.window = window
+        self.ob_window = ob_window
+        self.tolerance = tolerance
+        self.count = 0
+        self.last_time = None
+
+        # last four candles as (high, low, open, close)
+        self._recent = deque(maxlen=4)
+        # monotonic (index, price) deques for the dealing range
+        self._max_high = deque()
+        self._min_low = deque()
+
+        # [abs_index, record, mitigated, key] zone entries and (abs_index, record)
+        # swings, oldest first
+        self._fvgs = deque()
+        self._obs = deque()
+        self._swings = deque()
+        # (abs_index of first swing, "EQH" | "EQL", pair)
+        self._liquidity = deque()
+        self._bos = deque()
+        self._last_swing_high = None
+        self._last_swing_low = None
+
+        # unmitigated zones: key -> entry, plus lazy heaps ordered by the
+        # price that mitigates them first
+        self._open = {}
+        self._bull_heap = []   # (-zone_high, key)
+        self._bear_heap = []   # (zone_low, key)
+
+    # -------------------------
+    # WINDOWS
+    # -------------------------
+    def _start(self, window):
+        return max(0, self.count - window)
+
+    def _expire(self):
+        start = self._start(self.window)
+        ob_start = self._start(self.ob_window)
+
+        while self._max_high and self._max_high[0][0] < start:
+            self._max_high.popleft()
+        while self._min_low and self._min_low[0][0] < start:
+            self._min_low.popleft()
+
+        # batch scans never report bars 0-1 of their window
+        for entries, first in ((self._fvgs, start + 2), (self._obs, ob_start + 2)):
+            while entries and entries[0][0] < first:
+                entry = entries.popleft()
+                self._open.pop(entry[3], None)
+        while self._swings and self._swings[0][0] < start + 2:
+            self._swings.popleft()
+        while self._liquidity and self._liquidity[0][0] < start + 2:
+            self._liquidity.popleft()
+        while self._bos and self._bos[0][1] < ob_start:
+            self._bos.popleft()
+
+        # drop heap entries for zones that expired or were mitigated
+        for heap in (self._bull_heap, self._bear_heap):
+            if len(heap) > 2 * len(self._open) + 16:
+                heap[:] = [item for item in heap if item[1] in self._open]
+                heapq.heapify(heap)
+
+    # -------------------------
+    # ZONES
+    # -------------------------
+    def _add_zone(self, entries, kind, index, record, mitigated=False):
+        key = (kind, index, record["type"])
+        entry = [index, record, mitigated, key]
+        entries.append(entry)
+        if mitigated:
+            return
+        self._open[key] = entry
+        if record["type"] == "bullish":
+            heapq.heappush(self._bull_heap, (-record["high"], key))
+        else:
+            heapq.heappush(self._bear_heap, (record["low"], key))
+
+    def _mitigate(self, high, low):
+        # bullish zones sit below price: mitigated once a low trades into them
+        while self._bull_heap and -self._bull_heap[0][0] >= low:
+            _, key = heapq.heappop(self._bull_heap)
+            entry = self._open.pop(key, None)
+            if entry is not None:
+                entry[2] = True
+        while self._bear_heap and self._bear_heap[0][0] <= high:
+            _, key = heapq.heappop(self._bear_heap)
+            entry = self._open.pop(key, None)
+            if entry is not None:
+                entry[2] = True
+
+    # -------------------------
+    # UPDATE
+    # -------------------------
+    def update(self, bar):
+        """Feed one closed candle (MT5 rates row or dict with OHLC + time)."""
+        high = float(bar['high'])
+        low = float(bar['low'])
+        t = self.count
+        self.count += 1
+        try:
+            self.last_time = bar['time']
+        except (KeyError, ValueError, IndexError):
+            self.last_time = t
+
+        self._mitigate(high, low)
+        self._recent.append((high, low, float(bar['open']), float(bar['close'])))
+
+        while self._max_high and self._max_high[-1][1] <= high:
+            self._max_high.pop()
+        self._max_high.append((t, high))
+        while self._min_low and self._min_low[-1][1] >= low:
+            self._min_low.pop()
+        self._min_low.append((t, low))
+
+        # FVG: candle t-2 vs candle t
+        if len(self._recent) >= 3:
+            c1_high, c1_low = self._recent[-3][:2]
+            if c1_high < low:
+                self._add_zone(self._fvgs, "fvg", t, {
+                    "type": "bullish", "low": c1_high, "high": low, "index": t
+                })
+            if c1_low > high:
+                self._add_zone(self._fvgs, "fvg", t, {
+                    "type": "bearish", "high": c1_low, "low": high, "index": t
+                })
+
+        # 3-bar fractal at t-2, now that both of its neighbours are closed
+        # (batch scans skip the first two bars, hence t >= 4)
+        if t >= 4:
+            self._fractal(t - 2)
+
+        self._expire()
+
+    def _fractal(self, i):
+        prev, bar, after, last = list(self._recent)
+        prev_hi, prev_lo = prev[:2]
+        hi, lo = bar[:2]
+        # the two candles after the swing bar have already closed, so check
+        # the new OB against them right away
+        after_high = max(after[0], last[0])
+        after_low = min(after[1], last[1])
+
+        if hi > prev_hi and hi > after[0]:
+            self._add_swing(i, "high", hi)
+            self._add_zone(self._obs, "ob", i, {
+                'type': 'bearish', 'high': prev_hi, 'low': prev_lo, 'index': i
+            }, mitigated=after_high >= prev_lo)
+        if lo < prev_lo and lo < after[1]:
+            self._add_swing(i, "low", lo)
+            self._add_zone(self._obs, "ob", i, {
+                'type': 'bullish', 'high': prev_hi, 'low': prev_lo, 'index': i
+            }, mitigated=after_low <= prev_hi)
+
+    def _add_swing(self, i, kind, price):
+        if self._swings:
+            a = self._swings[-1][1]
+            if abs(a["price"] - price) <= self.tolerance:
+                zone = "EQH" if a["type"] == "high" else "EQL"
+                self._liquidity.append((self._swings[-1][0], zone, (a["price"], price)))
+        self._swings.append((i, {"type": kind, "price": price, "index": i}))
+
+        # market_structure.structure.detect_structure, one swing at a time
+        if kind == "high":
+            if self._last_swing_high and price > self._last_swing_high:
+                self._bos.append(("BOS", i, price))
+            self._last_swing_high = price
+        else:
+            if self._last_swing_low and price < self._last_swing_low:
+                self._bos.append(("BOS", i, price))
+            self._last_swing_low = price
+
+    def replay(self, rates):
+        for bar in rates:
+            self.update(bar)
+        return self
+
+    # -------------------------
+    # READS
+    # -------------------------
+    def fib(self):
+        if not self.count:
+            return {}
+        return fib_dealing_range(self._max_high[0][1], self._min_low[0][1])
+
+    def fvgs(self, include_mitigated=True):
+        start = self._start(self.window)
+        return [
+            dict(rec, index=i - start)
+            for i, rec, mitigated, _ in self._fvgs
+            if include_mitigated or not mitigated
+        ]
+
+    def order_blocks(self, include_mitigated=True):
+        start = self._start(self.ob_window)
+        return [
+            dict(rec, index=i - start)
+            for i, rec, mitigated, _ in self._obs
+            if include_mitigated or not mitigated
+        ]
+
+    def swings(self):
+        start = self._start(self.window)
+        return [dict(rec, index=i - start) for i, rec in self._swings]
+
+    def liquidity(self):
+        zones = {"EQH": [], "EQL": []}
+        for _, kind, pair in self._liquidity:
+            zones[kind].append(pair)
+        return zones
+
+    def trend(self):
+        return detect_structure(self.swings())
+
+    def bos(self):
+        """BOS events in the order-block window, as ("BOS", abs_index, price)."""
+        return list(self._bos)
+
+
+STATES = {}
+
+
+def sync_state(symbol, timeframe, bars=OB_WINDOW):
+    """Bring the (symbol, timeframe) state up to the latest cached closed bar."""
+    rates = get_rates(symbol, timeframe, bars)
+    key = (symbol, timeframe)
+    state = STATES.get(key)
+
+    if rates is None or len(rates) == 0:
+        return state or ICTState()
+
+    times = rates['time']
+    if state is None or state.last_time is None or state.last_time < times[0]:
+        # first sync, or the gap is wider than the fetched window
+        state = ICTState(ob_window=max(bars, OB_WINDOW))
+        STATES[key] = state
+        return state.replay(rates)
+
+    return state.replay(rates[times > state.last_time])
@@ -1,39 +1,12 @@
-import MetaTrader5 as mt5
-import pandas as pd
-
-
-def _tf_to_mt5(tf):
-    mapping = {
-        'M1': mt5.TIMEFRAME_M1,
-        'M5': mt5.TIMEFRAME_M5,
-        'M15': mt5.TIMEFRAME_M15,
-        'M30': mt5.TIMEFRAME_M30,
-        'H1': mt5.TIMEFRAME_H1,
-        'H4': mt5.TIMEFRAME_H4,
-        'D1': mt5.TIMEFRAME_D1,
-    }
-    return mapping.get(tf, tf)
+from data.mt5_connector import get_rates
+from market_structure.swing_points import fractal_swings
 
 
 def get_swings(symbol, timeframe, bars=200):
-    tf = _tf_to_mt5(timeframe)
-    rates = mt5.copy_rates_from_pos(symbol, tf, 0, bars)
-    swings = []
-
+    rates = get_rates(symbol, timeframe, bars)
     if rates is None or len(rates) == 0:
-        return swings
-
-    for i in range(2, len(rates) - 2):
-        high = rates[i]['high']
-        low = rates[i]['low']
-
-        if high > rates[i-1]['high'] and high > rates[i+1]['high']:
-            swings.append({"type": "high", "price": high, "index": i})
-
-        if low < rates[i-1]['low'] and low < rates[i+1]['low']:
-            swings.append({"type": "low", "price": low, "index": i})
-
-    return swings
+        return []
+    return fractal_swings(rates['high'], rates['low'])
 
 
 def detect_structure(swings):
@@ -1,80 +1,121 @@
-import MetaTrader5 as mt5
-import pandas as pd
+import numpy as np
 
+from data.mt5_connector import get_rates
+from market_structure.swing_points import swing_masks
 
-def detect_order_blocks(df, structure_points):
-    obs = []
 
-    for s in structure_points:
-        # structure_points format may vary; keep defensive
-        try:
-            tag, idx, price = s
-        except Exception:
-            continue
+def local_extrema(high, low):
+    """
+    3-bar local-extrema kernel.
 
-        if tag == "BOS":
-            prev = df.iloc[idx-1]
+    Returns (swing_high, swing_low) boolean masks where bar i is strictly
+    above (below) both neighbours.  First and last bars are always False.
+    """
+    return swing_masks(high, low, 1, strict=True)
 
-            ob = {
-                "type": "bullish" if df['close'][idx] > df['open'][idx] else "bearish",
-                "high": prev['high'],
-                "low": prev['low'],
-                "index": idx
-            }
-            obs.append(ob)
 
-    return obs
+def order_blocks_from_indices(open_, high, low, close, bos_indices):
+    """
+    Vectorized OB extraction for an array of BOS bar indices.
+
+    The candle before each BOS bar is the order block; its type follows the
+    direction of the BOS candle itself.
+    """
+    idx = np.asarray(bos_indices, dtype=np.intp).ravel()
+    if len(idx) == 0:
+        return []
+
+    open_ = np.asarray(open_, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+
+    bullish = (close[idx] > open_[idx]).tolist()
+    ob_high = high[idx - 1].tolist()
+    ob_low = low[idx - 1].tolist()
+
+    return [
+        {
+            "type": "bullish" if bull else "bearish",
+            "high": h,
+            "low": lo,
+            "index": i
+        }
+        for i, bull, h, lo in zip(idx.tolist(), bullish, ob_high, ob_low)
+    ]
+
+
+def detect_order_blocks(df, structure_points=None, bos_indices=None):
+    """
+    structure_points: [("BOS", idx, price), ...] from market_structure
+    bos_indices: alternatively, the BOS bar indices as an array
+    """
+    if bos_indices is None:
+        bos_indices = []
+        for s in structure_points or []:
+            # structure_points format may vary; keep defensive
+            try:
+                tag, idx, price = s
+            except Exception:
+                continue
+            if tag == "BOS":
+                bos_indices.append(idx)
+
+    return order_blocks_from_indices(
+        df['open'].to_numpy(),
+        df['high'].to_numpy(),
+        df['low'].to_numpy(),
+        df['close'].to_numpy(),
+        bos_indices
+    )
+
+
+def htf_order_blocks_from_arrays(high, low):
+    """
+    Swing-based OB list: at every 3-bar swing high (low) the previous candle
+    is a bearish (bullish) order block.  Bars 0-1 and the last two bars are
+    not evaluated.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    if len(high) < 5:
+        return []
+
+    swing_high, swing_low = local_extrema(high, low)
+    swing_high[:2] = swing_high[-2:] = False
+    swing_low[:2] = swing_low[-2:] = False
+
+    bear_idx = np.flatnonzero(swing_high)
+    bull_idx = np.flatnonzero(swing_low)
+
+    # same ordering as a bar-by-bar scan: by index, bearish before bullish
+    keys = np.concatenate([bear_idx * 2, bull_idx * 2 + 1])
+    keys.sort()
+    idx = keys // 2
+    is_bull = (keys % 2).astype(bool)
+
+    prev_hi = high[idx - 1].tolist()
+    prev_lo = low[idx - 1].tolist()
+
+    return [
+        {
+            'type': 'bullish' if bull else 'bearish',
+            'high': h,
+            'low': lo,
+            'index': i
+        }
+        for i, bull, h, lo in zip(idx.tolist(), is_bull.tolist(), prev_hi, prev_lo)
+    ]
 
 
 def detect_htf_order_blocks(symbol, timeframe, bars=500):
-    tf = _tf_to_mt5(timeframe)
-    rates = mt5.copy_rates_from_pos(symbol, tf, 0, bars)
+    rates = get_rates(symbol, timeframe, bars)
     if rates is None or len(rates) == 0:
         return []
 
-    df = pd.DataFrame(rates)
     # simplified placeholder: mark prior swing highs as order blocks
-    obs = []
-    if not set(['high', 'low', 'close', 'open']).issubset(df.columns) or len(df) < 5:
-        return obs
-
-    for i in range(2, len(df) - 2):
-        try:
-            hi = float(df['high'].iloc[i])
-            lo = float(df['low'].iloc[i])
-            prev_hi = float(df['high'].iloc[i-1])
-            prev_lo = float(df['low'].iloc[i-1])
-            next_hi = float(df['high'].iloc[i+1])
-            next_lo = float(df['low'].iloc[i+1])
-
-            if hi > prev_hi and hi > next_hi:
-                obs.append({
-                    'type': 'bearish',
-                    'high': prev_hi,
-                    'low': prev_lo,
-                    'index': i
-                })
-            if lo < prev_lo and lo < next_lo:
-                obs.append({
-                    'type': 'bullish',
-                    'high': prev_hi,
-                    'low': prev_lo,
-                    'index': i
-                })
-        except Exception:
-            continue
-
-    return obs
-
-
-def _tf_to_mt5(tf):
-    mapping = {
-        'M1': mt5.TIMEFRAME_M1,
-        'M5': mt5.TIMEFRAME_M5,
-        'M15': mt5.TIMEFRAME_M15,
-        'M30': mt5.TIMEFRAME_M30,
-        'H1': mt5.TIMEFRAME_H1,
-        'H4': mt5.TIMEFRAME_H4,
-        'D1': mt5.TIMEFRAME_D1,
-    }
-    return mapping.get(tf, tf)
+    names = rates.dtype.names or ()
+    if not set(['high', 'low', 'close', 'open']).issubset(names):
+        return []
+
+    return htf_order_blocks_from_arrays(rates['high'], rates['low'])
@@ -5,11 +5,18 @@ from execution.mt5_connector import (
     connect,
     ensure_symbol,
     get_price,
-    get_open_positions
+    get_open_positions,
+    get_open_tickets
 )
 from config.symbol_mappings import candidates_for
-from execution.trade_executor import calculate_lot_size, execute_trade
+from execution.trade_executor import (
+    calculate_lot_size,
+    execute_trade,
+    modify_position_sl,
+    close_position_partial
+)
 from execution.order_router import choose_order_type
+from execution.position_manager import PositionManager
 
 # =====================================================
 # STRATEGY & ANALYSIS
@@ -18,33 +25,37 @@ from strategy.pre_trade_analysis import analyze_market_top_down
 from strategy.entry_model import check_entry
 from strategy.liquidity_filter import liquidity_taken
 from strategy.smt_filter import smt_confirmed
+from strategy.scanner import SCANNER
 
 # =====================================================
-# RISK & TRADE MANAGEMENT
+# RISK
 # =====================================================
 from risk.sl_tp_engine import calculate_sl_tp
 from risk.protection import can_trade, register_trade, resize_lot
-from risk.trade_management import manage_trade
 
 # =====================================================
 # QUALITY FILTERS
 # =====================================================
 from ml.rule_filter import rule_quality_filter
-from ml.ml_filter import ml_quality_filter
+from ml.ml_filter import ml_quality_filter_batch
+from ml.model_registry import MODELS
 
 # =====================================================
 # SESSION FILTER
 # =====================================================
-from utils.sessions import in_london_session, in_newyork_session
+from utils.time_sessions import SESSIONS
+from utils.bar_scheduler import SCHEDULER
+from utils.stage_metrics import STAGE_METRICS
 
 # =====================================================
 # PORTFOLIO + DASHBOARD
 # =====================================================
 from portfolio.allocator import allocate_risk
-from dashboard.bridge import push_trade, persist_signal_to_supabase
-import time
+from dashboard.bridge import WRITER, push_trade, persist_signal_to_supabase
 import traceback
 
+from utils import clock
+
 
 # Start internal bot API (health / control) in a background thread
 try:
@@ -89,198 +100,324 @@ for symbol in SYMBOLS:
 if not VALID_SYMBOLS:
     raise RuntimeError("No valid trading symbols available in MT5. Check account/instruments.")
 
+# Open trades are managed (BE / partial / trail) on a background thread so
+# the scan never waits for a position to close
+POSITIONS = PositionManager(
+    get_price=get_price,
+    modify_sl=modify_position_sl,
+    close_partial=close_position_partial,
+    open_tickets=get_open_tickets
+)
+POSITIONS.start()
+
+# replay signals/logs a previous run could not get into Supabase
+WRITER.start()
+
+# ML model (ML_MODEL_PATH) loaded once; a watcher thread hot-swaps it
+# when the file changes, so the scan never loads a model inline
+MODELS.load()
+MODELS.start()
+
+
+# last top-down analysis per symbol, reused until one of its bars closes
+ANALYSES = {}
+STAGE_KEYS = {"H4": "HTF", "H1": "MTF", "M15": "LTF"}
+
+# wake up at least this often while idling between sessions
+MAX_IDLE_SLEEP = 300
+
 
 # =====================================================
-# 2️⃣ MAIN EXECUTION LOOP (resilient)
+# 2️⃣ SYMBOL SCAN (runs on the scanner pool)
 # =====================================================
-while True:
-    try:
-        for symbol in VALID_SYMBOLS:
-
-            # -----------------------------
-            # SESSION FILTER (HARD RULE)
-            # -----------------------------
-            if not (in_london_session() or in_newyork_session()):
-                continue
-
-            # -----------------------------
-            # LIVE MARKET DATA
-            # -----------------------------
-            price = get_price(symbol)
-            atr = 0.0012
-            atr_threshold = 0.002
-
-            # -----------------------------
-            # TOP-DOWN ANALYSIS
-            # -----------------------------
-            analysis = analyze_market_top_down(symbol, price)
-
-            trend = analysis["overall_trend"]
-            direction = "buy" if trend == "bullish" else "sell"
-
-            # -----------------------------
-            # LIQUIDITY (MANDATORY)
-            # -----------------------------
-            if not liquidity_taken(
-                price,
-                analysis["MTF"]["liquidity"],
-                direction
-            ):
-                continue
-
-            # -----------------------------
-            # ENTRY MODEL (ICT CORE)
-            # -----------------------------
-            try:
-                signal = check_entry(
-                    trend=trend,
-                    price=price,
-                    fib_levels=analysis.get("MTF", {}).get("fib", {}),
-                    fvgs=analysis.get("LTF", {}).get("fvgs", {}),
-                    htf_order_blocks=analysis.get("MTF", {}).get("order_blocks", {})
-                )
-            except Exception as e:
-                print("Entry model error, skipping symbol:", e)
-                continue
-
-            if not isinstance(signal, dict) or not signal:
-                continue
-
-            # attach symbol and direction (use original name mapping if available)
-            original_symbol = next((k for k, v in RESOLVED_MAP.items() if v == symbol), symbol)
-            signal["symbol"] = original_symbol
-            signal["direction"] = direction
-
-            # -----------------------------
-            # SMT CONFIRMATION
-            # -----------------------------
-            if not smt_confirmed(signal, analysis["correlated"]):
-                continue
-
-            # -----------------------------
-            # RULE QUALITY FILTER
-            # -----------------------------
-            if not rule_quality_filter(signal):
-                continue
-
-            # -----------------------------
-            # ML QUALITY FILTER
-            # -----------------------------
-            features = [
-                atr,
-                abs(signal["fvg"]["high"] - signal["fvg"]["low"]),
-                abs(signal["htf_ob"]["high"] - signal["htf_ob"]["low"]),
-                abs(price - analysis["MTF"]["fib"]["0.5"]),
-            ]
-
-            model = None  # load trained model
-            ml_ok, probability = ml_quality_filter(features, model)
-
-            if not ml_ok:
-                continue
-
-            # -----------------------------
-            # PROTECTION (ONE TRADE PER OB)
-            # -----------------------------
-            htf_ob = signal.get("htf_ob") or {}
-            ob_id = htf_ob.get("id")
-            if not ob_id or not can_trade(symbol, ob_id):
-                continue
-
-            # -----------------------------
-            # PORTFOLIO RISK ALLOCATION
-            # -----------------------------
-            open_positions = get_open_positions()
-            allowed_risk = allocate_risk(symbol, open_positions)
-
-            if allowed_risk <= 0:
-                continue
-
-            # -----------------------------
-            # ORDER ROUTING
-            # -----------------------------
-            order_type = choose_order_type(
-                price,
-                signal["fvg"],
-                mode="auto"
+def scan_symbol(symbol):
+    """
+    Analysis stages for one symbol, from live price to the rule filter.
+    Returns a trade candidate dict (with its ML feature row) or None.  Only
+    touches per-symbol state, so it is safe to run for many symbols at
+    once.  Each stage is timed into STAGE_METRICS.
+    """
+
+    # -----------------------------
+    # LIVE MARKET DATA
+    # -----------------------------
+    with STAGE_METRICS.time("price", symbol):
+        price = get_price(symbol)
+        atr = 0.0012
+
+    # -----------------------------
+    # TOP-DOWN ANALYSIS (on bar close only)
+    # -----------------------------
+    # between closes this is the tick-only path: the cached analysis
+    # is re-checked against the live price below
+    with STAGE_METRICS.time("analysis", symbol):
+        due = SCHEDULER.due(symbol)
+        analysis = ANALYSES.get(symbol)
+        if due or analysis is None:
+            analysis = analyze_market_top_down(symbol, price, previous=analysis, refresh=due)
+            ANALYSES[symbol] = analysis
+            for tf in due:
+                SCHEDULER.mark_ran(symbol, tf, analysis[STAGE_KEYS[tf]].get("bar_time"))
+
+        trend = analysis["overall_trend"]
+        direction = "buy" if trend == "bullish" else "sell"
+
+    # -----------------------------
+    # LIQUIDITY (MANDATORY)
+    # -----------------------------
+    with STAGE_METRICS.time("liquidity", symbol) as stage:
+        if not liquidity_taken(
+            price,
+            analysis["MTF"]["liquidity"],
+            direction
+        ):
+            return stage.reject()
+
+    # -----------------------------
+    # ENTRY MODEL (ICT CORE)
+    # -----------------------------
+    with STAGE_METRICS.time("entry", symbol) as stage:
+        try:
+            signal = check_entry(
+                trend=trend,
+                price=price,
+                fib_levels=analysis.get("MTF", {}).get("fib", {}),
+                fvgs=analysis.get("LTF", {}).get("fvgs", {}),
+                htf_order_blocks=analysis.get("MTF", {}).get("order_blocks", {})
             )
+        except Exception as e:
+            print("Entry model error, skipping symbol:", e)
+            STAGE_METRICS.count("errors", "entry", symbol)
+            return None
+
+        if not isinstance(signal, dict) or not signal:
+            return stage.reject()
+
+    # attach symbol and direction (use original name mapping if available)
+    original_symbol = next((k for k, v in RESOLVED_MAP.items() if v == symbol), symbol)
+    signal["symbol"] = original_symbol
+    signal["direction"] = direction
+
+    # -----------------------------
+    # SMT CONFIRMATION
+    # -----------------------------
+    with STAGE_METRICS.time("smt", symbol) as stage:
+        if not smt_confirmed(signal, analysis["correlated"]):
+            return stage.reject()
+
+    # -----------------------------
+    # RULE QUALITY FILTER
+    # -----------------------------
+    with STAGE_METRICS.time("rule_filter", symbol) as stage:
+        if not rule_quality_filter(signal):
+            return stage.reject()
+
+    # -----------------------------
+    # ML FEATURES (scored for the whole cycle in score_candidates)
+    # -----------------------------
+    features = [
+        atr,
+        abs(signal["fvg"]["high"] - signal["fvg"]["low"]),
+        abs(signal["htf_ob"]["high"] - signal["htf_ob"]["low"]),
+        abs(price - analysis["MTF"]["fib"]["0.5"]),
+    ]
+
+    return {
+        "symbol": symbol,
+        "original_symbol": original_symbol,
+        "price": price,
+        "atr": atr,
+        "direction": direction,
+        "signal": signal,
+        "features": features,
+    }
 
-            # -----------------------------
-            # SL / TP ENGINE
-            # -----------------------------
-            sl, tp = calculate_sl_tp(
-                direction=direction,
-                entry_price=price,
-                htf_ob=signal["htf_ob"]
-            )
 
-            # -----------------------------
-            # POSITION SIZING (DYNAMIC)
-            # -----------------------------
-            lot = calculate_lot_size(
-                symbol=symbol,
-                risk_percent=allowed_risk,
-                stop_loss_pips=20
-            )
+# =====================================================
+# ML QUALITY FILTER (one batch per cycle)
+# =====================================================
+def score_candidates(candidates):
+    """
+    ML quality filter for every candidate of a cycle in a single
+    predict_proba call.  Returns the candidates that pass, each with its
+    "probability".
+    """
+    if not candidates:
+        return []
+
+    with STAGE_METRICS.time("ml_filter"):
+        model = MODELS if MODELS.get() is not None else None
+        verdicts = ml_quality_filter_batch([c["features"] for c in candidates], model)
+
+    passed = []
+    for candidate, (ml_ok, probability) in zip(candidates, verdicts):
+        if not ml_ok:
+            STAGE_METRICS.count("rejections", "ml_filter", candidate["symbol"])
+            continue
+        candidate["probability"] = probability
+        passed.append(candidate)
+    return passed
 
-            lot = resize_lot(lot, atr, atr_threshold)
-
-            # -----------------------------
-            # PERSIST SIGNAL TO SUPABASE
-            # -----------------------------
-            try:
-                persist_signal_to_supabase({
-                    "symbol": original_symbol,
-                    "direction": direction,
-                    "entry": price,
-                    "sl": sl,
-                    "tp": tp,
-                    "lot": lot,
-                    "ml_probability": probability,
-                    "signal_quality": "premium",
-                    "status": "pending",
-                })
-            except Exception:
-                pass
-
-            # -----------------------------
-            # EXECUTE TRADE
-            # -----------------------------
-            trade = execute_trade(
-                symbol=symbol,
-                direction=direction,
-                lot=lot,
-                sl_price=sl,
-                tp_price=tp,
-                order_type=order_type
-            )
-            register_trade(symbol, ob_id)
 
-            # -----------------------------
-            # PUSH TO DASHBOARD
-            # -----------------------------
-            push_trade({
-                "symbol": symbol,
+# =====================================================
+# 3️⃣ EXECUTION (serialized: main thread only)
+# =====================================================
+def execute_candidate(candidate):
+    """
+    Protection, allocation, sizing, persistence and execution for one
+    candidate.  Called one candidate at a time from the main thread, so
+    TRADE_MEMORY and the portfolio checks never race.
+    """
+    symbol = candidate["symbol"]
+    original_symbol = candidate["original_symbol"]
+    price = candidate["price"]
+    atr = candidate["atr"]
+    atr_threshold = 0.002
+    direction = candidate["direction"]
+    signal = candidate["signal"]
+    probability = candidate["probability"]
+
+    # -----------------------------
+    # PROTECTION (ONE TRADE PER OB)
+    # -----------------------------
+    with STAGE_METRICS.time("protection", symbol) as stage:
+        htf_ob = signal.get("htf_ob") or {}
+        ob_id = htf_ob.get("id")
+        if not ob_id or not can_trade(symbol, ob_id):
+            return stage.reject()
+
+    # -----------------------------
+    # PORTFOLIO RISK ALLOCATION
+    # -----------------------------
+    with STAGE_METRICS.time("allocation", symbol) as stage:
+        open_positions = get_open_positions()
+        allowed_risk = allocate_risk(symbol, open_positions)
+
+        if allowed_risk <= 0:
+            return stage.reject()
+
+    # -----------------------------
+    # ORDER ROUTING
+    # -----------------------------
+    with STAGE_METRICS.time("routing", symbol):
+        order_type = choose_order_type(
+            price,
+            signal["fvg"],
+            mode="auto"
+        )
+
+    # -----------------------------
+    # SL / TP ENGINE
+    # -----------------------------
+    with STAGE_METRICS.time("sl_tp", symbol):
+        sl, tp = calculate_sl_tp(
+            direction=direction,
+            entry_price=price,
+            htf_ob=signal["htf_ob"]
+        )
+
+    # -----------------------------
+    # POSITION SIZING (DYNAMIC)
+    # -----------------------------
+    with STAGE_METRICS.time("sizing", symbol):
+        lot = calculate_lot_size(
+            symbol=symbol,
+            risk_percent=allowed_risk,
+            stop_loss_pips=20
+        )
+
+        lot = resize_lot(lot, atr, atr_threshold)
+
+    # -----------------------------
+    # PERSIST SIGNAL TO SUPABASE
+    # -----------------------------
+    with STAGE_METRICS.time("persistence", symbol):
+        try:
+            persist_signal_to_supabase({
+                "symbol": original_symbol,
                 "direction": direction,
                 "entry": price,
                 "sl": sl,
                 "tp": tp,
                 "lot": lot,
                 "ml_probability": probability,
-                "status": "OPEN"
+                "signal_quality": "premium",
+                "status": "pending",
             })
+        except Exception:
+            STAGE_METRICS.count("errors", "persistence", symbol)
+
+    # -----------------------------
+    # EXECUTE TRADE
+    # -----------------------------
+    with STAGE_METRICS.time("execution", symbol):
+        trade = execute_trade(
+            symbol=symbol,
+            direction=direction,
+            lot=lot,
+            sl_price=sl,
+            tp_price=tp,
+            order_type=order_type
+        )
+        register_trade(symbol, ob_id)
+
+    # -----------------------------
+    # PUSH TO DASHBOARD
+    # -----------------------------
+    push_trade({
+        "symbol": symbol,
+        "direction": direction,
+        "entry": price,
+        "sl": sl,
+        "tp": tp,
+        "lot": lot,
+        "ml_probability": probability,
+        "status": "OPEN"
+    })
+
+    # -----------------------------
+    # LIVE TRADE MANAGEMENT
+    # -----------------------------
+    # handed to the position manager; scanning carries on immediately
+    if trade is not None:
+        POSITIONS.add({
+            "ticket": trade.order,
+            "symbol": symbol,
+            "direction": direction,
+            "entry": trade.price or price,
+            "sl": sl,
+            "tp": tp,
+            "lot": lot
+        })
+
+
+# =====================================================
+# 4️⃣ MAIN EXECUTION LOOP (resilient)
+# =====================================================
+while True:
+    pass_started = clock.monotonic()
+    try:
+        # -----------------------------
+        # SESSION FILTER (HARD RULE)
+        # -----------------------------
+        # checked once per cycle (London / New York); outside them sleep
+        # until the next open instead of spinning
+        with STAGE_METRICS.time("session"):
+            idle = SESSIONS.seconds_until_open()
+        if idle > 0:
+            clock.sleep(min(idle, MAX_IDLE_SLEEP))
+            continue
 
-            # -----------------------------
-            # LIVE TRADE MANAGEMENT
-            # -----------------------------
-            while trade and trade["open"]:
-                live_price = get_price(symbol)
-                action = manage_trade(trade, live_price)
+        # analysis fans out over the pool; the cycle's candidates are
+        # ML-scored in one batch, then executed here one at a time
+        with STAGE_METRICS.time("cycle"):
+            candidates = [c for _, c in SCANNER.scan(VALID_SYMBOLS, scan_symbol) if c]
+            for candidate in score_candidates(candidates):
+                execute_candidate(candidate)
 
-                if action:
-                    trade = execute_trade(**action)
+        SCHEDULER.sleep_until_next_pass(pass_started)
     except Exception as e:
         print("Error in main loop:", e)
         traceback.print_exc()
-        time.sleep(5)
+        clock.sleep(5)
         continue
@@ -1,16 +1,131 @@
-import pandas as pd
+import numpy as np
+
+
+def rolling_max(x, window):
+    """
+    out[j] = max(x[j:j+window]) for j in 0..len(x)-window, in O(n).
+
+    van Herk / Gil-Werman: split x into blocks of `window`, take running
+    maxima forwards and backwards inside each block; any window spans at most
+    two blocks, so its max is max(suffix[j], prefix[j+window-1]).
+    """
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    if window < 1 or n < window:
+        return np.empty(0)
+    if window == 1:
+        return x.copy()
+
+    m = -(-n // window) * window
+    padded = np.full(m, -np.inf)
+    padded[:n] = x
+    blocks = padded.reshape(-1, window)
+
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    return np.maximum(suffix[:n - window + 1], prefix[window - 1:n])
+
+
+def rolling_min(x, window):
+    return -rolling_max(-np.asarray(x, dtype=float), window)
+
+
+def _is_extreme(x, left, right, strict, rmax):
+    # True where x[i] tops x[i-left : i+right+1]; i outside [left, n-right) is False
+    n = len(x)
+    mask = np.zeros(n, dtype=bool)
+    lo, hi = left, n - right
+    if hi <= lo:
+        return mask
+
+    centre = x[lo:hi]
+    if not strict:
+        mask[lo:hi] = centre >= rmax(x, left + right + 1)
+        return mask
+
+    ok = np.ones(hi - lo, dtype=bool)
+    if left:
+        ok &= centre > rmax(x, left)[:hi - lo]
+    if right:
+        ok &= centre > rmax(x, right)[lo + 1:]
+    mask[lo:hi] = ok
+    return mask
+
+
+def swing_masks(high, low, left, right=None, strict=False):
+    """
+    Linear-time swing engine.
+
+    Bar i is a swing high when high[i] is the maximum of
+    high[i-left : i+right+1] (strictly above every other bar in that window
+    when strict=True); swing lows mirror this on `low`.  Bars without a full
+    window on either side are never swings.
+
+    Returns (swing_high, swing_low) boolean masks.
+    """
+    right = left if right is None else right
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+
+    swing_high = _is_extreme(high, left, right, strict, rolling_max)
+    # lows: a minimum of `low` is a maximum of `-low`
+    swing_low = _is_extreme(-low, left, right, strict, rolling_max)
+    return swing_high, swing_low
+
+
+def swing_indices(swing_high, swing_low):
+    """Merge the two masks into (index, is_high) pairs: by bar, high first."""
+    keys = np.concatenate([np.flatnonzero(swing_high) * 2, np.flatnonzero(swing_low) * 2 + 1])
+    keys.sort()
+    return (keys // 2).tolist(), (keys % 2 == 0).tolist()
+
 
 def find_swings(df, lookback=3):
+    """
+    Swing points as ("high" | "low", index, price) tuples.
+
+    A bar is a swing when it equals the extreme of the `2 * lookback` bars
+    starting `lookback` bars before it.
+    """
+    high = np.asarray(df['high'], dtype=float)
+    low = np.asarray(df['low'], dtype=float)
+
+    swing_high, swing_low = swing_masks(high, low, lookback, lookback - 1)
+    # the scan stops `lookback` bars before the end
+    end = len(high) - lookback
+    swing_high[end:] = False
+    swing_low[end:] = False
+
     swings = []
+    for i, is_high in zip(*swing_indices(swing_high, swing_low)):
+        if is_high:
+            swings.append(("high", i, float(high[i])))
+        else:
+            swings.append(("low", i, float(low[i])))
+
+    return swings
+
 
-    for i in range(lookback, len(df) - lookback):
-        high = df['high'][i]
-        low = df['low'][i]
+def fractal_swings(high, low):
+    """
+    3-bar fractal swings as {"type", "price", "index"} dicts, the shape
+    ict_concepts.market_structure.get_swings returns.
 
-        if high == max(df['high'][i-lookback:i+lookback]):
-            swings.append(("high", i, high))
+    A bar is a swing high (low) when its high (low) is strictly beyond both
+    neighbours'; the first and last two bars are never swings.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    swing_high, swing_low = swing_masks(high, low, 1, strict=True)
+    swing_high[:2] = swing_high[-2:] = False
+    swing_low[:2] = swing_low[-2:] = False
 
-        if low == min(df['low'][i-lookback:i+lookback]):
-            swings.append(("low", i, low))
+    swings = []
+    for i, is_high in zip(*swing_indices(swing_high, swing_low)):
+        if is_high:
+            swings.append({"type": "high", "price": high[i], "index": i})
+        else:
+            swings.append({"type": "low", "price": low[i], "index": i})
 
     return swings
@@ -2,8 +2,20 @@ def ml_quality_filter(features, model, threshold=0.65):
     """
     model: trained XGBoost model
     """
+    return ml_quality_filter_batch([features], model, threshold)[0]
+
+
+def ml_quality_filter_batch(rows, model, threshold=0.65):
+    """
+    One predict_proba call for every candidate's feature row.
+    model: anything with predict_proba: ml.tree_export.TreeEnsemble,
+    a trained XGBoost model, or ml.model_registry.ModelRegistry
+    Returns [(passed, probability)] in row order.
+    """
     if model is None:
-        return True, 1.0  # allow trades if ML disabled
+        return [(True, 1.0)] * len(rows)  # allow trades if ML disabled
+    if not len(rows):
+        return []
 
-    probability = model.predict_proba([features])[0][1]
-    return probability >= threshold, probability
+    probabilities = model.predict_proba(rows)[:, 1]
+    return [(bool(p >= threshold), float(p)) for p in probabilities]
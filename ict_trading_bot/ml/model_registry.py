@@ -0,0 +1,185 @@
+"""
+Process-wide ML model registry.
+
+The model is loaded once at startup instead of per signal; joblib/pickle
+dumps are opened with mmap_mode="r", so their numpy arrays are paged in
+from the file rather than copied.  After start(), a daemon watcher thread
+re-stats the file every `check_every` seconds and, when its mtime/size
+changed, loads the new model off to the side and swaps the reference in
+one assignment.  get() only returns that reference, so the scan never
+waits on a reload: a batch already scoring keeps the model it started
+with, and a file that fails to load leaves the current model in place.
+
+predict_proba() scores a whole cycle's candidate rows in one call and
+records the scoring latency for /status.
+
+Loaders by extension:
+  .npz                ml.tree_export.TreeEnsemble (NumPy only, no xgboost)
+  .json / .ubj        xgboost native format (XGBClassifier.load_model)
+  .joblib / .pkl      joblib.load(mmap_mode="r")
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+
+def _load_trees(path):
+    from ml.tree_export import TreeEnsemble
+
+    return TreeEnsemble.load(path)
+
+
+def _load_xgboost(path):
+    import xgboost as xgb
+
+    model = xgb.XGBClassifier()
+    model.load_model(path)
+    return model
+
+
+def _load_joblib(path):
+    import joblib
+
+    return joblib.load(path, mmap_mode="r")
+
+
+LOADERS = {
+    ".npz": _load_trees,
+    ".json": _load_xgboost,
+    ".ubj": _load_xgboost,
+    ".joblib": _load_joblib,
+    ".pkl": _load_joblib,
+}
+
+
+class ModelRegistry:
+    def __init__(self, path=None, check_every=5.0, loader=None):
+        self.path = path
+        self.check_every = check_every
+        self._loader = loader
+        self._lock = threading.Lock()
+        # one load at a time; held for the whole load, never by get()
+        self._reload_lock = threading.Lock()
+        self._model = None
+        self._version = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.loads = 0
+        self.reload_errors = 0
+        self.last_error = None
+        # scoring latency
+        self.batches = 0
+        self.rows = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.last_s = 0.0
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self, path):
+        loader = self._loader or LOADERS.get(os.path.splitext(path)[1].lower())
+        if loader is None:
+            raise ValueError(f"no model loader for {path}")
+        return loader(path)
+
+    # -------------------------
+    # LOAD / RELOAD
+    # -------------------------
+    def load(self):
+        """(Re)load the model if the file changed since the last load; returns the current model."""
+        if not self.path:
+            return None
+        with self._reload_lock:
+            version = self._stat()
+            if version is None or version == self._version:
+                return self._model
+            try:
+                model = self._load(self.path)
+            except Exception as e:
+                # keep serving the previous model; retry on the next change
+                with self._lock:
+                    self.reload_errors += 1
+                    self.last_error = str(e)
+                    self._version = version
+                print(f"Model load failed ({self.path}):", e)
+                return self._model
+            with self._lock:
+                self._model, self._version = model, version
+                self.loads += 1
+                self.last_error = None
+            return model
+
+    def start(self):
+        """Watch the file for changes on a daemon thread (no-op without a path)."""
+        if not self.path or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _watch(self):
+        while not self._stop.wait(self.check_every):
+            self.load()
+
+    def get(self):
+        """Current model (or None when ML is disabled); never loads."""
+        return self._model
+
+    def set(self, model):
+        """Install an in-memory model (tests, backtests)."""
+        with self._lock:
+            self._model = model
+            self._version = self._stat() if self.path else None
+
+    # -------------------------
+    # SCORING
+    # -------------------------
+    def predict_proba(self, rows):
+        """predict_proba of the current model over a batch of feature rows."""
+        model = self._model
+        if model is None:
+            raise RuntimeError("no model loaded")
+        started = time.perf_counter()
+        probabilities = model.predict_proba(np.asarray(rows, dtype=np.float64))
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.batches += 1
+            self.rows += len(rows)
+            self.total_s += elapsed
+            self.max_s = max(self.max_s, elapsed)
+            self.last_s = elapsed
+        return probabilities
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self.path,
+                "loaded": self._model is not None,
+                "watching": bool(self._thread and self._thread.is_alive()),
+                "model": type(self._model).__name__ if self._model is not None else None,
+                "mtime": self._version[0] / 1e9 if self._version else None,
+                "loads": self.loads,
+                "reload_errors": self.reload_errors,
+                "last_error": self.last_error,
+                "batches": self.batches,
+                "rows": self.rows,
+                "avg_rows": self.rows / self.batches if self.batches else 0.0,
+                "avg_ms": 1000 * self.total_s / self.batches if self.batches else 0.0,
+                "max_ms": 1000 * self.max_s,
+                "last_ms": 1000 * self.last_s,
+            }
+
+
+MODELS = ModelRegistry(os.getenv("ML_MODEL_PATH"))
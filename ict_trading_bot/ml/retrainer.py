@@ -0,0 +1,280 @@
+"""
+Background retraining of the ML quality filter.
+
+Retrainer runs in its own process (scripts/retrain.py), never inside the
+bot: utils.resources.limit_resources() renices that process and caps its
+thread pools before numpy loads, and every xgboost call is given
+`threads` threads, so training only takes CPU the trading loop leaves
+idle.
+
+A retrain is due when the feature store (data.feature_store) has
+`min_new_labels` labelled candidates more than the last run saw, or
+`every` seconds have passed and any new label arrived.  Each run:
+
+  1. exports the store to <work_dir>/features.csv (ml.trainer input)
+  2. fits a candidate on every row before the holdout -- the newest
+     `holdout` fraction of rows, never older than the data the current
+     model was trained on, minus a `purge` gap (default: the longest
+     trade, ml.trainer.resolve_purge)
+  3. scores the candidate's exported TreeEnsemble and the current model
+     on the holdout; the candidate must match the current model's
+     `metric` within `tolerance`
+  4. refits on every row and publishes: artifacts are written to
+     <work_dir>, the previous model is copied to <name>.prev<ext> and the
+     new one os.replace()d over `model_path`
+
+ml.model_registry re-stats `model_path` every few seconds and swaps the
+new model in on the bot's next ml_quality_filter call; a rejected or
+failed run leaves the file untouched.
+
+Every run's report (trigger, holdout metrics, decision) is kept in
+<work_dir>/retrain.json along with what the next run needs.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.resources import THREADS
+
+logger = logging.getLogger(__name__)
+
+RETRAIN_EVERY = 24 * 3600
+MIN_NEW_LABELS = 500
+HOLDOUT = 0.2
+# holdouts smaller than this cannot tell two models apart
+MIN_HOLDOUT = 100
+# metric -> True when lower is better
+METRICS = {"logloss": True, "auc": False, "precision": False}
+
+
+class Retrainer:
+    def __init__(self, store, model_path, work_dir="models/retrain", bar_store=None,
+                 min_new_labels=MIN_NEW_LABELS, every=RETRAIN_EVERY, holdout=HOLDOUT,
+                 purge=None, metric="logloss", tolerance=0.0, rounds=None, params=None,
+                 threads=THREADS, refit=True):
+        from ml.model_registry import LOADERS
+
+        ext = os.path.splitext(model_path)[1].lower()
+        if ext not in (".npz", ".json"):
+            raise ValueError(f"can only publish .npz or .json models, not {model_path}")
+        if metric not in METRICS:
+            raise ValueError(f"unknown metric {metric}; one of {', '.join(METRICS)}")
+        self.store = store
+        self.bar_store = bar_store
+        self.model_path = model_path
+        self.work_dir = work_dir
+        self.min_new_labels = min_new_labels
+        self.every = every
+        self.holdout = holdout
+        self.purge = purge
+        self.metric = metric
+        self.tolerance = tolerance
+        self.rounds = rounds
+        self.params = params
+        self.threads = threads
+        self.refit = refit
+        self._loader = LOADERS[ext]
+        self._stop = threading.Event()
+
+    # -------------------------
+    # STATE
+    # -------------------------
+    @property
+    def _state_path(self):
+        return os.path.join(self.work_dir, "retrain.json")
+
+    def state(self):
+        try:
+            with open(self._state_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_state(self, state):
+        os.makedirs(self.work_dir, exist_ok=True)
+        with open(self._state_path + ".tmp", "w") as f:
+            json.dump(state, f, indent=2, default=str)
+        os.replace(self._state_path + ".tmp", self._state_path)
+
+    def due(self, now=None):
+        """(due, reason): enough new labels, or the schedule and any new label."""
+        now = time.time() if now is None else now
+        state = self.state()
+        labels = self.store.count()
+        new = labels - state.get("labels", 0)
+        if new <= 0:
+            return False, "no new labels"
+        if new >= self.min_new_labels:
+            return True, f"{new} new labels"
+        if now - state.get("trained_at", 0) >= self.every:
+            return True, "schedule"
+        return False, f"{new}/{self.min_new_labels} new labels"
+
+    # -------------------------
+    # RUN
+    # -------------------------
+    def run_once(self, force=False):
+        """
+        One check (and, when due, one retrain).  Returns the run's report,
+        or None when nothing was due.
+        """
+        if self.bar_store is not None:
+            self._refresh_features()
+        due, reason = self.due()
+        if not (due or force):
+            logger.debug("retrain not due: %s", reason)
+            return None
+        return self._retrain(reason if due else "forced")
+
+    def _refresh_features(self):
+        from data.feature_store import build_features
+
+        for symbol in self.bar_store.symbols():
+            try:
+                build_features(self.store, self.bar_store, symbol)
+            except ValueError as e:
+                logger.warning("features for %s skipped: %s", symbol, e)
+
+    def _retrain(self, reason):
+        from data.feature_store import export_csv
+        from ml import trainer
+
+        started = time.perf_counter()
+        state = self.state()
+        os.makedirs(self.work_dir, exist_ok=True)
+        source = os.path.join(self.work_dir, "features.csv")
+        labels = export_csv(self.store, source)
+        features = trainer.read_schema(source)
+        times = np.sort(trainer.read_times(source))
+        purge = trainer.resolve_purge(source, self.purge)
+        kw = {"params": self.params, "rounds": self.rounds or trainer.ROUNDS, "nthread": self.threads}
+
+        report = {"started": time.time(), "trigger": reason, "labels": labels,
+                  "metric": self.metric, "purge": purge}
+        holdout_start = self._holdout_start(times, state.get("data_end"))
+        report["holdout_start"] = holdout_start
+        report["holdout_rows"] = int(np.sum(times >= holdout_start))
+
+        incumbent = self._current_model(len(features))
+        if incumbent is not None and report["holdout_rows"] < MIN_HOLDOUT:
+            report["decision"] = "skipped: holdout too small"
+        else:
+            booster, report["train_rows"] = trainer.fit(source, features, end=holdout_start - purge, **kw)
+            report["candidate"] = self._score(_exported(booster), source, features, holdout_start)
+            report["current"] = (self._score(incumbent, source, features, holdout_start)
+                                 if incumbent is not None else None)
+            if self._accept(report["candidate"], report["current"]):
+                if self.refit:
+                    booster, report["train_rows"] = trainer.fit(source, features, **kw)
+                report["paths"] = self._publish(booster, trainer, features, report)
+                report["decision"] = "published"
+            else:
+                report["decision"] = "rejected"
+
+        report["wall_s"] = time.perf_counter() - started
+        logger.info("retrain (%s): %s", reason, report["decision"])
+        published = report["decision"] == "published"
+        self._save_state({
+            "labels": labels,
+            "trained_at": time.time(),
+            # rows the published model has seen: later holdouts start after them
+            "data_end": int(times[-1]) if published and len(times) else state.get("data_end"),
+            "published_at": time.time() if published else state.get("published_at"),
+            "last": report,
+        })
+        return report
+
+    def _holdout_start(self, times, data_end):
+        """Newest `holdout` fraction of rows, never rows the current model trained on."""
+        if not len(times):
+            return 0
+        start = int(times[min(len(times) - 1, int(len(times) * (1 - self.holdout)))])
+        if data_end is not None:
+            start = max(start, int(data_end) + 1)
+        return start
+
+    def _current_model(self, n_features):
+        if not os.path.exists(self.model_path):
+            return None
+        try:
+            model = self._loader(self.model_path)
+        except Exception as e:
+            logger.warning("current model %s unreadable, replacing it: %s", self.model_path, e)
+            return None
+        if getattr(model, "n_features", getattr(model, "n_features_in_", n_features)) != n_features:
+            logger.warning("current model %s has a different feature schema, replacing it", self.model_path)
+            return None
+        return model
+
+    def _score(self, model, source, features, start):
+        from ml import trainer
+
+        ys, ps = [], []
+        for X, y, _ in trainer.iter_chunks(source, features, start=start):
+            ys.append(y)
+            ps.append(model.predict_proba(X)[:, 1])
+        if not ys:
+            return None
+        return trainer.evaluate(np.concatenate(ys), np.concatenate(ps))
+
+    def _accept(self, candidate, current):
+        if current is None:
+            return True
+        new, old = candidate.get(self.metric), current.get(self.metric)
+        if old is None:
+            return True
+        if new is None:
+            return False
+        if METRICS[self.metric]:
+            return new <= old + self.tolerance
+        return new >= old - self.tolerance
+
+    def _publish(self, booster, trainer, features, report):
+        now = datetime.now(timezone.utc)
+        stamp = now.strftime("%Y%m%d-%H%M%S")
+        metadata = {
+            "created": now.isoformat(),
+            "features": features,
+            "label": trainer.LABEL,
+            "rows": report["train_rows"],
+            "params": {**trainer.PARAMS, **(self.params or {})},
+            "rounds": self.rounds or trainer.ROUNDS,
+            "retrain": report,
+        }
+        paths = trainer.save_model(booster, metadata, self.work_dir, name=f"model-{stamp}")
+        artifact = paths["trees"] if self.model_path.lower().endswith(".npz") else paths["xgboost"]
+
+        # rollback copy first; the live file is only ever replaced whole
+        if os.path.exists(self.model_path):
+            root, ext = os.path.splitext(self.model_path)
+            shutil.copyfile(self.model_path, root + ".prev" + ext)
+        os.makedirs(os.path.dirname(os.path.abspath(self.model_path)), exist_ok=True)
+        tmp = self.model_path + ".tmp"
+        shutil.copyfile(artifact, tmp)
+        os.replace(tmp, self.model_path)
+        return {**paths, "published": self.model_path}
+
+    def run_forever(self, poll=300.0):
+        """Check every `poll` seconds until stop(); a failed run is logged and retried."""
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("retrain failed")
+            self._stop.wait(poll)
+
+    def stop(self):
+        self._stop.set()
+
+
+def _exported(booster):
+    # validate the artifact the bot will actually score with
+    from ml.tree_export import export_booster
+
+    return export_booster(booster)
@@ -1,27 +1,370 @@
-import xgboost as xgb
+"""
+Time-series ML training for the quality filter.
+
+The dataset is never loaded whole: every pass streams it in chunks
+(pd.read_csv(chunksize=...)) through an xgboost DataIter into a
+QuantileDMatrix, which keeps only the 1-byte histogram bins of the rows
+it needs; with external_memory=True those bins are paged to disk as
+well (ExtMemQuantileDMatrix, xgboost >= 2.1).
+
+Validation is walk-forward by time instead of a shuffled split:
+the time range is cut into n_folds + 1 blocks of equal row count; fold k
+tests on block k + 1 and trains on every row labelled before it, minus a
+`purge` gap so trades still open at the test start cannot leak their
+outcome into training.  By default the gap is the longest trade in the
+data, max(exit_time - time).  Folds are independent and run in parallel
+worker processes, each streaming its own slice of the file.
+
+The final model is fit on all rows and saved by save_model() with its
+feature schema, fold metrics and run stats (wall time, peak RSS).
+
+Dataset: a CSV with the feature columns, a 0/1 "win" label, an epoch
+seconds "time" column (row order is used when it is missing) and the
+trade's epoch seconds "exit_time" (data.feature_store.export_csv writes
+all of them); without exit_time the purge must be given explicitly.
+"""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+import xgboost as xgb
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, RSS is not reported
+    resource = None
+
+LABEL = "win"
+TIME = "time"
+EXIT_TIME = "exit_time"
+# columns that are never features
+RESERVED = (LABEL, TIME, EXIT_TIME, "symbol")
+
+PARAMS = {
+    "objective": "binary:logistic",
+    "tree_method": "hist",
+    "max_depth": 5,
+    "eta": 0.05,
+    "subsample": 0.8,
+    "eval_metric": "logloss",
+}
+ROUNDS = 200
+CHUNKSIZE = 100_000
+# ml.ml_filter threshold the pass-rate / precision metrics are taken at
+THRESHOLD = 0.65
+
+
+# -------------------------
+# STREAMING
+# -------------------------
+def read_schema(source):
+    """Feature columns of `source`, in file order."""
+    header = pd.read_csv(source, nrows=0).columns
+    features = [c for c in header if c not in RESERVED]
+    if LABEL not in header:
+        raise ValueError(f"{source}: no '{LABEL}' column")
+    return features
+
+
+def iter_chunks(source, features, chunksize=CHUNKSIZE, start=None, end=None):
+    """
+    Yield (X float32, y, times) chunks of `source`, keeping rows with
+    start <= time < end.  Without a time column the row number is the time.
+    """
+    header = pd.read_csv(source, nrows=0).columns
+    timed = TIME in header
+    columns = list(features) + [LABEL] + ([TIME] if timed else [])
+    offset = 0
+    for chunk in pd.read_csv(source, usecols=columns, chunksize=chunksize):
+        times = (chunk[TIME].to_numpy(np.int64) if timed
+                 else np.arange(offset, offset + len(chunk), dtype=np.int64))
+        offset += len(chunk)
+        keep = np.ones(len(chunk), dtype=bool)
+        if start is not None:
+            keep &= times >= start
+        if end is not None:
+            keep &= times < end
+        if not keep.any():
+            continue
+        X = chunk[list(features)].to_numpy(np.float32)[keep]
+        y = chunk[LABEL].to_numpy(np.float32)[keep]
+        yield X, y, times[keep]
+
+
+def read_times(source, chunksize=CHUNKSIZE):
+    """Every row's time (8 bytes a row), for choosing the fold boundaries."""
+    return np.concatenate([t for _, _, t in iter_chunks(source, [], chunksize)] or [np.empty(0, np.int64)])
+
+
+def longest_trade(source, chunksize=CHUNKSIZE):
+    """max(exit_time - time) over `source` in seconds, or None without those columns."""
+    header = pd.read_csv(source, nrows=0).columns
+    if TIME not in header or EXIT_TIME not in header:
+        return None
+    longest = None
+    for chunk in pd.read_csv(source, usecols=[TIME, EXIT_TIME], chunksize=chunksize):
+        if len(chunk):
+            held = int((chunk[EXIT_TIME] - chunk[TIME]).max())
+            longest = held if longest is None else max(longest, held)
+    return longest
+
+
+def resolve_purge(source, purge=None, chunksize=CHUNKSIZE):
+    """`purge` if given, else the longest trade in `source`."""
+    if purge is not None:
+        return int(purge)
+    longest = longest_trade(source, chunksize)
+    if longest is None:
+        raise ValueError(f"{source}: no '{EXIT_TIME}' column to size the purge; pass purge (seconds)")
+    return max(longest, 0)
+
+
+class ChunkIter(xgb.DataIter):
+    """xgboost DataIter over iter_chunks(); re-streams the file on every reset."""
+
+    def __init__(self, source, features, start=None, end=None, chunksize=CHUNKSIZE, cache_prefix=None):
+        self._args = (source, features, chunksize, start, end)
+        self._chunks = None
+        self.rows = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self.reset()
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        X, y, _ = chunk
+        self.rows += len(X)
+        input_data(data=X, label=y)
+        return True
 
-def train_model(csv_path):
-    df = pd.read_csv(csv_path)
+    def reset(self):
+        self._chunks = iter_chunks(*self._args)
+        self.rows = 0
 
-    X = df.drop(columns=["win"])
-    y = df["win"]
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, shuffle=True
-    )
+def training_matrix(source, features, start=None, end=None, chunksize=CHUNKSIZE,
+                    external_memory=False, cache_dir=None, nthread=None):
+    if external_memory:
+        if not hasattr(xgb, "ExtMemQuantileDMatrix"):
+            raise RuntimeError("external memory training needs xgboost >= 2.1")
+        prefix = os.path.join(cache_dir or ".", f"xgb-cache-{os.getpid()}-{start}-{end}")
+        it = ChunkIter(source, features, start, end, chunksize, cache_prefix=prefix)
+        return xgb.ExtMemQuantileDMatrix(it, nthread=nthread)
+    return xgb.QuantileDMatrix(ChunkIter(source, features, start, end, chunksize), nthread=nthread)
 
-    model = xgb.XGBClassifier(
-        n_estimators=200,
-        max_depth=5,
-        learning_rate=0.05,
-        subsample=0.8
-    )
 
-    model.fit(X_train, y_train)
-    preds = model.predict(X_test)
+# -------------------------
+# SPLITS
+# -------------------------
+def walk_forward_splits(times, n_folds=5, purge=0):
+    """
+    [{fold, train_end, test_start, test_end}] over `times`: n_folds + 1
+    equal-count blocks, testing on each block after the first and
+    training on rows with time < test_start - purge.
+    """
+    times = np.sort(np.asarray(times, dtype=np.int64))
+    if len(times) < 2 * (n_folds + 1):
+        raise ValueError(f"{len(times)} rows are too few for {n_folds} folds")
+    edges = times[np.linspace(0, len(times) - 1, n_folds + 2).round().astype(int)]
+    edges[-1] = times[-1] + 1
+    splits = []
+    for k in range(n_folds):
+        test_start, test_end = int(edges[k + 1]), int(edges[k + 2])
+        if test_end <= test_start:
+            continue
+        splits.append({
+            "fold": k,
+            "train_end": test_start - purge,
+            "test_start": test_start,
+            "test_end": test_end,
+        })
+    return splits
 
-    print("Accuracy:", accuracy_score(y_test, preds))
+
+# -------------------------
+# TRAIN / EVALUATE
+# -------------------------
+def evaluate(y, p, threshold=THRESHOLD):
+    y = np.asarray(y, dtype=np.float64)
+    p = np.clip(np.asarray(p, dtype=np.float64), 1e-7, 1 - 1e-7)
+    passed = p >= threshold
+    return {
+        "rows": int(len(y)),
+        "win_rate": float(y.mean()) if len(y) else 0.0,
+        "logloss": float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))) if len(y) else 0.0,
+        "auc": _auc(y, p),
+        "accuracy": float(np.mean((p >= 0.5) == y)) if len(y) else 0.0,
+        "pass_rate": float(passed.mean()) if len(y) else 0.0,
+        "precision": float(y[passed].mean()) if passed.any() else None,
+    }
+
+
+def _auc(y, p):
+    positives = int(y.sum())
+    negatives = len(y) - positives
+    if not positives or not negatives:
+        return None
+    ranks = pd.Series(p).rank().to_numpy()
+    return float((ranks[y == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def predict_stream(booster, source, features, start=None, end=None, chunksize=CHUNKSIZE):
+    ys, ps = [], []
+    for X, y, _ in iter_chunks(source, features, chunksize, start, end):
+        ys.append(y)
+        ps.append(booster.predict(xgb.DMatrix(X)))
+    if not ys:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(ys), np.concatenate(ps)
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size of this process (or its reaped children), MB."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is bytes on macOS, KiB elsewhere
+    return usage.ru_maxrss / (2**20 if sys.platform == "darwin" else 1024)
+
+
+def fit(source, features, start=None, end=None, params=None, rounds=ROUNDS,
+        chunksize=CHUNKSIZE, external_memory=False, cache_dir=None, nthread=None):
+    params = {**PARAMS, **(params or {})}
+    if nthread:
+        params["nthread"] = nthread
+    dtrain = training_matrix(source, features, start, end, chunksize, external_memory, cache_dir, nthread)
+    booster = xgb.train(params, dtrain, num_boost_round=rounds)
+    return booster, dtrain.num_row()
+
+
+def _run_fold(task):
+    split, source, features, params, rounds, chunksize, external_memory, cache_dir, nthread = task
+    started = time.perf_counter()
+    booster, train_rows = fit(source, features, None, split["train_end"], params, rounds,
+                              chunksize, external_memory, cache_dir, nthread)
+    y, p = predict_stream(booster, source, features, split["test_start"], split["test_end"], chunksize)
+    return {
+        **split,
+        "train_rows": train_rows,
+        **{f"test_{k}": v for k, v in evaluate(y, p).items()},
+        "wall_s": time.perf_counter() - started,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def walk_forward(source, features=None, n_folds=5, purge=None, params=None, rounds=ROUNDS,
+                 workers=None, chunksize=CHUNKSIZE, external_memory=False, cache_dir=None):
+    """
+    Fold rows of a purged walk-forward validation, folds run in parallel.
+    purge: seconds before each test block left out of training (default:
+    the longest trade, see resolve_purge).
+    """
+    features = list(features or read_schema(source))
+    purge = resolve_purge(source, purge, chunksize)
+    splits = walk_forward_splits(read_times(source, chunksize), n_folds, purge)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(splits)))
+    # split the cores between the folds instead of oversubscribing them
+    nthread = max(1, (os.cpu_count() or 1) // workers)
+    tasks = [(s, source, features, params, rounds, chunksize, external_memory, cache_dir, nthread)
+             for s in splits]
+    if workers == 1:
+        return [_run_fold(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_fold, tasks))
+
+
+def train_pipeline(source, out_dir=None, n_folds=5, purge=None, params=None, rounds=ROUNDS,
+                   workers=None, chunksize=CHUNKSIZE, external_memory=False, cache_dir=None):
+    """
+    Walk-forward validate, then fit on every row and (with `out_dir`) save.
+    Returns (booster, metadata).
+    """
+    started = time.perf_counter()
+    features = read_schema(source)
+    purge = resolve_purge(source, purge, chunksize)
+    folds = walk_forward(source, features, n_folds, purge, params, rounds, workers,
+                         chunksize, external_memory, cache_dir)
+    booster, rows = fit(source, features, params=params, rounds=rounds, chunksize=chunksize,
+                        external_memory=external_memory, cache_dir=cache_dir)
+    metadata = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "source": os.path.abspath(source),
+        "features": features,
+        "label": LABEL,
+        "rows": rows,
+        "params": {**PARAMS, **(params or {})},
+        "rounds": rounds,
+        "purge": purge,
+        "xgboost": xgb.__version__,
+        "folds": folds,
+        "metrics": _summary(folds),
+        "wall_s": time.perf_counter() - started,
+        "peak_rss_mb": max(filter(None, [peak_rss_mb(), peak_rss_mb(children=True)]
+                                     + [f["peak_rss_mb"] for f in folds]), default=None),
+    }
+    if out_dir:
+        metadata["paths"] = save_model(booster, metadata, out_dir)
+    return booster, metadata
+
+
+def _summary(folds):
+    """Row-weighted mean of each test_* metric across folds."""
+    summary = {"rows": sum(f["test_rows"] for f in folds)}
+    for key in folds[0] if folds else ():
+        if not key.startswith("test_") or key in ("test_start", "test_end", "test_rows"):
+            continue
+        pairs = [(f[key], f["test_rows"]) for f in folds if f[key] is not None]
+        weight = sum(n for _, n in pairs)
+        summary[key[5:]] = sum(v * n for v, n in pairs) / weight if weight else None
+    return summary
+
+
+# -------------------------
+# ARTIFACTS
+# -------------------------
+def save_model(booster, metadata, out_dir, name="model"):
+    """
+    Write <name>.json (xgboost), <name>.npz (ml.tree_export arrays) and
+    <name>.meta.json (schema, metrics, run stats), each atomically.
+    """
+    from ml.tree_export import export_booster
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {
+        "xgboost": os.path.join(out_dir, f"{name}.json"),
+        "trees": os.path.join(out_dir, f"{name}.npz"),
+        "meta": os.path.join(out_dir, f"{name}.meta.json"),
+    }
+    booster.save_model(paths["xgboost"] + ".tmp.json")
+    os.replace(paths["xgboost"] + ".tmp.json", paths["xgboost"])
+    export_booster(booster).save(paths["trees"])
+    with open(paths["meta"] + ".tmp", "w") as f:
+        json.dump({**metadata, "paths": paths}, f, indent=2, default=str)
+    os.replace(paths["meta"] + ".tmp", paths["meta"])
+    return paths
+
+
+def as_classifier(booster):
+    """XGBClassifier around a trained binary:logistic Booster (predict_proba)."""
+    model = xgb.XGBClassifier()
+    model.load_model(bytearray(booster.save_raw("ubj")))
     return model
+
+
+def train_model(csv_path, out_dir=None, **kwargs):
+    """
+    Walk-forward validated model for `csv_path`; prints the fold metrics.
+    Returns an xgboost.XGBClassifier, as before.
+    """
+    booster, metadata = train_pipeline(csv_path, out_dir, **kwargs)
+    for key, value in metadata["metrics"].items():
+        print(f"{key}: {value}")
+    print(f"wall {metadata['wall_s']:.1f}s  peak RSS {metadata['peak_rss_mb'] or 0:.0f} MB")
+    return as_classifier(booster)
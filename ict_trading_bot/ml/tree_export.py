@@ -0,0 +1,182 @@
+"""
+XGBoost trees as flat NumPy arrays, scored without xgboost.
+
+export_booster() flattens a trained binary:logistic XGBClassifier (from
+ml.trainer.train_model) into one set of node arrays shared by all trees:
+
+    feature    int32    split feature (0 on leaves)
+    threshold  float32  go left when x < threshold
+    left/right int32    child node index; a leaf points at itself
+    default    bool     branch taken when x is NaN (xgboost "missing")
+    value      float32  leaf value (0 on splits)
+    roots      int32    root node of each tree
+
+TreeEnsemble.predict_proba() walks every (row, tree) pair one level per
+step with np.take: `max_depth` vectorized steps per block of pairs, the
+blocks sized to stay in cache.  Leaves loop back onto themselves, so
+rows that finish early just stay put.
+
+Features are compared in float32 exactly like xgboost's DMatrix, so
+probabilities match predict_proba to float32 rounding.
+
+Saved as .npz; ml.model_registry loads .npz files as a TreeEnsemble, so
+the live process never imports xgboost or sklearn.
+"""
+import json
+import os
+
+import numpy as np
+
+ARRAYS = ("feature", "threshold", "left", "right", "default", "value", "roots")
+
+# (row, tree) pairs walked per block
+CHUNK = 1 << 16
+
+
+class TreeEnsemble:
+    def __init__(self, feature, threshold, left, right, default, value, roots,
+                 base_margin, max_depth, n_features):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default = np.asarray(default, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_margin = float(base_margin)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        # children[2 * node + go_right]: one gather per level instead of two
+        self._children = np.empty(2 * len(self.left), dtype=np.int32)
+        self._children[0::2] = self.left
+        self._children[1::2] = self.right
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # -------------------------
+    # SCORING
+    # -------------------------
+    def leaves(self, X):
+        """(n_rows, n_trees) leaf node reached by each row in each tree."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"expected {self.n_features} features, got {X.shape[1]}")
+        X = np.ascontiguousarray(X)
+        # (row, tree) pairs in blocks that stay cache-resident
+        step = max(1, CHUNK // max(self.n_trees, 1))
+        out = np.empty((len(X), self.n_trees), dtype=np.int32)
+        for start in range(0, len(X), step):
+            out[start:start + step] = self._walk(X[start:start + step])
+        return out
+
+    def _walk(self, X):
+        n = len(X)
+        flat = X.ravel()
+        base = np.repeat(np.arange(n, dtype=np.int32) * self.n_features, self.n_trees)
+        node = np.tile(self.roots, n)
+        missing = bool(np.isnan(flat).any())
+        for _ in range(self.max_depth):
+            x = flat.take(base + self.feature.take(node))
+            go_right = x >= self.threshold.take(node)
+            if missing:
+                go_right |= np.isnan(x) & ~self.default.take(node)
+            node = self._children.take(2 * node + go_right)
+        return node.reshape(n, self.n_trees)
+
+    def margin(self, X):
+        # xgboost accumulates leaf values in float32
+        return self.value.take(self.leaves(X)).sum(axis=1, dtype=np.float32) + np.float32(self.base_margin)
+
+    def predict_proba(self, X):
+        """[[1 - p, p]] per row, like XGBClassifier.predict_proba."""
+        p = 1.0 / (1.0 + np.exp(-self.margin(X).astype(np.float64)))
+        return np.column_stack([1.0 - p, p])
+
+    # -------------------------
+    # PERSISTENCE
+    # -------------------------
+    def save(self, path):
+        """Write to `path` (.npz) atomically."""
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **{name: getattr(self, name) for name in ARRAYS},
+                 meta=np.array([self.base_margin, self.max_depth, self.n_features]))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            base_margin, max_depth, n_features = data["meta"]
+            return cls(*(data[name] for name in ARRAYS), base_margin, max_depth, n_features)
+
+
+def _base_margin(learner):
+    # "[4.9333334E-1]" in xgboost >= 2, "4.9333334E-1" before; a probability
+    # for binary:logistic
+    raw = learner["learner_model_param"]["base_score"].strip("[]")
+    p = float(np.float32(raw))
+    return float(np.log(p / (1.0 - p)))
+
+
+def export_booster(model):
+    """TreeEnsemble equivalent of a fitted binary XGBClassifier (or Booster)."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    objective = learner["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"unsupported objective {objective}")
+    gbm = learner["gradient_booster"]
+    if gbm["name"] != "gbtree":
+        raise ValueError(f"unsupported booster {gbm['name']}")
+
+    trees = gbm["model"]["trees"]
+    best = getattr(model, "best_iteration", None)
+    if best is not None:
+        # predict_proba stops at the early-stopping round
+        trees = trees[:best + 1]
+
+    columns = {name: [] for name in ARRAYS}
+    max_depth = 0
+    offset = 0
+    for tree in trees:
+        left = np.asarray(tree["left_children"], dtype=np.int64)
+        right = np.asarray(tree["right_children"], dtype=np.int64)
+        if any(tree.get("split_type", [])):
+            raise ValueError("categorical splits are not supported")
+        leaf = left == -1
+        idx = np.arange(len(left))
+        columns["feature"].append(np.where(leaf, 0, tree["split_indices"]))
+        columns["threshold"].append(np.where(leaf, 0.0, tree["split_conditions"]))
+        columns["left"].append(np.where(leaf, idx, left) + offset)
+        columns["right"].append(np.where(leaf, idx, right) + offset)
+        columns["default"].append(np.asarray(tree["default_left"], dtype=bool))
+        columns["value"].append(np.where(leaf, tree["split_conditions"], 0.0))
+        columns["roots"].append([offset])
+        max_depth = max(max_depth, _depth(left, right))
+        offset += len(left)
+
+    return TreeEnsemble(
+        *(np.concatenate(columns[name]) if columns[name] else [] for name in ARRAYS),
+        base_margin=_base_margin(learner),
+        max_depth=max_depth,
+        n_features=int(learner["learner_model_param"]["num_feature"]),
+    )
+
+
+def _depth(left, right):
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [c for n in frontier for c in (left[n], right[n]) if c != -1]
+        if not frontier:
+            return depth
+        depth += 1
+
+
+def export_model(model, path):
+    """Flatten a trained model and save it for ml.model_registry."""
+    ensemble = export_booster(model)
+    ensemble.save(path)
+    return ensemble
@@ -0,0 +1,111 @@
+"""
+Offline stand-in for the MetaTrader5 package.
+
+Exposes the subset of the MetaTrader5 API the bot uses, served by a
+SimTerminal over on-disk bars.  data.mt5_connector imports this package in
+place of MetaTrader5 when MT5_BACKEND=sim; the terminal is built from
+MT5_SIM_DATA on first use unless configure() was called first:
+
+    import mt5_sim
+    from utils import clock
+    clock.install(clock.VirtualClock(start, end))
+    mt5_sim.configure("data/history", balance=10000)
+"""
+import json
+import os
+
+from mt5_sim.constants import *  # noqa: F401,F403
+from mt5_sim.constants import RES_E_INTERNAL_FAIL_INIT
+from mt5_sim.history import load_history, save_bars  # noqa: F401
+from mt5_sim.terminal import SimTerminal
+
+_TERMINAL = None
+
+
+def configure(data_dir=None, history=None, **kwargs):
+    """
+    Build the module's terminal from `history` ({symbol: {tf: rates}}) or
+    the bar files in `data_dir`.  An optional symbols.json in data_dir
+    overrides per-symbol specs (digits, contract_size, spread, ...).
+    """
+    global _TERMINAL
+    if history is None:
+        history = load_history(data_dir)
+        specs_path = os.path.join(data_dir, "symbols.json")
+        if "specs" not in kwargs and os.path.exists(specs_path):
+            with open(specs_path) as f:
+                kwargs["specs"] = json.load(f)
+    _TERMINAL = SimTerminal(history, **kwargs)
+    return _TERMINAL
+
+
+def terminal():
+    global _TERMINAL
+    if _TERMINAL is None:
+        data_dir = os.getenv("MT5_SIM_DATA")
+        if not data_dir:
+            return None
+        configure(data_dir)
+    return _TERMINAL
+
+
+def _call(name, *args, default=None, **kwargs):
+    term = terminal()
+    if term is None:
+        return default
+    return term.call(name, getattr(term, name), *args, **kwargs)
+
+
+def initialize(*args, **kwargs):
+    return _call("initialize", *args, default=False, **kwargs)
+
+
+def shutdown():
+    return _call("shutdown", default=True)
+
+
+def last_error():
+    term = terminal()
+    if term is None:
+        return (RES_E_INTERNAL_FAIL_INIT, "mt5_sim not configured (set MT5_SIM_DATA)")
+    return term.last_error
+
+
+def version():
+    return (500, 0, "mt5_sim")
+
+
+def terminal_info():
+    return _call("terminal_info")
+
+
+def account_info():
+    return _call("account_info")
+
+
+def symbols_get():
+    return _call("symbols_get")
+
+
+def symbol_select(symbol, enable=True):
+    return _call("symbol_select", symbol, enable, default=False)
+
+
+def symbol_info(symbol):
+    return _call("symbol_info", symbol)
+
+
+def symbol_info_tick(symbol):
+    return _call("symbol_info_tick", symbol)
+
+
+def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+    return _call("copy_rates_from_pos", symbol, timeframe, start_pos, count)
+
+
+def positions_get(symbol=None, ticket=None, group=None):
+    return _call("positions_get", symbol=symbol, ticket=ticket, group=group)
+
+
+def order_send(request):
+    return _call("order_send", request)
@@ -0,0 +1,101 @@
+"""
+On-disk bar history for the simulated terminal.
+
+One file per symbol and timeframe, named <SYMBOL>_<TF>.npy (an MT5 rates
+array) or <SYMBOL>_<TF>.csv (time,open,high,low,close[,tick_volume,spread,
+real_volume]; time as epoch seconds or an ISO timestamp, UTC), or a
+data.bar_store root (<SYMBOL>/<TF>.npy).  Timeframes that are not on disk
+are resampled from the finest one that is.
+"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+RATE_DTYPE = np.dtype([
+    ("time", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"),
+    ("close", "f8"), ("tick_volume", "u8"), ("spread", "i4"), ("real_volume", "u8"),
+])
+
+TF_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "M30": 1800, "H1": 3600, "H4": 14400, "D1": 86400}
+
+# M15 bars in a trading year (252 days)
+M15_PER_YEAR = 252 * 96
+
+_FILE = re.compile(r"^(?P<symbol>.+)_(?P<tf>M1|M5|M15|M30|H1|H4|D1)\.(?P<ext>npy|csv)$")
+
+
+def as_rates(data):
+    """Any table with time/open/high/low/close columns -> MT5 rates array."""
+    rates = np.zeros(len(data["time"]), dtype=RATE_DTYPE)
+    for name in RATE_DTYPE.names:
+        try:
+            column = data[name]
+        except (KeyError, ValueError):
+            continue
+        rates[name] = np.asarray(column)
+    return rates
+
+
+def _read_csv(path):
+    df = pd.read_csv(path)
+    if not np.issubdtype(df["time"].dtype, np.number):
+        df["time"] = pd.to_datetime(df["time"], utc=True).astype("int64") // 10**9
+    return as_rates({c: df[c].to_numpy() for c in df.columns})
+
+
+def load_history(data_dir):
+    """{ symbol: { timeframe: rates } } for every bar file in data_dir."""
+    history = {}
+    for name in sorted(os.listdir(data_dir)):
+        folder = os.path.join(data_dir, name)
+        if os.path.isdir(folder):
+            # bar store layout
+            for tf_file in sorted(os.listdir(folder)):
+                tf, ext = os.path.splitext(tf_file)
+                if ext == ".npy" and tf in TF_SECONDS:
+                    history.setdefault(name, {})[tf] = as_rates(np.load(os.path.join(folder, tf_file)))
+            continue
+        match = _FILE.match(name)
+        if not match:
+            continue
+        path = os.path.join(data_dir, name)
+        rates = _read_csv(path) if match["ext"] == "csv" else as_rates(np.load(path))
+        rates.sort(order="time")
+        history.setdefault(match["symbol"], {})[match["tf"]] = rates
+    return history
+
+
+def save_bars(data_dir, symbol, timeframe, rates):
+    os.makedirs(data_dir, exist_ok=True)
+    np.save(os.path.join(data_dir, f"{symbol}_{timeframe}.npy"), as_rates(rates))
+
+
+def resample(rates, timeframe):
+    """Aggregate finer bars into `timeframe` bars."""
+    # imported here: backtest pulls in data.mt5_connector, which may be
+    # importing this package
+    from backtest.vectorized import aggregate_bars
+
+    out = as_rates(aggregate_bars(rates, timeframe))
+    period = TF_SECONDS[timeframe]
+    bucket = np.asarray(rates["time"]) // period
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    out["tick_volume"] = np.add.reduceat(np.asarray(rates["tick_volume"], dtype=np.uint64), starts)
+    return out
+
+
+def synthetic_m15(n, seed=42):
+    """`n` seeded random-walk M15 bars from an H4 boundary (benchmarks, optimizer demos)."""
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0006, n))
+    open_ = np.r_[close[0], close[:-1]]
+    rates = np.zeros(n, dtype=[("time", "i8"), ("open", "f8"), ("high", "f8"),
+                               ("low", "f8"), ("close", "f8")])
+    rates["time"] = 1_600_000_000 // 14400 * 14400 + np.arange(n) * 900
+    rates["open"] = open_
+    rates["close"] = close
+    rates["high"] = np.maximum(open_, close) + rng.uniform(0, 0.0004, n)
+    rates["low"] = np.minimum(open_, close) - rng.uniform(0, 0.0004, n)
+    return rates
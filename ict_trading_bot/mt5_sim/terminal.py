@@ -0,0 +1,406 @@
+"""
+Simulated MetaTrader5 terminal.
+
+Prices come from on-disk bars and a clock (utils.clock by default, a
+VirtualClock during replays).  Within a bar of the finest timeframe on disk
+the price walks open -> low -> high -> close for up candles and open ->
+high -> low -> close for down candles, one leg per quarter of the bar, like
+the MT5 tester's OHLC mode.  Positions are netted against that path every
+time the terminal is called, so SL/TP fill in path order at their level.
+
+P&L is converted to the account currency only when the symbol quotes in it
+or is based on it (EURUSD, USDJPY); crosses are reported in their quote
+currency.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from mt5_sim import constants as c
+from mt5_sim.history import TF_SECONDS, resample
+from utils import clock as _clock
+
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+SymbolInfo = namedtuple("SymbolInfo", (
+    "name visible select digits point spread trade_contract_size trade_tick_size "
+    "trade_tick_value volume_min volume_max volume_step bid ask currency_base "
+    "currency_profit description"
+))
+AccountInfo = namedtuple("AccountInfo", (
+    "login server currency balance equity profit margin margin_free leverage name"
+))
+TradePosition = namedtuple("TradePosition", (
+    "ticket time type magic identifier volume price_open sl tp price_current "
+    "profit symbol comment"
+))
+OrderSendResult = namedtuple("OrderSendResult", (
+    "retcode deal order volume price bid ask comment request_id request"
+))
+TerminalInfo = namedtuple("TerminalInfo", "connected trade_allowed path name company")
+
+TF_BY_CONSTANT = {
+    c.TIMEFRAME_M1: "M1", c.TIMEFRAME_M5: "M5", c.TIMEFRAME_M15: "M15",
+    c.TIMEFRAME_M30: "M30", c.TIMEFRAME_H1: "H1", c.TIMEFRAME_H4: "H4",
+    c.TIMEFRAME_D1: "D1",
+}
+
+
+def default_spec(symbol):
+    if "XAU" in symbol:
+        digits, contract = 2, 100
+    elif symbol.startswith(("BTC", "ETH", "XBT")):
+        digits, contract = (5, 1) if symbol.endswith("BTC") else (2, 1)
+    elif "JPY" in symbol:
+        digits, contract = 3, 100_000
+    else:
+        digits, contract = 5, 100_000
+    return {"digits": digits, "contract_size": contract, "spread": 10, "volume_min": 0.01,
+            "volume_max": 100.0, "volume_step": 0.01}
+
+
+class _Position:
+    __slots__ = ("ticket", "symbol", "type", "volume", "price_open", "sl", "tp", "time",
+                 "magic", "comment", "checked")
+
+    def __init__(self, **kwargs):
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+
+class SimTerminal:
+    """
+    history: { symbol: { timeframe: rates } } (see mt5_sim.history)
+    now() -> epoch seconds; bar times are treated as server time
+    """
+
+    def __init__(self, history, now=None, balance=10000.0, currency="USD", leverage=100,
+                 specs=None, login=1000001, round_trip=0.0):
+        self._history = {s: dict(tfs) for s, tfs in history.items() if tfs}
+        self._now = now or _clock.now
+        self._specs = {s: {**default_spec(s), **(specs or {}).get(s, {})} for s in self._history}
+        self._base = {
+            s: min(tfs, key=lambda tf: TF_SECONDS[tf]) for s, tfs in self._history.items()
+        }
+        self._lock = threading.RLock()
+        self._selected = set()
+        self._positions = {}
+        self._next_ticket = 1000
+        self.balance = float(balance)
+        self.currency = currency
+        self.leverage = leverage
+        self.login = login
+        self.initialized = False
+        self.last_error = (c.RES_S_OK, "Success")
+        self.deals = []
+        # api name -> [calls, total seconds]
+        self.latency = {}
+        # seconds each API call waits, like the terminal's IPC round trip
+        self.round_trip = round_trip
+
+    # -------------------------
+    # BARS AND PRICES
+    # -------------------------
+    def _rates(self, symbol, tf):
+        tfs = self._history.get(symbol)
+        if tfs is None or tf not in TF_SECONDS:
+            return None
+        rates = tfs.get(tf)
+        if rates is None:
+            base = self._base[symbol]
+            if TF_SECONDS[tf] < TF_SECONDS[base]:
+                return None
+            rates = tfs[tf] = resample(tfs[base], tf)
+        return rates
+
+    def _path(self, symbol, lo, hi):
+        """Path points (times, prices) of base bars lo..hi-1, in order."""
+        rates = self._history[symbol][self._base[symbol]]
+        bars = rates[lo:hi]
+        quarter = TF_SECONDS[self._base[symbol]] / 4
+        up = bars["close"] >= bars["open"]
+        first = np.where(up, bars["low"], bars["high"])
+        second = np.where(up, bars["high"], bars["low"])
+        prices = np.stack([bars["open"], first, second, bars["close"]], axis=1).ravel()
+        times = (bars["time"][:, None] + quarter * np.arange(4)).ravel()
+        return times, prices
+
+    def _bid(self, symbol, now):
+        rates = self._history[symbol][self._base[symbol]]
+        i = int(np.searchsorted(rates["time"], now, side="right")) - 1
+        if i < 0:
+            return None, None
+        times, prices = self._path(symbol, i, i + 1)
+        step = int(np.searchsorted(times, now, side="right")) - 1
+        return float(prices[step]), i
+
+    def _market_open(self, symbol, now):
+        rates = self._history[symbol][self._base[symbol]]
+        i = int(np.searchsorted(rates["time"], now, side="right")) - 1
+        return i >= 0 and now < rates["time"][i] + TF_SECONDS[self._base[symbol]]
+
+    def _spread(self, symbol):
+        spec = self._specs[symbol]
+        return spec["spread"] * 10.0 ** -spec["digits"]
+
+    # -------------------------
+    # POSITIONS
+    # -------------------------
+    def _profit(self, pos, price):
+        sign = 1 if pos.type == c.POSITION_TYPE_BUY else -1
+        amount = sign * (price - pos.price_open) * pos.volume * self._specs[pos.symbol]["contract_size"]
+        if pos.symbol[:3] == self.currency and pos.symbol[3:6] != self.currency:
+            amount /= price
+        return amount
+
+    def _close(self, pos, volume, price, reason):
+        volume = min(volume, pos.volume)
+        profit = self._profit(pos, price) * volume / pos.volume
+        self.balance += profit
+        pos.volume = round(pos.volume - volume, 8)
+        self.deals.append({
+            "position": pos.ticket, "symbol": pos.symbol, "time": self._now(),
+            "volume": volume, "price": price, "profit": profit, "reason": reason,
+        })
+        if pos.volume <= 1e-9:
+            self._positions.pop(pos.ticket, None)
+
+    def _settle(self):
+        """Fill SL/TP of open positions along the price path up to now."""
+        now = self._now()
+        for pos in list(self._positions.values()):
+            rates = self._history[pos.symbol][self._base[pos.symbol]]
+            lo = max(0, int(np.searchsorted(rates["time"], pos.checked, side="right")) - 1)
+            hi = int(np.searchsorted(rates["time"], now, side="right"))
+            if hi <= lo:
+                continue
+            times, bids = self._path(pos.symbol, lo, hi)
+            live = (times > pos.checked) & (times <= now)
+            times, bids = times[live], bids[live]
+            pos.checked = now
+            if not len(bids):
+                continue
+
+            if pos.type == c.POSITION_TYPE_BUY:
+                # a long closes on the bid
+                hit_sl = bids <= pos.sl if pos.sl else np.zeros(len(bids), bool)
+                hit_tp = bids >= pos.tp if pos.tp else np.zeros(len(bids), bool)
+            else:
+                asks = bids + self._spread(pos.symbol)
+                hit_sl = asks >= pos.sl if pos.sl else np.zeros(len(bids), bool)
+                hit_tp = asks <= pos.tp if pos.tp else np.zeros(len(bids), bool)
+            hit = hit_sl | hit_tp
+            if hit.any():
+                k = int(hit.argmax())
+                if hit_sl[k]:
+                    self._close(pos, pos.volume, pos.sl, "sl")
+                else:
+                    self._close(pos, pos.volume, pos.tp, "tp")
+
+    # -------------------------
+    # API
+    # -------------------------
+    def call(self, name, fn, *args, **kwargs):
+        started = time.perf_counter()
+        if self.round_trip:
+            time.sleep(self.round_trip)
+        with self._lock:
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                entry = self.latency.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += time.perf_counter() - started
+
+    def initialize(self, *args, **kwargs):
+        self.initialized = True
+        self.last_error = (c.RES_S_OK, "Success")
+        return True
+
+    def shutdown(self):
+        self.initialized = False
+        return True
+
+    def _require(self):
+        if not self.initialized:
+            self.last_error = (c.RES_E_INTERNAL_FAIL_INIT, "Terminal not initialized")
+            return False
+        return True
+
+    def terminal_info(self):
+        return TerminalInfo(self.initialized, True, "mt5_sim", "Simulated terminal", "mt5_sim")
+
+    def symbols_get(self):
+        return tuple(self.symbol_info(s) for s in sorted(self._history))
+
+    def symbol_select(self, symbol, enable=True):
+        if not self._require() or symbol not in self._history:
+            self.last_error = (c.RES_E_NOT_FOUND, f"Unknown symbol {symbol}")
+            return False
+        (self._selected.add if enable else self._selected.discard)(symbol)
+        return True
+
+    def symbol_info(self, symbol):
+        if not self._require() or symbol not in self._history:
+            return None
+        spec = self._specs[symbol]
+        point = 10.0 ** -spec["digits"]
+        tick = self.symbol_info_tick(symbol)
+        bid = tick.bid if tick else 0.0
+        ask = tick.ask if tick else 0.0
+        return SymbolInfo(
+            name=symbol, visible=symbol in self._selected, select=symbol in self._selected,
+            digits=spec["digits"], point=point, spread=spec["spread"],
+            trade_contract_size=spec["contract_size"], trade_tick_size=point,
+            trade_tick_value=point * spec["contract_size"], volume_min=spec["volume_min"],
+            volume_max=spec["volume_max"], volume_step=spec["volume_step"], bid=bid, ask=ask,
+            currency_base=symbol[:3], currency_profit=symbol[3:6], description=symbol,
+        )
+
+    def symbol_info_tick(self, symbol):
+        if not self._require() or symbol not in self._history:
+            return None
+        now = self._now()
+        bid, _ = self._bid(symbol, now)
+        if bid is None:
+            return None
+        ask = bid + self._spread(symbol)
+        return Tick(int(now), bid, ask, bid, 0, int(now * 1000), 0, 0.0)
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        if not self._require():
+            return None
+        tf = TF_BY_CONSTANT.get(timeframe, timeframe)
+        rates = self._rates(symbol, tf)
+        if rates is None:
+            self.last_error = (c.RES_E_NOT_FOUND, f"No history for {symbol} {tf}")
+            return None
+
+        now = self._now()
+        # position 0 is the bar holding `now` (or the last one before a gap)
+        last = int(np.searchsorted(rates["time"], now, side="right")) - 1
+        end = last - start_pos + 1
+        if end <= 0 or count <= 0:
+            return rates[:0].copy()
+        out = rates[max(0, end - count):end].copy()
+
+        if start_pos == 0 and now < rates["time"][last] + TF_SECONDS[tf]:
+            # the forming bar only knows the path so far
+            base = self._history[symbol][self._base[symbol]]
+            lo = int(np.searchsorted(base["time"], rates["time"][last], side="left"))
+            hi = int(np.searchsorted(base["time"], now, side="right"))
+            times, prices = self._path(symbol, lo, hi)
+            prices = prices[times <= now]
+            if len(prices):
+                out[-1]["high"] = prices.max()
+                out[-1]["low"] = prices.min()
+                out[-1]["close"] = prices[-1]
+        return out
+
+    def positions_get(self, symbol=None, ticket=None, group=None):
+        if not self._require():
+            return None
+        self._settle()
+        out = []
+        for pos in self._positions.values():
+            if symbol is not None and pos.symbol != symbol:
+                continue
+            if ticket is not None and pos.ticket != ticket:
+                continue
+            bid, _ = self._bid(pos.symbol, self._now())
+            price = bid if pos.type == c.POSITION_TYPE_BUY else bid + self._spread(pos.symbol)
+            out.append(TradePosition(
+                ticket=pos.ticket, time=int(pos.time), type=pos.type, magic=pos.magic,
+                identifier=pos.ticket, volume=pos.volume, price_open=pos.price_open,
+                sl=pos.sl, tp=pos.tp, price_current=price, profit=self._profit(pos, price),
+                symbol=pos.symbol, comment=pos.comment,
+            ))
+        return tuple(out)
+
+    def account_info(self):
+        if not self._require():
+            return None
+        floating = sum(p.profit for p in self.positions_get())
+        equity = self.balance + floating
+        return AccountInfo(
+            login=self.login, server="mt5_sim", currency=self.currency, balance=self.balance,
+            equity=equity, profit=floating, margin=0.0, margin_free=equity,
+            leverage=self.leverage, name="Simulated account",
+        )
+
+    def order_send(self, request):
+        if not self._require():
+            return None
+        self._settle()
+
+        def result(retcode, comment, order=0, deal=0, volume=0.0, price=0.0, bid=0.0, ask=0.0):
+            return OrderSendResult(retcode, deal, order, volume, price, bid, ask, comment, 0, request)
+
+        symbol = request.get("symbol")
+        action = request.get("action")
+        if symbol not in self._history:
+            return result(c.TRADE_RETCODE_INVALID, "Unknown symbol")
+
+        now = self._now()
+        if not self._market_open(symbol, now):
+            return result(c.TRADE_RETCODE_MARKET_CLOSED, "Market closed")
+        bid, _ = self._bid(symbol, now)
+        ask = bid + self._spread(symbol)
+
+        if action == c.TRADE_ACTION_SLTP:
+            pos = self._positions.get(request.get("position"))
+            if pos is None:
+                return result(c.TRADE_RETCODE_POSITION_CLOSED, "Position not found")
+            pos.sl = float(request.get("sl") or 0.0)
+            pos.tp = float(request.get("tp") or 0.0)
+            return result(c.TRADE_RETCODE_DONE, "Request executed", order=pos.ticket, bid=bid, ask=ask)
+
+        if action != c.TRADE_ACTION_DEAL:
+            return result(c.TRADE_RETCODE_INVALID, "Unsupported action")
+
+        spec = self._specs[symbol]
+        volume = float(request.get("volume") or 0.0)
+        if not spec["volume_min"] <= volume <= spec["volume_max"]:
+            return result(c.TRADE_RETCODE_INVALID_VOLUME, "Invalid volume")
+        is_buy = request.get("type") == c.ORDER_TYPE_BUY
+        price = ask if is_buy else bid
+        self._next_ticket += 1
+        ticket = self._next_ticket
+
+        if request.get("position"):
+            pos = self._positions.get(request["position"])
+            if pos is None:
+                return result(c.TRADE_RETCODE_POSITION_CLOSED, "Position not found")
+            volume = min(volume, pos.volume)
+            self._close(pos, volume, price, "deal")
+            return result(c.TRADE_RETCODE_DONE, "Request executed", ticket, ticket, volume, price, bid, ask)
+
+        sl = float(request.get("sl") or 0.0)
+        tp = float(request.get("tp") or 0.0)
+        if is_buy:
+            bad_stops = (sl and sl >= bid) or (tp and tp <= ask)
+        else:
+            bad_stops = (sl and sl <= ask) or (tp and tp >= bid)
+        if bad_stops:
+            return result(c.TRADE_RETCODE_INVALID_STOPS, "Invalid stops")
+
+        self._positions[ticket] = _Position(
+            ticket=ticket, symbol=symbol,
+            type=c.POSITION_TYPE_BUY if is_buy else c.POSITION_TYPE_SELL,
+            volume=volume, price_open=price, sl=sl, tp=tp, time=now,
+            magic=request.get("magic", 0), comment=request.get("comment", ""), checked=now,
+        )
+        return result(c.TRADE_RETCODE_DONE, "Request executed", ticket, ticket, volume, price, bid, ask)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "balance": self.balance,
+                "open_positions": len(self._positions),
+                "deals": len(self.deals),
+                "api": {
+                    name: {"calls": n, "avg_us": 1e6 * total / n if n else 0.0}
+                    for name, (n, total) in self.latency.items()
+                },
+            }
@@ -1,22 +1,25 @@
-import time
+from utils import clock
 
 TRADE_MEMORY = {}
 
-def can_trade(symbol, ob_id, cooldown=1800):
+# seconds before the same order block may be traded again
+TRADE_COOLDOWN = 1800
+
+def can_trade(symbol, ob_id, cooldown=TRADE_COOLDOWN):
     key = f"{symbol}_{ob_id}"
     last_trade = TRADE_MEMORY.get(key)
 
     if not last_trade:
         return True
 
-    if time.time() - last_trade < cooldown:
+    if clock.now() - last_trade < cooldown:
         return False
 
     return True
 
 
 def register_trade(symbol, ob_id):
-    TRADE_MEMORY[f"{symbol}_{ob_id}"] = time.time()
+    TRADE_MEMORY[f"{symbol}_{ob_id}"] = clock.now()
 
 
 def resize_lot(balance, risk_percent=1.0, stop_loss_pips=50, pip_value=1.0, min_lot=0.01, max_lot=100.0):
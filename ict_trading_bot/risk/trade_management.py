@@ -4,22 +4,29 @@ def manage_trade(trade, price):
         entry, sl, tp,
         lot,
         direction,
-        stage: 0
+        stage: 0,
+        risk: initial |entry - sl| (optional)
     }
     """
 
-    r = abs(trade["entry"] - trade["sl"])
+    # once SL sits at BE, |entry - sl| is 0, so keep the initial 1R
+    r = trade.setdefault("risk", abs(trade["entry"] - trade["sl"]))
+    # favourable move only: an adverse 1R must not trigger BE
+    if trade["direction"] == "buy":
+        gain = price - trade["entry"]
+    else:
+        gain = trade["entry"] - price
 
     # 🔹 1R → Move SL to BE
     if trade["stage"] == 0:
-        if abs(price - trade["entry"]) >= r:
+        if gain >= r:
             trade["sl"] = trade["entry"]
             trade["stage"] = 1
             return {"action": "move_sl", "sl": trade["sl"]}
 
     # 🔹 2R → Partial TP
     if trade["stage"] == 1:
-        if abs(price - trade["entry"]) >= 2 * r:
+        if gain >= 2 * r:
             trade["stage"] = 2
             return {"action": "partial_close", "percent": 0.5}
 
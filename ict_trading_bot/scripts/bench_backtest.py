@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: vectorized ICT backtest vs the live pipeline replayed per candle.
+Run: python scripts/bench_backtest.py [--years 5] [--legacy-max 5000]
+
+The per-candle replay (ICTState + check_entry per M15 close) is timed on
+--legacy-max bars and scaled linearly (marked "est.").
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backtest.vectorized import aggregate_bars, run_vector_backtest  # noqa: E402
+from ict_concepts.ict_state import ICTState  # noqa: E402
+from mt5_sim.history import M15_PER_YEAR, synthetic_m15  # noqa: E402
+from strategy.entry_model import check_entry  # noqa: E402
+from strategy.liquidity_filter import liquidity_taken  # noqa: E402
+
+
+def per_candle(h4, h1, m15):
+    states = {tf: ICTState() for tf in ("H4", "H1", "M15")}
+    fed = {"H4": 0, "H1": 0}
+    for t in range(len(m15)):
+        now = m15["time"][t] + 900
+        for tf, rates, period in (("H4", h4, 14400), ("H1", h1, 3600)):
+            while fed[tf] < len(rates) and rates["time"][fed[tf]] + period <= now:
+                states[tf].update(rates[fed[tf]])
+                fed[tf] += 1
+        states["M15"].update(m15[t])
+        price = float(m15["close"][t])
+        trend = states["H4"].trend()
+        if liquidity_taken(price, states["H1"].liquidity(), "buy" if trend == "bullish" else "sell"):
+            check_entry(trend, price, states["H1"].fib(), states["M15"].fvgs(), states["H1"].order_blocks())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--legacy-max", type=int, default=5000)
+    args = parser.parse_args()
+
+    m15 = synthetic_m15(int(args.years * M15_PER_YEAR))
+    h1, h4 = aggregate_bars(m15, "H1"), aggregate_bars(m15, "H4")
+
+    started = time.perf_counter()
+    result = run_vector_backtest(h4, h1, m15)
+    new_s = time.perf_counter() - started
+
+    legacy_n = min(len(m15), args.legacy_max)
+    m15_slice = m15[:legacy_n]
+    end = m15_slice["time"][-1] + 900
+    started = time.perf_counter()
+    per_candle(h4[h4["time"] < end], h1[h1["time"] < end], m15_slice)
+    old_s = (time.perf_counter() - started) * len(m15) / legacy_n
+    note = " est." if legacy_n < len(m15) else ""
+
+    print(f"M15 bars: {len(m15)}  trades: {len(result['trades'])}")
+    print(f"per-candle replay: {old_s:9.2f}s{note}")
+    print(f"vectorized:        {new_s:9.3f}s  ({old_s / new_s:,.0f}x)")
+    print("metrics:", result["metrics"])
+
+
+if __name__ == "__main__":
+    main()
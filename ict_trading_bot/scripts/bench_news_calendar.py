@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: indexed news calendar vs re-parsing the CSV on every check.
+Run: python scripts/bench_news_calendar.py [--years 10] [--per-day 8] [--queries 100000]
+
+Writes a synthetic --years calendar (--per-day events a weekday across
+the majors, mostly 30-120 minute windows, some whole days, some past
+midnight), then times the old per-call csv.DictReader + strptime scan,
+the indexed NewsCalendar's load, a cached lookup, a reload after the file
+changes, and checks every indexed answer against a linear scan.
+"""
+import argparse
+import csv
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fundamentals.news_manual import DAY, NewsCalendar  # noqa: E402
+
+CURRENCIES = ("USD", "EUR", "GBP", "JPY", "AUD", "NZD", "CAD", "CHF")
+
+
+def write_calendar(path, years, per_day, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = 0
+    first = date(2030 - years, 1, 1)
+    with open(path, "w", newline="") as f:
+        out = csv.writer(f)
+        out.writerow(["date", "currency", "reason", "start", "end"])
+        for d in range(365 * years):
+            day = first + timedelta(days=d)
+            if day.weekday() >= 5:
+                continue
+            for _ in range(per_day):
+                currency = CURRENCIES[rng.integers(len(CURRENCIES))]
+                kind = rng.random()
+                if kind < 0.05:
+                    start = end = ""
+                else:
+                    minute = int(rng.integers(0, 24 * 4)) * 15
+                    length = int(rng.integers(2, 9)) * 15
+                    start = f"{minute // 60:02d}:{minute % 60:02d}"
+                    stop = (minute + length) % (24 * 60)
+                    end = f"{stop // 60:02d}:{stop % 60:02d}"
+                out.writerow([day.isoformat(), currency, "event", start, end])
+                rows += 1
+    return rows, first
+
+
+def legacy_block(path, currency, today):
+    """fundamentals.news_manual.is_manual_news_block before the index."""
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            event_date = datetime.strptime(row["date"], "%Y-%m-%d").date()
+            if event_date == today and row["currency"] == currency:
+                return True
+    return False
+
+
+def linear_block(windows, currency, when):
+    t = when.hour * 3600 + when.minute * 60 + when.second
+    return any(day == when.date() and c == currency and start <= t < end
+               for day, c, start, end in windows)
+
+
+def per_call(fn, args, min_time=0.5):
+    calls, started = 0, time.perf_counter()
+    while True:
+        for a in args:
+            fn(*a)
+        calls += len(args)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--per-day", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "news_calendar.csv")
+        rows, first = write_calendar(path, args.years, args.per_day)
+        days = 365 * args.years
+        queries = [(CURRENCIES[rng.integers(len(CURRENCIES))],
+                    datetime.combine(first, datetime.min.time())
+                    + timedelta(seconds=int(rng.integers(0, days * DAY))))
+                   for _ in range(args.queries)]
+        print(f"calendar  {args.years} years  {rows:,} events  {os.path.getsize(path) / 2**20:.1f} MB")
+
+        legacy = per_call(legacy_block, [(path, c, w.date()) for c, w in queries[:5]], min_time=1.0)
+        print(f"legacy    {legacy * 1e3:9.2f} ms/check   (news_allows_trade: 2 checks a symbol)")
+
+        loads = []
+        for _ in range(5):
+            calendar = NewsCalendar(path)
+            started = time.perf_counter()
+            calendar.load()
+            loads.append(time.perf_counter() - started)
+        print(f"load      {statistics.median(loads) * 1e3:9.2f} ms  ({calendar.stats()['keys']:,} keys)")
+
+        indexed = per_call(calendar.blocked, queries)
+        print(f"indexed   {indexed * 1e6:9.2f} us/check   {legacy / indexed:,.0f}x")
+
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+        calendar.check_every = 0
+        started = time.perf_counter()
+        calendar.blocked("USD")
+        print(f"reload    {(time.perf_counter() - started) * 1e3:9.2f} ms  after the file changed "
+              f"(loads={calendar.stats()['loads']})")
+
+        windows = [(day, c, start, end) for (day, c), (_, _, entries) in calendar._index.items()
+                   for start, end, _ in entries]
+        sample = queries[:2000]
+        mismatches = sum(calendar.blocked(c, w) != linear_block(windows, c, w) for c, w in sample)
+        blocked = sum(calendar.blocked(c, w) for c, w in queries)
+        print(f"check     {len(sample)} queries vs linear scan: {mismatches} mismatches  "
+              f"({blocked / len(queries):.1%} of checks blocked)")
+
+
+if __name__ == "__main__":
+    main()
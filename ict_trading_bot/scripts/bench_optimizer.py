@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark: optimizer throughput and scaling with the worker count.
+Run: python scripts/bench_optimizer.py [--years 2] [--sets 32] [--workers 1,2,4,8]
+
+Runs the same --sets parameter grid over --years of synthetic M15 bars at
+each worker count and reports backtests/s and the speed-up and parallel
+efficiency against one worker.  Counts above the machine's cores are
+skipped.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backtest import optimizer  # noqa: E402
+from backtest.vectorized import aggregate_bars  # noqa: E402
+from mt5_sim.history import M15_PER_YEAR, synthetic_m15  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--sets", type=int, default=32)
+    parser.add_argument("--workers", default="1,2,4,8")
+    args = parser.parse_args()
+
+    m15 = synthetic_m15(int(args.years * M15_PER_YEAR))
+    bars = {"htf": aggregate_bars(m15, "H4"), "mtf": aggregate_bars(m15, "H1"), "ltf": m15}
+    param_sets = optimizer.random_search(
+        {"rr": (1.5, 4.0), "tolerance": (0.0001, 0.0008), "swing_lookback": [1, 2]},
+        args.sets,
+    )
+
+    cores = os.cpu_count() or 1
+    print(f"M15 bars: {len(m15)}  parameter sets: {len(param_sets)}  cores: {cores}")
+    print(f"{'workers':>8} {'wall s':>9} {'runs/s':>9} {'speed-up':>9} {'efficiency':>11}")
+    baseline = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        if workers > cores:
+            print(f"{workers:>8}   skipped (only {cores} cores)")
+            continue
+        started = time.perf_counter()
+        optimizer.optimize(bars, param_sets, workers=workers)
+        wall = time.perf_counter() - started
+        baseline = baseline or wall
+        speedup = baseline / wall
+        print(f"{workers:>8} {wall:>9.2f} {len(param_sets) / wall:>9.1f} "
+              f"{speedup:>8.2f}x {speedup / workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bridge outbox append latency and replay throughput.
+Run: python scripts/bench_outbox.py [--rows 20000] [--batch 100] [--insert-ms 20]
+
+Appends --rows signal-sized records (the hot-path cost), then replays them
+through a sink that takes --insert-ms per bulk insert, standing in for a
+Supabase round trip.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dashboard.outbox import Outbox  # noqa: E402
+from dashboard.write_behind import WriteBehindQueue  # noqa: E402
+
+
+def signal(i):
+    return {
+        "symbol": "EURUSD", "direction": "buy" if i % 2 else "sell",
+        "entry_price": 1.1 + i * 1e-5, "stop_loss": 1.09, "take_profit": 1.12,
+        "signal_quality": "A", "confidence": 0.71, "reason": {"htf_bias": "bullish"},
+        "status": "pending", "created_at": "2024-01-01T00:00:00",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--insert-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = Outbox(os.path.join(tmp, "outbox.db"), compact_every=10 * args.batch)
+
+        latencies = np.empty(args.rows)
+        for i in range(args.rows):
+            started = time.perf_counter()
+            outbox.append("bot_signals", signal(i))
+            latencies[i] = time.perf_counter() - started
+        us = latencies * 1e6
+        print(f"append  rows={args.rows}  p50={np.percentile(us, 50):.1f}us  "
+              f"p99={np.percentile(us, 99):.1f}us  max={us.max():.1f}us")
+
+        def sink(table, rows):
+            time.sleep(args.insert_ms / 1000)
+            return True
+
+        writer = WriteBehindQueue(sink, batch_size=args.batch, outbox=outbox)
+        started = time.perf_counter()
+        writer._replay(force=True)
+        elapsed = time.perf_counter() - started
+        stats = writer.stats()
+        print(f"replay  rows={stats['replayed_rows']}  batches={stats['flushes']}  "
+              f"{elapsed:.2f}s  {stats['replayed_rows'] / elapsed:,.0f} rows/s  "
+              f"compactions={stats['outbox']['compactions']}  pending={stats['outbox']['pending']}")
+
+
+if __name__ == "__main__":
+    main()
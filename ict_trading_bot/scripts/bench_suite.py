@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: detector and analysis wall time and peak memory vs a baseline.
+Run: python scripts/bench_suite.py [--sizes 200,10000,1000000] [--out bench_results.json]
+     python scripts/bench_suite.py --baseline [scripts/bench_baseline.json] [--threshold 0.25]
+     python scripts/bench_suite.py --save-baseline scripts/bench_baseline.json
+
+Fixtures are seeded synthetic M15 series, one per size, served through
+mt5_sim (MT5_BACKEND=sim), so the functions that read bars through
+get_rates run their real path against a stubbed terminal.  Bar caches and
+ICTState are reset before every call, so each timing is a cold run.
+
+Wall time is the best and median of repeated runs (at least --min-time
+seconds or --max-repeats runs); peak memory is the tracemalloc peak of one
+extra run.  With --baseline, a benchmark regresses when its best time is
+more than --threshold slower (and more than --floor-ms in absolute terms),
+or its peak memory more than --mem-threshold larger.  Exit status 1 on any
+regression.
+
+scripts/bench_baseline.json is the committed baseline; its "meta" block
+records the machine it was measured on, and a comparison on different
+hardware warns first.  Refresh it with --save-baseline (default sizes) on
+the reference machine, in the same commit as an intended speed change.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+SYMBOL = "EURUSD"
+BASELINE = os.path.join(ROOT, "scripts", "bench_baseline.json")
+
+
+def synthetic_rates(n, seed=17):
+    """
+    Deterministic M15 geometric random walk, MT5 rates layout.  One random
+    stream per column, so a smaller fixture is a prefix of a larger one.
+    """
+    from mt5_sim.history import as_rates
+
+    walk, wick_up, wick_down, volume = (np.random.default_rng([seed, k]) for k in range(4))
+    close = 1.1 * np.exp(np.cumsum(walk.normal(0, 0.0006, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    return as_rates({
+        # start on a D1 boundary so every higher-timeframe bucket is whole
+        "time": 1_600_000_000 // 86400 * 86400 + np.arange(n, dtype=np.int64) * 900,
+        "open": open_,
+        "close": close,
+        "high": np.maximum(open_, close) * (1 + wick_up.uniform(0, 0.0004, n)),
+        "low": np.minimum(open_, close) * (1 - wick_down.uniform(0, 0.0004, n)),
+        "tick_volume": volume.integers(50, 500, n),
+    })
+
+
+# -------------------------
+# BENCHMARKS
+# -------------------------
+def benchmarks():
+    """name -> (setup(n, rates) -> args, fn(*args)); imported after the sim is selected."""
+    import pandas as pd
+
+    from ict_concepts import ict_state
+    from ict_concepts.fvg import detect_fvg_from_df
+    from ict_concepts.liquidity import detect_liquidity_zones
+    from ict_concepts.market_structure import get_swings
+    from ict_concepts.order_blocks import detect_htf_order_blocks
+    from market_structure.swing_points import find_swings
+    from strategy.pre_trade_analysis import analyze_market_top_down
+
+    def frame(n, rates):
+        return (pd.DataFrame({k: rates[k] for k in ("time", "open", "high", "low", "close")}),)
+
+    def swings(n, rates):
+        reset()
+        return (get_swings(SYMBOL, "M15", n),)
+
+    def top_down(n, rates):
+        ict_state.STATES.clear()
+        return (SYMBOL, float(rates["close"][-1]))
+
+    return {
+        "detect_fvg_from_df": (frame, detect_fvg_from_df),
+        "find_swings": (frame, find_swings),
+        "get_swings": (lambda n, rates: (SYMBOL, "M15", n), get_swings),
+        "detect_htf_order_blocks": (lambda n, rates: (SYMBOL, "M15", n), detect_htf_order_blocks),
+        "detect_liquidity_zones": (swings, detect_liquidity_zones),
+        "analyze_market_top_down": (top_down, analyze_market_top_down),
+    }
+
+
+def reset():
+    from data.mt5_connector import BAR_CACHE
+    from ict_concepts import ict_state
+
+    BAR_CACHE.invalidate()
+    ict_state.STATES.clear()
+
+
+def measure(setup, fn, n, rates, min_time, max_repeats):
+    times = []
+    spent = 0.0
+    while len(times) < max_repeats and (len(times) < 3 or spent < min_time):
+        args = setup(n, rates)
+        reset()
+        started = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - started
+        times.append(elapsed)
+        spent += elapsed
+
+    args = setup(n, rates)
+    reset()
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "n": n,
+        "repeats": len(times),
+        "best_s": min(times),
+        "median_s": statistics.median(times),
+        "peak_mb": peak / 2**20,
+    }
+
+
+def run_suite(sizes, only=None, min_time=0.2, max_repeats=50):
+    os.environ["MT5_BACKEND"] = "sim"
+    import mt5_sim
+    from utils import clock
+
+    results = {}
+    suite = benchmarks()
+    for n in sizes:
+        # n closed bars plus the one forming at the terminal's "now"
+        history = synthetic_rates(n + 1)
+        rates = history[:n]
+        clock.install(clock.VirtualClock(float(history["time"][-1]) + 60))
+        mt5_sim.configure(history={SYMBOL: {"M15": history}})
+        mt5_sim.initialize()
+        mt5_sim.symbol_select(SYMBOL, True)
+        reset()
+        from data.mt5_connector import get_rates
+        if len(get_rates(SYMBOL, "M15", n)) != n:
+            raise RuntimeError("stubbed terminal did not serve the fixture")
+        for name, (setup, fn) in suite.items():
+            if only and name not in only:
+                continue
+            results[f"{name}[{n}]"] = measure(setup, fn, n, rates, min_time, max_repeats)
+            print(_line(f"{name}[{n}]", results[f"{name}[{n}]"]), flush=True)
+    clock.install(None)
+    return results
+
+
+# -------------------------
+# BASELINE
+# -------------------------
+def compare(results, baseline, threshold=0.25, mem_threshold=0.25, floor_ms=0.5):
+    """[(key, metric, baseline, current, ratio)] of regressions against `baseline`."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        b, c = base["best_s"], current["best_s"]
+        if c > b * (1 + threshold) and (c - b) * 1000 > floor_ms:
+            regressions.append((key, "best_s", b, c, c / b))
+        b, c = base["peak_mb"], current["peak_mb"]
+        if b and c > b * (1 + mem_threshold):
+            regressions.append((key, "peak_mb", b, c, c / b))
+    return regressions
+
+
+def _line(key, r):
+    return (f"{key:<36} {r['best_s'] * 1000:>11.3f} {r['median_s'] * 1000:>11.3f} "
+            f"{r['peak_mb']:>10.2f} {r['repeats']:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="200,10000,1000000")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--max-repeats", type=int, default=50)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", nargs="?", const=BASELINE,
+                        help="compare against this run (bare flag: scripts/bench_baseline.json)")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--mem-threshold", type=float, default=0.25)
+    parser.add_argument("--floor-ms", type=float, default=0.5,
+                        help="ignore slowdowns smaller than this in absolute terms")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<36} {'best ms':>11} {'median ms':>11} {'peak MB':>10} {'runs':>5}")
+    results = run_suite([int(s) for s in args.sizes.split(",")],
+                        args.only.split(",") if args.only else None,
+                        args.min_time, args.max_repeats)
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nresults -> {args.out}")
+
+    if not args.baseline:
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    meta = baseline.get("meta", {})
+    if any(meta.get(k) != report["meta"][k] for k in ("machine", "platform", "cpus")):
+        print(f"warning: baseline from {meta.get('platform')} ({meta.get('cpus')} cpus), "
+              f"not this machine; timings may not be comparable")
+    baseline = baseline["results"]
+    regressions = compare(results, baseline, args.threshold, args.mem_threshold, args.floor_ms)
+    missing = sorted(set(results) - set(baseline))
+    if missing:
+        print(f"not in baseline: {', '.join(missing)}")
+    if not regressions:
+        print(f"no regressions against {args.baseline}")
+        return
+    print(f"\nREGRESSIONS against {args.baseline}:")
+    for key, metric, base, current, ratio in regressions:
+        print(f"  {key:<36} {metric:<8} {base:>12.6g} -> {current:<12.6g} ({ratio:.2f}x)")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
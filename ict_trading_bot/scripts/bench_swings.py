@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: old per-bar swing finders vs the linear-time swing engine.
+Run: python scripts/bench_swings.py [--lookback 3] [--legacy-max 100000]
+
+The old loops are quadratic-ish in pandas overhead, so above --legacy-max
+bars they are timed on a --legacy-max slice and scaled linearly (marked
+"est.").
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from market_structure.swing_points import find_swings, fractal_swings  # noqa: E402
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def legacy_find_swings(df, lookback=3):
+    swings = []
+    for i in range(lookback, len(df) - lookback):
+        high = df['high'][i]
+        low = df['low'][i]
+        if high == max(df['high'][i-lookback:i+lookback]):
+            swings.append(("high", i, high))
+        if low == min(df['low'][i-lookback:i+lookback]):
+            swings.append(("low", i, low))
+    return swings
+
+
+def legacy_get_swings(rates):
+    swings = []
+    for i in range(2, len(rates) - 2):
+        high = rates[i]['high']
+        low = rates[i]['low']
+        if high > rates[i-1]['high'] and high > rates[i+1]['high']:
+            swings.append({"type": "high", "price": high, "index": i})
+        if low < rates[i-1]['low'] and low < rates[i+1]['low']:
+            swings.append({"type": "low", "price": low, "index": i})
+    return swings
+
+
+def synthetic_rates(n, seed=42):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0008, n))
+    rates = np.zeros(n, dtype=[("time", "i8"), ("high", "f8"), ("low", "f8")])
+    rates["time"] = np.arange(n) * 900
+    rates["high"] = close + rng.uniform(0, 0.0006, n)
+    rates["low"] = close - rng.uniform(0, 0.0006, n)
+    return rates
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lookback", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'bars':>10} {'function':<12} {'old (s)':>14} {'new (s)':>10} {'speed-up':>10}")
+    for n in SIZES:
+        rates = synthetic_rates(n)
+        df = pd.DataFrame(rates)
+
+        legacy_n = min(n, args.legacy_max)
+        scale = n / legacy_n
+        note = " est." if scale > 1 else ""
+
+        cases = [
+            ("find_swings",
+             lambda: legacy_find_swings(df.iloc[:legacy_n].reset_index(drop=True), args.lookback),
+             lambda: find_swings(df, args.lookback)),
+            ("get_swings",
+             lambda: legacy_get_swings(rates[:legacy_n]),
+             lambda: fractal_swings(rates['high'], rates['low'])),
+        ]
+        for name, old, new in cases:
+            old_s = timed(old) * scale
+            new_s = timed(new)
+            print(f"{n:>10} {name:<12} {old_s:>9.3f}{note:<5} {new_s:>10.4f} {old_s / new_s:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: NumPy tree evaluator vs XGBClassifier.predict_proba.
+Run: python scripts/bench_tree_eval.py [--trees 200] [--depth 5] [--rows 10000]
+
+Trains a model with ml.trainer's hyperparameters on synthetic 4-feature
+rows (the ml_quality_filter feature vector), exports it with
+ml.tree_export and times single-row and --rows-row scoring for both, plus
+the import cost each adds to a fresh interpreter.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from ml.tree_export import export_booster  # noqa: E402
+
+
+def synthetic_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(0.0005, 0.003, n),     # atr
+        rng.exponential(0.0008, n),        # fvg size
+        rng.exponential(0.002, n),         # ob size
+        rng.exponential(0.003, n),         # distance to fib 0.5
+    ])
+    edge = X[:, 1] / X[:, 0] - X[:, 3] / X[:, 2]
+    y = (edge + rng.normal(0, 1.0, n) > 0).astype(int)
+    return X, y
+
+
+def timed(fn, X, min_time=0.5):
+    times = []
+    while len(times) < 5 or sum(times) < min_time:
+        started = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - started)
+    return min(times), statistics.median(times)
+
+
+def import_cost(statement):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], check=True, cwd=ROOT)
+    return time.perf_counter() - started
+
+
+def main():
+    import xgboost as xgb
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    X, y = synthetic_rows(20_000)
+    model = xgb.XGBClassifier(n_estimators=args.trees, max_depth=args.depth,
+                              learning_rate=0.05, subsample=0.8).fit(X, y)
+    trees = export_booster(model)
+    test, _ = synthetic_rows(args.rows, seed=1)
+    error = np.abs(model.predict_proba(test) - trees.predict_proba(test)).max()
+    print(f"trees: {trees.n_trees}  nodes: {len(trees.feature)}  depth: {trees.max_depth}  "
+          f"max |p diff|: {error:.2e}")
+
+    print(f"{'rows':>7} {'scorer':<10} {'best ms':>10} {'median ms':>10} {'us/row':>8}")
+    for rows in (test[:1], test):
+        for name, fn in (("xgboost", model.predict_proba), ("numpy", trees.predict_proba)):
+            best, median = timed(fn, rows)
+            print(f"{len(rows):>7} {name:<10} {best * 1000:>10.3f} {median * 1000:>10.3f} "
+                  f"{best * 1e6 / len(rows):>8.2f}")
+
+    base = import_cost("import numpy")
+    print(f"\nimport cost over numpy: xgboost+sklearn "
+          f"{import_cost('import xgboost, sklearn') - base:.2f}s, "
+          f"ml.tree_export {import_cost('import ml.tree_export') - base:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
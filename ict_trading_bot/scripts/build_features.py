@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Build the labelled ML feature store from the local bar store.
+Run: python scripts/build_features.py [--bars data/bars] [--root data/features] [--export features.csv]
+
+Replays every stored symbol (or --symbols) through the vectorized entry
+pipeline, labels each candidate by its SL/TP outcome and appends the new
+rows to <root>/<SYMBOL>/<YYYY-MM>/.  Re-runs only replay bars since the
+last run's still-open candidates.  --export writes the ml.trainer CSV.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data.bar_store import BarStore  # noqa: E402
+from data.feature_store import FeatureStore, build_features, export_csv  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bars", default=os.getenv("BAR_STORE_PATH", "data/bars"))
+    parser.add_argument("--root", default="data/features")
+    parser.add_argument("--symbols", help="comma-separated (default: every stored symbol)")
+    parser.add_argument("--rr", type=float, default=3)
+    parser.add_argument("--export", metavar="CSV")
+    args = parser.parse_args()
+
+    bars = BarStore(args.bars)
+    store = FeatureStore(args.root)
+    symbols = args.symbols.split(",") if args.symbols else bars.symbols()
+    for symbol in symbols:
+        started = time.perf_counter()
+        try:
+            added = build_features(store, bars, symbol, rr=args.rr)
+        except ValueError as e:
+            print(f"{symbol}: skipped ({e})")
+            continue
+        state = store.state(symbol)
+        print(f"{symbol}: +{added} candidates ({state.get('rows', 0)} stored) "
+              f"in {time.perf_counter() - started:.2f}s")
+
+    if args.export:
+        rows = export_csv(store, args.export, symbols)
+        print(f"{rows} rows -> {args.export}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Export a trained XGBoost model to NumPy tree arrays for ml_quality_filter.
+Run: python scripts/export_model.py --model model.json --out model.npz
+
+The .npz is what ML_MODEL_PATH should point at in production: the model
+registry scores it with ml.tree_export.TreeEnsemble, without importing
+xgboost.  The export is checked against predict_proba on random rows
+before it is written.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ml.tree_export import export_booster  # noqa: E402
+
+
+def main():
+    import xgboost as xgb
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", required=True, help="xgboost model (.json / .ubj)")
+    parser.add_argument("--out", required=True, help="output .npz")
+    parser.add_argument("--tolerance", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    model = xgb.XGBClassifier()
+    model.load_model(args.model)
+    trees = export_booster(model)
+
+    rows = np.random.default_rng(0).normal(0, 0.003, (1000, trees.n_features))
+    error = np.abs(model.predict_proba(rows) - trees.predict_proba(rows)).max()
+    if error > args.tolerance:
+        sys.exit(f"export does not match predict_proba (max diff {error:.2e})")
+    trees.save(args.out)
+    print(f"{trees.n_trees} trees, {len(trees.feature)} nodes -> {args.out} (max diff {error:.2e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Ingest closed MT5 bars into the local bar store.
+Run: python scripts/ingest_bars.py [--root data/bars] [--symbols EURUSD,GBPUSD] [--every 60]
+
+The first run backfills up to --max-bars per symbol/timeframe (the
+terminal's "Max bars in chart" caps it); later runs append only the bars
+closed since.  --every keeps ingesting on that interval.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data.bar_store import BarStore, ingest  # noqa: E402
+from execution.mt5_connector import connect, ensure_symbol  # noqa: E402
+from utils import clock  # noqa: E402
+
+DEFAULT_SYMBOLS = "EURUSD,GBPUSD,USDJPY,AUDUSD,NZDUSD,USDCAD"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--root", default=os.getenv("BAR_STORE_PATH", "data/bars"))
+    parser.add_argument("--symbols", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--timeframes", default="M15,H1,H4")
+    parser.add_argument("--max-bars", type=int, default=100_000)
+    parser.add_argument("--every", type=float, help="seconds between passes (default: one pass)")
+    args = parser.parse_args()
+
+    connect()
+    store = BarStore(args.root)
+    symbols = args.symbols.split(",")
+    for symbol in symbols:
+        ensure_symbol(symbol)
+
+    while True:
+        started = time.perf_counter()
+        for symbol in symbols:
+            for tf in args.timeframes.split(","):
+                try:
+                    added = ingest(store, symbol, tf, max_bars=args.max_bars)
+                except Exception as e:
+                    print(f"{symbol} {tf}: ingest failed: {e}")
+                    continue
+                if added:
+                    print(f"{symbol} {tf}: +{added} bars ({store.count(symbol, tf)} stored)")
+        print(f"pass done in {time.perf_counter() - started:.2f}s")
+        if not args.every:
+            break
+        clock.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
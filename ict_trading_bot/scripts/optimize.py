@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Search strategy parameters over historical bars with the vectorized backtest.
+Run: python scripts/optimize.py --data DIR --symbol EURUSD --grid rr=2,3,4 --grid tolerance=0.0002,0.0003
+     python scripts/optimize.py --synthetic-years 3 --random 200 --range rr=1.5:4 --range swing_lookback=1:3
+     python scripts/optimize.py --store data/bars --symbol EURUSD --grid rr=2,3 --walk-forward 180,30
+
+--grid name=v1,v2 sweeps a list of values ("none" for None); --range
+name=low:high draws from a uniform range with --random N.  Parameters:
+rr, tolerance, cooldown (seconds, none = once per order block),
+swing_lookback, window, ob_window, risk_percent.  Writes the ranked table
+(or the per-fold walk-forward table) to --out.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backtest import optimizer  # noqa: E402
+
+
+def parse_value(text):
+    if text.lower() == "none":
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_space(items, separator):
+    space = {}
+    for item in items or []:
+        name, _, values = item.partition("=")
+        space[name] = [parse_value(v) for v in values.split(separator)]
+    return space
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+def load_bars(args):
+    if args.synthetic_years:
+        from backtest.vectorized import aggregate_bars
+        from mt5_sim.history import M15_PER_YEAR, synthetic_m15
+
+        m15 = synthetic_m15(int(args.synthetic_years * M15_PER_YEAR))
+        return {"htf": aggregate_bars(m15, "H4"), "mtf": aggregate_bars(m15, "H1"), "ltf": m15}
+
+    if args.store:
+        from data.bar_store import BarStore
+
+        return optimizer.bars_from_store(BarStore(args.store), args.symbol)
+
+    from mt5_sim.history import load_history, resample
+
+    frames = load_history(args.data)[args.symbol]
+    finest = min(frames, key=lambda tf: optimizer.TIMEFRAME_SECONDS[tf])
+    return {
+        key: frames[tf] if tf in frames else resample(frames[finest], tf)
+        for key, tf in optimizer.TIMEFRAMES.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", help="directory of <SYMBOL>_<TF>.npy/.csv bar files")
+    parser.add_argument("--store", help="data.bar_store root (<SYMBOL>/<TF>.npy)")
+    parser.add_argument("--symbol")
+    parser.add_argument("--synthetic-years", type=float)
+    parser.add_argument("--grid", action="append", metavar="NAME=V1,V2")
+    parser.add_argument("--range", action="append", metavar="NAME=LOW:HIGH")
+    parser.add_argument("--random", type=int, metavar="N", help="random draws instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--walk-forward", metavar="IS_DAYS,OOS_DAYS[,STEP_DAYS]")
+    parser.add_argument("--objective", default="expectancy", choices=optimizer.METRICS)
+    parser.add_argument("--min-trades", type=int, default=10)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", default="optimizer_results.csv")
+    args = parser.parse_args()
+    if not args.synthetic_years and not ((args.data or args.store) and args.symbol):
+        parser.error("--data or --store with --symbol, or --synthetic-years, is required")
+
+    space = parse_space(args.grid, ",")
+    if args.random:
+        space.update({name: tuple(values) for name, values in parse_space(args.range, ":").items()})
+        param_sets = optimizer.random_search(space, args.random, args.seed)
+    else:
+        param_sets = optimizer.grid(space)
+
+    bars = load_bars(args)
+    started = time.perf_counter()
+    if args.walk_forward:
+        windows = [float(v) for v in args.walk_forward.split(",")]
+        rows = optimizer.walk_forward(bars, param_sets, *windows, workers=args.workers,
+                                      objective=args.objective, min_trades=args.min_trades)
+        runs = len(rows) * (len(param_sets) + 1)
+    else:
+        rows = optimizer.optimize(
+            bars, param_sets,
+            start=parse_time(args.start) if args.start else None,
+            end=parse_time(args.end) if args.end else None,
+            workers=args.workers, objective=args.objective, min_trades=args.min_trades,
+        )
+        runs = len(rows)
+    wall = time.perf_counter() - started
+
+    table = optimizer.write_results(rows, args.out)
+    print(table.head(10).to_string(index=False))
+    print(f"\n{runs} backtests in {wall:.2f}s ({runs / wall:.1f}/s) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Replay the live main.py loop against on-disk bars on a virtual clock.
+Run: python scripts/replay.py --data DIR --start 2024-01-08 --end 2024-01-13
+     python scripts/replay.py --synthetic EURUSD,GBPUSD --days 5
+
+main.py runs unmodified on top of mt5_sim: every sleep advances the
+virtual clock instantly, so a trading week replays in seconds to minutes.
+--tick-interval coarsens the between-close tick passes (live: 1s), and
+--round-trip-ms makes every terminal call wait like a broker's IPC.
+Reports the replay speed-up, per-stage latency of the pipeline and of the
+simulated terminal, and the resulting account.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+# pipeline stages timed around their module-level functions; main.py
+# imports them by name, so they are wrapped before main is imported
+STAGES = [
+    ("analysis", "strategy.pre_trade_analysis", "analyze_market_top_down"),
+    ("liquidity", "strategy.liquidity_filter", "liquidity_taken"),
+    ("entry", "strategy.entry_model", "check_entry"),
+    ("sl_tp", "risk.sl_tp_engine", "calculate_sl_tp"),
+    ("order_send", "execution.trade_executor", "execute_trade"),
+]
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+def synthetic_history(data_dir, symbols, start, days, seed=7):
+    from mt5_sim import save_bars
+
+    n = int(days * 96) + 2000
+    first = int(start) // 900 * 900 - 2000 * 900
+    for k, symbol in enumerate(symbols):
+        rng = np.random.default_rng(seed + k)
+        base = 150.0 if "JPY" in symbol else 1.1
+        close = base * np.exp(np.cumsum(rng.normal(0, 0.0006, n)))
+        open_ = np.r_[close[0], close[:-1]]
+        rates = {
+            "time": first + np.arange(n) * 900,
+            "open": open_,
+            "close": close,
+            "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.0004, n)),
+            "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.0004, n)),
+            "tick_volume": rng.integers(50, 500, n),
+        }
+        save_bars(data_dir, symbol, "M15", rates)
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    def wrap(self, name, fn):
+        samples = self.samples.setdefault(name, [])
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - started)
+
+        return timed
+
+    def report(self):
+        print(f"{'stage':<14} {'calls':>9} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            ms = np.asarray(samples) * 1000
+            print(f"{name:<14} {len(ms):>9} {ms.mean():>9.3f} {np.percentile(ms, 50):>9.3f} "
+                  f"{np.percentile(ms, 99):>9.3f} {ms.max():>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", help="directory of <SYMBOL>_<TF>.npy/.csv bar files")
+    parser.add_argument("--synthetic", help="comma-separated symbols to generate instead of --data")
+    parser.add_argument("--start", default="2024-01-08")
+    parser.add_argument("--end")
+    parser.add_argument("--days", type=float, default=5)
+    parser.add_argument("--tick-interval", type=float, default=1.0)
+    parser.add_argument("--balance", type=float, default=10000.0)
+    parser.add_argument("--round-trip-ms", type=float, default=0.0,
+                        help="simulated terminal latency per call (wall time, not virtual)")
+    args = parser.parse_args()
+
+    start = parse_time(args.start)
+    end = parse_time(args.end) if args.end else start + args.days * 86400
+    data_dir = args.data
+    if args.synthetic:
+        data_dir = tempfile.mkdtemp(prefix="mt5_sim_")
+        synthetic_history(data_dir, args.synthetic.split(","), start, (end - start) / 86400 + 1)
+    if not data_dir:
+        parser.error("--data or --synthetic is required")
+
+    os.environ["MT5_BACKEND"] = "sim"
+    for name, value in (("MT5_LOGIN", "1000001"), ("MT5_PASSWORD", "sim"), ("MT5_SERVER", "mt5_sim")):
+        os.environ.setdefault(name, value)
+    os.environ.setdefault("BRIDGE_OUTBOX_PATH", os.path.join(tempfile.mkdtemp(), "outbox.db"))
+    os.chdir(ROOT)
+
+    import importlib
+
+    import mt5_sim
+    from utils import clock
+
+    virtual = clock.VirtualClock(start, end)
+    clock.install(virtual)
+    terminal = mt5_sim.configure(data_dir, balance=args.balance, round_trip=args.round_trip_ms / 1000)
+
+    timer = StageTimer()
+    for name, module_name, attr in STAGES:
+        module = importlib.import_module(module_name)
+        setattr(module, attr, timer.wrap(name, getattr(module, attr)))
+
+    from strategy.scanner import SCANNER
+    from utils.bar_scheduler import SCHEDULER
+
+    SCHEDULER.tick_interval = args.tick_interval
+    SCANNER.scan = _timed_scan(timer, SCANNER.scan)
+
+    started = time.perf_counter()
+    try:
+        importlib.import_module("main")
+    except clock.ReplayFinished:
+        pass
+    wall = time.perf_counter() - started
+
+    simulated = virtual.now() - start
+    print(f"\nreplayed {simulated / 86400:.2f} days in {wall:.2f}s wall "
+          f"-> {simulated / wall:,.0f}x real time")
+    timer.report()
+
+    stats = terminal.stats()
+    print(f"\n{'terminal call':<22} {'calls':>9} {'avg us':>9}")
+    for name, entry in sorted(stats["api"].items()):
+        print(f"{name:<22} {entry['calls']:>9} {entry['avg_us']:>9.1f}")
+    for universe, cycle in SCANNER.stats()["cycle_time"].items():
+        print(f"\nscanner: {SCANNER.workers} workers, {universe} symbols: {cycle['cycles']} cycles, "
+              f"avg {cycle['avg_ms']:.1f} ms, max {cycle['max_ms']:.1f} ms")
+    print(f"\nbalance {stats['balance']:.2f}  deals {stats['deals']}  "
+          f"open positions {stats['open_positions']}")
+
+
+def _timed_scan(timer, scan):
+    samples = timer.samples.setdefault("scan_cycle", [])
+
+    def timed(symbols, fn):
+        started = time.perf_counter()
+        try:
+            yield from scan(symbols, fn)
+        finally:
+            samples.append(time.perf_counter() - started)
+
+    return timed
+
+
+if __name__ == "__main__":
+    main()
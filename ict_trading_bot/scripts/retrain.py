@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Retrain the ML quality-filter model in the background and hot-swap it into the bot.
+Run: nohup python scripts/retrain.py --model models/model.npz [--bars data/bars] [--once] &
+
+A separate, reniced process with --threads xgboost/OpenMP threads.  Every
+--poll seconds it (with --bars) appends newly resolved candidates to the
+feature store, and retrains once --min-labels new labels arrived or
+--every seconds passed.  The candidate is checked against the current
+--model on the newest rows and only published (atomically, over --model)
+when it scores at least as well; point the bot's ML_MODEL_PATH at the
+same file and it reloads the model within a few seconds.
+"""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.resources import NICENESS, THREADS, limit_resources  # noqa: E402
+
+
+def cap_resources():
+    """
+    Apply --threads/--nice before anything imports numpy or xgboost:
+    their BLAS/OpenMP pools size themselves once, when they load.
+    """
+    early = argparse.ArgumentParser(add_help=False)
+    early.add_argument("--threads", type=int, default=THREADS)
+    early.add_argument("--nice", type=int, default=NICENESS)
+    args, _ = early.parse_known_args()
+    limit_resources(args.threads, args.nice)
+
+
+def main():
+    cap_resources()
+    from data.bar_store import BarStore
+    from data.feature_store import FeatureStore
+    from ml.retrainer import HOLDOUT, METRICS, MIN_NEW_LABELS, RETRAIN_EVERY, Retrainer
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default=os.getenv("ML_MODEL_PATH", "models/model.npz"))
+    parser.add_argument("--features", default="data/features")
+    parser.add_argument("--bars", help="bar store to refresh the features from (default: don't)")
+    parser.add_argument("--work-dir", default="models/retrain")
+    parser.add_argument("--min-labels", type=int, default=MIN_NEW_LABELS)
+    parser.add_argument("--every", type=float, default=RETRAIN_EVERY, help="seconds")
+    parser.add_argument("--poll", type=float, default=300.0, help="seconds")
+    parser.add_argument("--holdout", type=float, default=HOLDOUT)
+    parser.add_argument("--purge", type=int,
+                        help="seconds between train and holdout (default: longest trade, from exit_time)")
+    parser.add_argument("--metric", choices=sorted(METRICS), default="logloss")
+    parser.add_argument("--tolerance", type=float, default=0.0)
+    parser.add_argument("--rounds", type=int)
+    parser.add_argument("--threads", type=int, default=THREADS)
+    parser.add_argument("--nice", type=int, default=NICENESS)
+    parser.add_argument("--once", action="store_true", help="one check, then exit")
+    parser.add_argument("--force", action="store_true", help="retrain even if not due (with --once)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    retrainer = Retrainer(
+        FeatureStore(args.features), args.model, args.work_dir,
+        bar_store=BarStore(args.bars) if args.bars else None,
+        min_new_labels=args.min_labels, every=args.every, holdout=args.holdout,
+        purge=args.purge, metric=args.metric, tolerance=args.tolerance,
+        rounds=args.rounds, threads=args.threads,
+    )
+    if not args.once:
+        try:
+            retrainer.run_forever(args.poll)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    report = retrainer.run_once(force=args.force)
+    if report is None:
+        print("not due:", retrainer.due()[1])
+        return
+    for side in ("candidate", "current"):
+        scores = report.get(side)
+        if scores:
+            print(f"{side:>9}: {args.metric} {scores[args.metric]}  auc {scores['auc']}  "
+                  f"rows {scores['rows']}")
+    print(f"{report['decision']} ({report['trigger']}, purge {report['purge']}s) "
+          f"in {report['wall_s']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Train the ML quality-filter model with purged walk-forward validation.
+Run: python scripts/train_model.py --data features.csv --out models/ [--folds 5] [--purge SECONDS]
+
+Streams --data in --chunksize rows (add --external-memory to page the
+training matrix to disk as well), validates on --folds walk-forward folds
+in parallel worker processes and fits the final model on every row.
+Writes model.json, model.npz (point ML_MODEL_PATH here) and
+model.meta.json with the feature schema, fold metrics, wall time and
+peak RSS.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ml.trainer import CHUNKSIZE, ROUNDS, train_pipeline  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", required=True)
+    parser.add_argument("--out", default="models")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--purge", type=int,
+                        help="seconds dropped before each test block "
+                             "(default: the longest trade, max(exit_time - time); required without exit_time)")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument("--external-memory", action="store_true")
+    args = parser.parse_args()
+
+    _, meta = train_pipeline(args.data, args.out, n_folds=args.folds, purge=args.purge,
+                             rounds=args.rounds, workers=args.workers, chunksize=args.chunksize,
+                             external_memory=args.external_memory, cache_dir=args.out)
+
+    print(f"{'fold':>4} {'train':>9} {'test':>8} {'auc':>6} {'logloss':>8} {'pass':>6} "
+          f"{'prec':>6} {'wall s':>7} {'RSS MB':>7}")
+    for f in meta["folds"]:
+        auc = f"{f['test_auc']:.3f}" if f["test_auc"] is not None else "-"
+        prec = f"{f['test_precision']:.3f}" if f["test_precision"] is not None else "-"
+        print(f"{f['fold']:>4} {f['train_rows']:>9} {f['test_rows']:>8} {auc:>6} "
+              f"{f['test_logloss']:>8.4f} {f['test_pass_rate']:>6.3f} {prec:>6} "
+              f"{f['wall_s']:>7.1f} {f['peak_rss_mb'] or 0:>7.0f}")
+    print(f"\npurge {meta['purge']}s")
+    print(f"{meta['rows']} rows, {len(meta['features'])} features: {', '.join(meta['features'])}")
+    print("walk-forward:", {k: round(v, 4) if isinstance(v, float) else v for k, v in meta["metrics"].items()})
+    print(f"wall {meta['wall_s']:.1f}s  peak RSS {meta['peak_rss_mb'] or 0:.0f} MB")
+    print(f"saved -> {meta['paths']['trees']}")
+
+
+if __name__ == "__main__":
+    main()
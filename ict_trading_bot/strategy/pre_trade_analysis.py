@@ -1,50 +1,47 @@
-from ict_concepts.fib import calculate_fib_levels
-from ict_concepts.market_structure import get_market_trend
-from ict_concepts.fvg import detect_fvgs
-from ict_concepts.order_blocks import detect_htf_order_blocks
-from ict_concepts.liquidity import detect_liquidity_zones
-from ict_concepts.market_structure import get_swings
+from ict_concepts.ict_state import sync_state
 
 def analyze_market_top_down(
     symbol,
     price,
     htf="H4",
     mtf="H1",
-    ltf="M15"
+    ltf="M15",
+    previous=None,
+    refresh=None
 ):
+    """
+    previous: the last result for this symbol, reused for stages not in refresh
+    refresh: timeframes whose bar closed (None re-runs every stage)
+    """
     analysis = {}
+    if previous and refresh is not None:
+        analysis = {htf: previous["HTF"], mtf: previous["MTF"], ltf: previous["LTF"]}
 
     for tf in [htf, mtf, ltf]:
-        # Defensive calls: ensure each helper returns expected shape
-        try:
-            trend = get_market_trend(symbol, timeframe=tf)
-        except Exception:
-            trend = "neutral"
+        if tf in analysis and tf not in refresh:
+            continue
 
+        # incremental state: only the candles closed since the last pass are
+        # processed; everything below is read straight from it
         try:
-            fib = calculate_fib_levels(symbol, timeframe=tf) or {}
+            state = sync_state(symbol, tf)
         except Exception:
-            fib = {}
+            state = None
+        bar_time = state.last_time if state is not None else None
 
-        try:
-            fvgs = detect_fvgs(symbol, timeframe=tf) or []
-        except Exception:
+        # Defensive reads: ensure each value has the expected shape
+        if state is None:
+            trend = "neutral"
+            fib = {}
             fvgs = []
-
-        try:
-            obs = detect_htf_order_blocks(symbol, timeframe=tf) or []
-        except Exception:
             obs = []
-
-        try:
-            swings = get_swings(symbol, timeframe=tf) or []
-        except Exception:
-            swings = []
-
-        try:
-            liquidity = detect_liquidity_zones(swings) or {"EQL": [], "EQH": []}
-        except Exception:
             liquidity = {"EQL": [], "EQH": []}
+        else:
+            trend = state.trend()
+            fib = state.fib()
+            fvgs = state.fvgs()
+            obs = state.order_blocks()
+            liquidity = state.liquidity()
 
         # Ensure fib defaults for indexing
         discount = (fib.get("0.25", 0.0), fib.get("0.5", 0.0))
@@ -57,7 +54,9 @@ def analyze_market_top_down(
             "premium": premium,
             "fvgs": fvgs,
             "order_blocks": obs,
-            "liquidity": liquidity
+            "liquidity": liquidity,
+            # open time of the last closed candle the stage was built from
+            "bar_time": bar_time
         }
 
     # -------------------------
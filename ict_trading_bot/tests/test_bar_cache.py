@@ -0,0 +1,107 @@
+"""
+Tests for the shared MT5 bar cache
+One broker fetch per timeframe, then only the new candles!
+"""
+
+import numpy as np
+
+from data.mt5_connector import BarCache
+
+RATE_DTYPE = [
+    ("time", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"),
+    ("close", "f8"), ("tick_volume", "i8"), ("spread", "i4"), ("real_volume", "i8"),
+]
+M15 = 900
+
+
+class FakeTerminal:
+    """Serves closed M15 bars up to the current virtual time."""
+
+    def __init__(self, start=1_700_000_000 // M15 * M15, total=1000):
+        self.now = start + total * M15 + 10
+        self.start = start
+        self.calls = []
+
+    def fetch(self, symbol, timeframe, start_pos, count):
+        self.calls.append((symbol, timeframe, start_pos, count))
+        forming = (self.now - self.start) // M15
+        last = forming - start_pos
+        first = max(0, last - count + 1)
+        idx = np.arange(first, last + 1)
+        rates = np.zeros(len(idx), dtype=RATE_DTYPE)
+        rates["time"] = self.start + idx * M15
+        rates["high"] = 1.1 + idx * 1e-5
+        rates["low"] = 1.0 + idx * 1e-5
+        return rates
+
+
+def make_cache(terminal):
+    return BarCache(fetch=terminal.fetch, now=lambda symbol: terminal.now)
+
+
+def test_windows_share_one_fetch():
+    terminal = FakeTerminal()
+    cache = make_cache(terminal)
+
+    big = cache.get("EURUSD", "M15", 500)
+    small = cache.get("EURUSD", "M15", 200)
+
+    assert len(terminal.calls) == 1
+    assert len(big) == 500 and len(small) == 200
+    assert small["time"][-1] == big["time"][-1]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_only_new_closed_bars_are_fetched():
+    terminal = FakeTerminal()
+    cache = make_cache(terminal)
+    before = cache.get("EURUSD", "M15", 500)
+
+    terminal.now += 3 * M15
+    after = cache.get("EURUSD", "M15", 500)
+
+    _, _, start_pos, count = terminal.calls[-1]
+    assert start_pos == 1
+    assert count <= 4
+    assert after["time"][-1] == before["time"][-1] + 3 * M15
+    assert np.all(np.diff(after["time"]) == M15)
+    assert len(after) == 500
+
+
+def test_cached_rates_are_read_only():
+    terminal = FakeTerminal()
+    cache = make_cache(terminal)
+    rates = cache.get("EURUSD", "M15", 200)
+
+    try:
+        rates["high"][0] = 0.0
+    except ValueError:
+        pass
+    assert cache.get("EURUSD", "M15", 200)["high"][0] != 0.0
+
+
+def test_terminal_calls_are_serialized():
+    import threading
+    import time
+    from types import SimpleNamespace
+
+    from data.mt5_connector import _Serialized
+
+    active, peak = [0], [0]
+
+    def order_send(request):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        time.sleep(0.002)
+        active[0] -= 1
+        return request
+
+    terminal = _Serialized(SimpleNamespace(order_send=order_send, TRADE_ACTION_DEAL=1))
+    threads = [threading.Thread(target=lambda: [terminal.order_send(i) for i in range(10)])
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 1
+    assert terminal.TRADE_ACTION_DEAL == 1 and terminal.order_send(7) == 7
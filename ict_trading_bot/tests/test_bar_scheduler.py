@@ -0,0 +1,55 @@
+"""
+Tests for the bar-close scheduler
+Each timeframe is analysed once per candle, not once per loop!
+"""
+
+from utils.bar_scheduler import BarCloseScheduler
+
+H4, H1, M15 = 14400, 3600, 900
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self, symbol):
+        return self.now
+
+
+def run_due(scheduler, clock, symbol="EURUSD"):
+    due = scheduler.due(symbol)
+    for tf in due:
+        period = {"H4": H4, "H1": H1, "M15": M15}[tf]
+        # the last closed bar opened one period before the current one
+        bar_time = (clock.now // period - 1) * period
+        scheduler.mark_ran(symbol, tf, bar_time)
+    return due
+
+
+def test_only_closed_timeframes_rerun():
+    clock = Clock(1_700_006_400 + 60)   # one minute into an H4 bar
+    scheduler = BarCloseScheduler(now=clock, close_delay=0)
+
+    assert run_due(scheduler, clock) == ["H4", "H1", "M15"]
+    assert run_due(scheduler, clock) == []
+
+    clock.now += M15
+    assert run_due(scheduler, clock) == ["M15"]
+
+    clock.now += H1
+    assert run_due(scheduler, clock) == ["H1", "M15"]
+
+    stats = scheduler.stats()
+    assert stats["ran"] == {"H4": 1, "H1": 2, "M15": 3}
+    assert stats["skipped"] == {"H4": 3, "H1": 2, "M15": 1}
+    assert stats["tick_passes"] == 1 and stats["full_passes"] == 3
+
+
+def test_stale_bar_is_retried():
+    clock = Clock(1_700_006_400 + 60)
+    scheduler = BarCloseScheduler(timeframes=("M15",), now=clock, close_delay=0)
+    scheduler.due("EURUSD")
+
+    # analysis only saw the bar before the last closed one
+    scheduler.mark_ran("EURUSD", "M15", (clock.now // M15 - 2) * M15)
+    assert scheduler.due("EURUSD") == ["M15"]
@@ -0,0 +1,46 @@
+"""
+Tests for the benchmark suite
+Fixtures are deterministic and the baseline check flags real slowdowns!
+"""
+
+import json
+
+import numpy as np
+
+from scripts.bench_suite import BASELINE, benchmarks, compare, synthetic_rates
+
+
+def test_fixtures_are_deterministic():
+    a, b = synthetic_rates(10_000), synthetic_rates(10_000)
+    assert np.array_equal(a, b)
+    assert np.array_equal(synthetic_rates(200), a[:200])
+    assert (a["high"] >= np.maximum(a["open"], a["close"])).all()
+    assert (a["low"] <= np.minimum(a["open"], a["close"])).all()
+    assert (np.diff(a["time"]) == 900).all()
+
+
+def test_compare_thresholds():
+    baseline = {
+        "find_swings[10000]": {"best_s": 0.010, "peak_mb": 1.0},
+        "get_swings[200]": {"best_s": 0.0001, "peak_mb": 0.0},
+    }
+    results = {
+        # 40% slower and 2x the memory
+        "find_swings[10000]": {"best_s": 0.014, "peak_mb": 2.0},
+        # 3x slower but only 0.2 ms: below the floor
+        "get_swings[200]": {"best_s": 0.0003, "peak_mb": 0.01},
+        "new_benchmark[200]": {"best_s": 1.0, "peak_mb": 1.0},
+    }
+    regressions = compare(results, baseline, threshold=0.25, mem_threshold=0.5, floor_ms=0.5)
+    assert [(key, metric) for key, metric, *_ in regressions] == [
+        ("find_swings[10000]", "best_s"), ("find_swings[10000]", "peak_mb"),
+    ]
+    assert compare(results, baseline, threshold=0.5, mem_threshold=1.5) == []
+
+
+def test_committed_baseline_covers_the_default_suite():
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+    assert {"platform", "machine", "cpus", "python", "numpy"} <= set(baseline["meta"])
+    expected = {f"{name}[{n}]" for name in benchmarks() for n in (200, 10_000, 1_000_000)}
+    assert set(baseline["results"]) == expected
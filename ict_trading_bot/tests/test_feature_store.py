@@ -0,0 +1,85 @@
+"""
+Tests for the ML feature store
+Incremental builds match a one-shot build and labels match the trade walk!
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.vectorized import _first_exit, label_outcomes
+from data.bar_store import BarStore
+from data.feature_store import COLUMNS, FEATURES, FeatureStore, build_features, export_csv
+from ml.trainer import read_schema
+from mt5_sim.history import as_rates
+from tests.test_vectorized_backtest import m15_history
+
+
+@pytest.fixture
+def m15():
+    return as_rates(m15_history(96 * 150, seed=11))
+
+
+def test_label_outcomes_matches_first_exit(m15):
+    high, low, close = (m15[k].astype(float) for k in ("high", "low", "close"))
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.choice(len(high), 2000, replace=False))
+    side = rng.choice([1, -1], len(rows))
+    risk = rng.uniform(0.0005, 0.01, len(rows))
+    sl, tp = close[rows] - side * risk, close[rows] + side * 3 * risk
+
+    exit_bar, hit_sl = label_outcomes(high, low, rows, side, sl, tp, block=4096)
+    for k in range(len(rows)):
+        bar, stopped = _first_exit(high, low, rows[k] + 1, side[k], sl[k], tp[k])
+        assert exit_bar[k] == (-1 if bar is None else bar)
+        assert hit_sl[k] == stopped
+    assert (exit_bar < 0).any()
+
+
+def test_incremental_build_matches_one_shot(tmp_path, m15):
+    full_bars = BarStore(str(tmp_path / "bars"))
+    full_bars.append("EURUSD", "M15", m15)
+    once = FeatureStore(str(tmp_path / "once"))
+    assert build_features(once, full_bars, "EURUSD") > 0
+    assert build_features(once, full_bars, "EURUSD") == 0
+
+    growing = BarStore(str(tmp_path / "growing"))
+    steps = FeatureStore(str(tmp_path / "steps"))
+    for cut in (96 * 50, 96 * 51, 96 * 90, len(m15)):
+        growing.append("EURUSD", "M15", m15[:cut])
+        build_features(steps, growing, "EURUSD")
+
+    assert once.months("EURUSD") == steps.months("EURUSD")
+    for month in once.months("EURUSD"):
+        a, b = once.read("EURUSD", month), steps.read("EURUSD", month)
+        for column in COLUMNS:
+            assert np.array_equal(a[column], b[column]), (month, column)
+        assert (np.diff(a["time"]) > 0).all() and (a["exit_time"] > a["time"]).all()
+        assert all(m == month for m in pd.to_datetime(a["time"], unit="s").strftime("%Y-%m"))
+    # plain .npy columns
+    month = once.months("EURUSD")[0]
+    assert np.array_equal(np.load(once.path("EURUSD", month, "win")), once.read("EURUSD", month)["win"])
+
+
+def test_torn_append_and_export(tmp_path, m15):
+    bars = BarStore(str(tmp_path / "bars"))
+    bars.append("EURUSD", "M15", m15)
+    bars.append("GBPUSD", "M15", as_rates(m15_history(96 * 150, seed=12)))
+    store = FeatureStore(str(tmp_path / "features"))
+    for symbol in ("EURUSD", "GBPUSD"):
+        build_features(store, bars, symbol)
+    month = store.months("EURUSD")[-1]
+    before = store.read("EURUSD", month)["time"].copy()
+
+    # rows written to one column but no header update: invisible
+    with open(store.path("EURUSD", month, "win"), "ab") as f:
+        f.write(b"\x01" * 5)
+    assert np.array_equal(store.read("EURUSD", month)["time"], before)
+
+    path = str(tmp_path / "features.csv")
+    assert export_csv(store, path) == store.count()
+    df = pd.read_csv(path)
+    assert read_schema(path) == list(FEATURES)
+    assert list(df.columns[:3]) == ["time", "symbol", "exit_time"] and (df["exit_time"] > df["time"]).all()
+    assert set(df["symbol"]) == {"EURUSD", "GBPUSD"} and df["win"].isin([0, 1]).all()
+    assert df.groupby(df["time"].map(lambda t: t // (86400 * 31))).size().sum() == len(df)
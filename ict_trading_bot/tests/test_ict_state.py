@@ -0,0 +1,88 @@
+"""
+Tests for the incremental ICT state
+Replaying a history candle by candle must match the batch detectors!
+"""
+
+import numpy as np
+import pytest
+
+import ict_concepts.fib as fib_mod
+import ict_concepts.fvg as fvg_mod
+import ict_concepts.market_structure as ms_mod
+import ict_concepts.order_blocks as ob_mod
+from ict_concepts.ict_state import ICTState
+from ict_concepts.liquidity import detect_liquidity_zones
+from market_structure.structure import detect_structure as detect_bos
+
+CHECKPOINTS = [3, 4, 5, 6, 150, 200, 201, 202, 499, 500, 501, 777, 1200]
+
+
+def random_rates(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0008, n))
+    open_ = np.roll(close, 1)
+    rates = np.zeros(n, dtype=[("time", "i8"), ("open", "f8"), ("high", "f8"),
+                               ("low", "f8"), ("close", "f8")])
+    rates["time"] = np.arange(n) * 900
+    rates["open"] = open_
+    rates["close"] = close
+    rates["high"] = np.round(np.maximum(open_, close) + rng.uniform(0, 0.0004, n), 4)
+    rates["low"] = np.round(np.minimum(open_, close) - rng.uniform(0, 0.0004, n), 4)
+    return rates
+
+
+@pytest.fixture
+def history(monkeypatch):
+    rates = random_rates(1200, 3)
+    seen = {"n": 0}
+
+    def fake_get_rates(symbol, timeframe, bars=200):
+        return rates[:seen["n"]][-bars:]
+
+    for mod in (fib_mod, fvg_mod, ms_mod, ob_mod):
+        monkeypatch.setattr(mod, "get_rates", fake_get_rates)
+    return rates, seen
+
+
+def test_replay_matches_batch_detectors(history):
+    rates, seen = history
+    state = ICTState()
+
+    for n in range(1, len(rates) + 1):
+        state.update(rates[n - 1])
+        if n not in CHECKPOINTS:
+            continue
+        seen["n"] = n
+
+        swings = ms_mod.get_swings("EURUSD", "M15")
+        assert state.swings() == swings
+        assert state.trend() == ms_mod.get_market_trend("EURUSD", "M15")
+        assert state.fvgs() == fvg_mod.detect_fvgs("EURUSD", "M15")
+        assert state.order_blocks() == ob_mod.detect_htf_order_blocks("EURUSD", "M15")
+        assert state.liquidity() == detect_liquidity_zones(swings)
+        assert state.fib() == fib_mod.calculate_fib_levels("EURUSD", "M15")
+
+
+def test_bos_events_follow_structure_detector():
+    rates = random_rates(400, 5)
+    state = ICTState(window=1000, ob_window=1000).replay(rates)
+
+    all_swings = [(s["type"], s["index"], s["price"]) for s in state.swings()]
+    assert state.bos()
+    assert state.bos() == detect_bos(all_swings)
+
+
+def test_zones_are_marked_mitigated():
+    rates = random_rates(600, 9)
+    state = ICTState().replay(rates)
+
+    open_fvgs = state.fvgs(include_mitigated=False)
+    assert len(open_fvgs) < len(state.fvgs())
+
+    for fvg in state.fvgs():
+        later = rates[len(rates) - 200 + fvg["index"] + 1:]
+        if fvg["type"] == "bullish":
+            traded_into = (later["low"] <= fvg["high"]).any()
+        else:
+            traded_into = (later["high"] >= fvg["low"]).any()
+        assert (fvg in open_fvgs) == (not traded_into)
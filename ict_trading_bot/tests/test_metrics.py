@@ -0,0 +1,103 @@
+"""
+Tests for backtest metrics
+The live accumulator must agree with the batch metrics!
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from backtest.metrics import MetricsAccumulator, by_symbol, calculate_metrics, drawdown
+
+
+def random_trades(n, seed=3):
+    rng = np.random.default_rng(seed)
+    trades = []
+    t = 1_700_000_000
+    for i in range(n):
+        r = float(rng.choice([-1.0, 2.0, 3.0, -1.0, -0.5]))
+        held = int(rng.integers(1, 40)) * 900
+        trades.append({"symbol": ["EURUSD", "GBPUSD", "USDJPY"][i % 3], "r": r, "result": r * 100,
+                       "time": t, "exit_time": t + held})
+        t += held + int(rng.integers(0, 20)) * 900
+    return trades
+
+
+def test_drawdown_matches_loop():
+    rng = np.random.default_rng(0)
+    curve = 10000 + np.cumsum(rng.normal(0, 50, 2000))
+
+    peak, worst, worst_pct, longest, since = curve[0], 0.0, 0.0, 0, 0
+    for i, x in enumerate(curve):
+        if x >= peak:
+            peak, since = x, i
+        worst = min(worst, x - peak)
+        worst_pct = min(worst_pct, (x - peak) / peak * 100)
+        longest = max(longest, i - since)
+
+    dd = drawdown(curve, times=np.arange(len(curve)) * 900)
+    assert dd["max_drawdown"] == pytest.approx(worst)
+    assert dd["max_drawdown_pct"] == pytest.approx(worst_pct)
+    assert dd["max_drawdown_duration"] == longest
+    assert dd["max_drawdown_seconds"] == longest * 900
+
+
+def test_profit_factor_without_losses():
+    wins = [{"result": 50.0}, {"result": 20.0}]
+    assert calculate_metrics(wins, [10000, 10050, 10070])["profit_factor"] == math.inf
+    assert calculate_metrics([], [10000])["profit_factor"] == 0.0
+    assert calculate_metrics([{"result": -10.0}], [10000, 9990])["profit_factor"] == 0.0
+
+
+def test_return_metrics():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0.001, 0.01, 500)
+    curve = 10000 * np.cumprod(1 + returns)
+    times = 1_700_000_000 + np.arange(500) * 86400
+
+    metrics = calculate_metrics([], curve, times, initial_equity=10000)
+    ppy = 499 / (499 * 86400 / (365.25 * 86400))
+    assert metrics["sharpe"] == pytest.approx(returns.mean() / returns.std(ddof=1) * math.sqrt(ppy))
+    downside = math.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+    assert metrics["sortino"] == pytest.approx(returns.mean() / downside * math.sqrt(ppy))
+    assert metrics["cagr"] == pytest.approx((curve[-1] / 10000) ** (ppy / 500) - 1)
+
+
+def test_per_symbol_breakdown():
+    trades = random_trades(300)
+    metrics = calculate_metrics(trades, 10000 + np.cumsum([t["result"] for t in trades]))
+    breakdown = metrics["by_symbol"]
+    assert set(breakdown) == {"EURUSD", "GBPUSD", "USDJPY"}
+    assert sum(s["trades"] for s in breakdown.values()) == 300
+    assert sum(s["net_profit"] for s in breakdown.values()) == pytest.approx(metrics["net_profit"])
+
+    eur = [t for t in trades if t["symbol"] == "EURUSD"]
+    assert breakdown["EURUSD"]["expectancy_r"] == pytest.approx(np.mean([t["r"] for t in eur]))
+    assert breakdown == by_symbol(trades)
+
+
+def test_accumulator_matches_batch():
+    trades = random_trades(300)
+    acc = MetricsAccumulator(initial_equity=10000)
+    for trade in trades:
+        acc.update(trade)
+    live = acc.snapshot()
+
+    curve = 10000 + np.cumsum([t["result"] for t in trades])
+    batch = calculate_metrics(trades, curve, initial_equity=10000)
+    for key in ("trades", "win_rate", "profit_factor", "expectancy", "expectancy_r", "net_profit",
+                "max_drawdown", "max_drawdown_pct"):
+        assert live[key] == pytest.approx(batch[key]), key
+    for symbol, expected in batch["by_symbol"].items():
+        assert live["by_symbol"][symbol] == pytest.approx(expected), symbol
+    assert live["equity"] == pytest.approx(curve[-1])
+    assert 0 < live["exposure"] <= 1
+
+    # per-trade returns: the same Sharpe as the batch form over the trade
+    # curve, annualized by trades per year
+    levels = np.r_[10000, curve]
+    returns = np.diff(levels) / levels[:-1]
+    span = (trades[-1]["exit_time"] - trades[0]["time"]) / (365.25 * 86400)
+    expected = returns.mean() / returns.std(ddof=1) * math.sqrt(len(trades) / span)
+    assert live["sharpe"] == pytest.approx(expected)
@@ -0,0 +1,120 @@
+"""
+Tests for the ML model registry
+Loaded once, hot-swapped on file change and scored in batches!
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from ml.ml_filter import ml_quality_filter, ml_quality_filter_batch
+from ml.model_registry import ModelRegistry
+
+
+def train(seed, n_estimators=10):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(400, 4))
+    y = (X[:, 1] + rng.normal(scale=0.5, size=400) > 0).astype(int)
+    return xgb.XGBClassifier(n_estimators=n_estimators, max_depth=3).fit(X, y)
+
+
+def publish(model, path):
+    model.save_model(path + ".tmp.json")
+    os.replace(path + ".tmp.json", path)
+
+
+def bump_mtime(path, seconds):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + int(seconds * 1e9)))
+
+
+def test_load_once_and_batch_scoring(tmp_path):
+    path = str(tmp_path / "model.json")
+    first = train(0)
+    publish(first, path)
+
+    registry = ModelRegistry(path, check_every=3600)
+    model = registry.load()
+    assert registry.get() is model and registry.load() is model
+    assert registry.stats()["loads"] == 1
+
+    rows = np.random.default_rng(1).normal(size=(7, 4)).tolist()
+    verdicts = ml_quality_filter_batch(rows, registry, threshold=0.5)
+    expected = first.predict_proba(np.array(rows))[:, 1]
+    assert [p for _, p in verdicts] == pytest.approx(expected.tolist(), abs=1e-6)
+    assert [ok for ok, _ in verdicts] == [bool(p >= 0.5) for p in expected]
+    assert ml_quality_filter(rows[0], registry, 0.5) == verdicts[0]
+
+    stats = registry.stats()
+    assert stats["batches"] == 2 and stats["rows"] == 8 and stats["max_ms"] > 0
+    assert ml_quality_filter_batch(rows, None) == [(True, 1.0)] * 7
+
+
+def test_hot_reload_and_bad_file(tmp_path):
+    path = str(tmp_path / "model.json")
+    publish(train(0), path)
+    registry = ModelRegistry(path)
+    old = registry.load()
+
+    second = train(5, n_estimators=20)
+    publish(second, path)
+    bump_mtime(path, 1)
+    assert registry.get() is old  # get() never reloads
+    new = registry.load()
+    assert new is not old and registry.stats()["loads"] == 2
+    rows = np.random.default_rng(2).normal(size=(3, 4))
+    assert registry.predict_proba(rows) == pytest.approx(second.predict_proba(rows), abs=1e-6)
+
+    # a broken publish keeps the last good model
+    with open(path, "w") as f:
+        f.write("{not a model")
+    bump_mtime(path, 2)
+    assert registry.load() is new and registry.get() is new
+    stats = registry.stats()
+    assert stats["reload_errors"] == 1 and stats["last_error"]
+
+    assert ModelRegistry(None).get() is None
+    assert ModelRegistry(str(tmp_path / "missing.json")).get() is None
+
+
+def test_watcher_swaps_without_blocking_get(tmp_path):
+    path = str(tmp_path / "model.json")
+    publish(train(0), path)
+    loading, release = threading.Event(), threading.Event()
+    loads = []
+
+    def slow_loader(p):
+        loads.append(threading.current_thread().name)
+        if len(loads) > 1:
+            loading.set()
+            release.wait(5)
+        model = xgb.XGBClassifier()
+        model.load_model(p)
+        return model
+
+    registry = ModelRegistry(path, check_every=0.01, loader=slow_loader)
+    old = registry.load()
+    registry.start()
+    try:
+        publish(train(5), path)
+        bump_mtime(path, 1)
+        assert loading.wait(5)
+        # mid-load: the scan still gets the old model at once
+        started = time.perf_counter()
+        assert registry.get() is old
+        assert registry.predict_proba(np.zeros((1, 4))).shape == (1, 2)
+        assert registry.stats()["watching"]
+        assert time.perf_counter() - started < 0.1
+        release.set()
+        deadline = time.time() + 5
+        while registry.get() is old and time.time() < deadline:
+            time.sleep(0.01)
+        assert registry.get() is not old and loads[1] == "model-watcher"
+    finally:
+        release.set()
+        registry.stop(timeout=5)
+    assert not registry.stats()["watching"]
@@ -0,0 +1,149 @@
+"""
+Tests for the offline MetaTrader5 stand-in
+Bars from disk, a clock we control, and orders that fill along the path!
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+import mt5_sim
+from data.mt5_connector import BarCache
+from mt5_sim.terminal import SimTerminal
+
+START = 1_704_672_000  # Monday 2024-01-08 00:00 UTC
+M15 = 900
+
+
+class Clock:
+    def __init__(self, t):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def flat_bars(n=400):
+    # every bar: open 1.1000, low 1.0990, high 1.1010, close 1.1005 (up candle)
+    return {
+        "time": START + np.arange(n) * M15,
+        "open": np.full(n, 1.1000),
+        "high": np.full(n, 1.1010),
+        "low": np.full(n, 1.0990),
+        "close": np.full(n, 1.1005),
+        "tick_volume": np.full(n, 100),
+    }
+
+
+@pytest.fixture
+def sim(tmp_path):
+    mt5_sim.save_bars(str(tmp_path), "EURUSD", "M15", flat_bars())
+    clock = Clock(START + 300 * M15)
+    terminal = mt5_sim.configure(str(tmp_path), now=clock)
+    assert mt5_sim.initialize()
+    return terminal, clock
+
+
+def test_rates_and_ticks_follow_the_clock(sim):
+    terminal, clock = sim
+
+    closed = mt5_sim.copy_rates_from_pos("EURUSD", mt5_sim.TIMEFRAME_M15, 1, 10)
+    assert len(closed) == 10
+    assert closed["time"][-1] == START + 299 * M15
+
+    h1 = mt5_sim.copy_rates_from_pos("EURUSD", mt5_sim.TIMEFRAME_H1, 1, 5)
+    assert h1["time"][-1] == START + 74 * 3600
+    assert h1["tick_volume"][-1] == 400
+
+    # open -> low -> high -> close, one leg per quarter of the bar
+    bids = []
+    for offset in (0, 300, 500, 800):
+        clock.t = START + 300 * M15 + offset
+        bids.append(mt5_sim.symbol_info_tick("EURUSD").bid)
+    assert bids == [1.1000, 1.0990, 1.1010, 1.1005]
+
+    forming = mt5_sim.copy_rates_from_pos("EURUSD", mt5_sim.TIMEFRAME_M15, 0, 1)
+    assert forming["high"][0] == 1.1010 and forming["close"][0] == 1.1005
+
+    # past the last bar on disk the market is closed
+    clock.t = START + 400 * M15 + 60
+    result = mt5_sim.order_send({"action": mt5_sim.TRADE_ACTION_DEAL, "symbol": "EURUSD",
+                                 "volume": 0.1, "type": mt5_sim.ORDER_TYPE_BUY})
+    assert result.retcode == mt5_sim.TRADE_RETCODE_MARKET_CLOSED
+
+
+def test_position_fills_take_profit_on_the_path(sim):
+    terminal, clock = sim
+    request = {"action": mt5_sim.TRADE_ACTION_DEAL, "symbol": "EURUSD", "volume": 1.0,
+               "type": mt5_sim.ORDER_TYPE_BUY, "sl": 1.0950, "tp": 1.1008}
+    result = mt5_sim.order_send(request)
+    assert result.retcode == mt5_sim.TRADE_RETCODE_DONE
+    assert result.price == pytest.approx(1.1001)  # ask = open + 10 points
+    assert [p.ticket for p in mt5_sim.positions_get()] == [result.order]
+
+    # the low leg stays above SL, the high leg reaches TP
+    clock.t += 500
+    assert mt5_sim.positions_get() == ()
+    assert mt5_sim.account_info().balance == pytest.approx(10000 + (1.1008 - 1.1001) * 100_000)
+
+
+def test_modify_and_partial_close(sim):
+    terminal, clock = sim
+    result = mt5_sim.order_send({"action": mt5_sim.TRADE_ACTION_DEAL, "symbol": "EURUSD",
+                                 "volume": 0.4, "type": mt5_sim.ORDER_TYPE_SELL,
+                                 "sl": 1.1100, "tp": 1.0900})
+    ticket = result.order
+
+    moved = mt5_sim.order_send({"action": mt5_sim.TRADE_ACTION_SLTP, "position": ticket,
+                                "symbol": "EURUSD", "sl": 1.1050, "tp": 1.0900})
+    assert moved.retcode == mt5_sim.TRADE_RETCODE_DONE
+    assert mt5_sim.positions_get(ticket=ticket)[0].sl == 1.1050
+
+    closed = mt5_sim.order_send({"action": mt5_sim.TRADE_ACTION_DEAL, "position": ticket,
+                                 "symbol": "EURUSD", "volume": 0.1,
+                                 "type": mt5_sim.ORDER_TYPE_BUY})
+    assert closed.retcode == mt5_sim.TRADE_RETCODE_DONE
+    assert mt5_sim.positions_get(ticket=ticket)[0].volume == pytest.approx(0.3)
+
+    bad = mt5_sim.order_send({"action": mt5_sim.TRADE_ACTION_DEAL, "symbol": "EURUSD",
+                              "volume": 0.1, "type": mt5_sim.ORDER_TYPE_BUY, "sl": 1.2})
+    assert bad.retcode == mt5_sim.TRADE_RETCODE_INVALID_STOPS
+
+
+def test_bar_cache_runs_on_the_simulator():
+    clock = Clock(START + 300 * M15 + 10)
+    terminal = SimTerminal({"EURUSD": {"M15": mt5_sim.history.as_rates(flat_bars())}}, now=clock)
+    terminal.initialize()
+    cache = BarCache(fetch=lambda s, tf, pos, n: terminal.copy_rates_from_pos(s, tf, pos, n),
+                     now=lambda symbol: clock())
+
+    assert cache.get("EURUSD", "M15", 200)["time"][-1] == START + 299 * M15
+    clock.t += 2 * M15
+    assert cache.get("EURUSD", "M15", 200)["time"][-1] == START + 301 * M15
+    assert cache.get("EURUSD", "H4", 10)["time"][-1] == START + 17 * 14400
+
+
+def test_round_trip_latency():
+    terminal = SimTerminal({"EURUSD": {"M15": mt5_sim.history.as_rates(flat_bars())}},
+                           now=Clock(START + 300 * M15), round_trip=0.02)
+    started = time.perf_counter()
+    terminal.call("symbol_select", terminal.symbol_select, "EURUSD")
+    terminal.call("symbol_info_tick", terminal.symbol_info_tick, "EURUSD")
+    assert time.perf_counter() - started >= 0.04
+
+
+def test_env_credentials_only_for_the_simulator(monkeypatch):
+    from utils.mt5_credentials import fetch_mt5_credentials
+
+    for name, value in (("MT5_LOGIN", "1000001"), ("MT5_PASSWORD", "sim"), ("MT5_SERVER", "mt5_sim")):
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_KEY", raising=False)
+
+    monkeypatch.setenv("MT5_BACKEND", "sim")
+    assert fetch_mt5_credentials() == {"login": "1000001", "password": "sim", "server": "mt5_sim"}
+    # a real terminal never logs in with environment credentials
+    monkeypatch.delenv("MT5_BACKEND")
+    with pytest.raises(RuntimeError, match="SUPABASE_URL"):
+        fetch_mt5_credentials()
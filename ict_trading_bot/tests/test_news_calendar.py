@@ -0,0 +1,96 @@
+"""
+Tests for the manual news calendar
+Whole days, time windows and file edits block the right currencies!
+"""
+
+import os
+from datetime import date, datetime, timedelta, timezone
+
+from fundamentals import news_filter, news_manual
+from fundamentals.news_manual import NewsCalendar
+
+CSV = """date,currency,reason,start,end
+2026-02-01,USD,FOMC Press Conference,,
+2026-02-03,EUR,ECB Speech,12:00,13:00
+2026-02-03,EUR,ECB Press Conference,12:45,14:30
+2026-02-03,EUR,Late Speech,16:00,16:30
+2026-02-04,JPY,BoJ,23:30,01:00
+not-a-date,GBP,broken,,
+"""
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_whole_days_and_windows(tmp_path):
+    path = str(tmp_path / "calendar.csv")
+    write(path, CSV)
+    calendar = NewsCalendar(path)
+
+    assert calendar.blocked("USD", datetime(2026, 2, 1, 0, 0))
+    assert calendar.blocked("usd", datetime(2026, 2, 1, 23, 59, 59))
+    assert not calendar.blocked("USD", datetime(2026, 2, 2, 0, 0))
+    assert not calendar.blocked("EUR", datetime(2026, 2, 1, 12, 0))
+
+    eur = [(11, 59, False), (12, 0, True), (13, 30, True), (14, 29, True), (14, 30, False),
+           (15, 0, False), (16, 15, True), (16, 30, False)]
+    for hour, minute, expected in eur:
+        assert calendar.blocked("EUR", datetime(2026, 2, 3, hour, minute)) is expected, (hour, minute)
+    # aware datetimes are converted to UTC
+    assert calendar.blocked("EUR", datetime(2026, 2, 3, 13, 0, tzinfo=timezone(timedelta(hours=1))))
+
+    # past midnight into the next day
+    assert calendar.blocked("JPY", datetime(2026, 2, 4, 23, 45))
+    assert calendar.blocked("JPY", datetime(2026, 2, 5, 0, 30))
+    assert not calendar.blocked("JPY", datetime(2026, 2, 5, 1, 0))
+    assert [reason for *_, reason in calendar.day_events("EUR", date(2026, 2, 3))] == [
+        "ECB Speech", "ECB Press Conference", "Late Speech"]
+
+    stats = calendar.stats()
+    assert stats["events"] == 5 and stats["skipped_rows"] == 1 and stats["loads"] == 1
+
+
+def test_reloads_only_when_the_file_changes(tmp_path):
+    path = str(tmp_path / "calendar.csv")
+    calendar = NewsCalendar(path, check_every=0)
+    assert not calendar.blocked("GBP", datetime(2026, 3, 2, 9, 0))  # no file yet
+
+    write(path, "date,currency,reason\n2026-03-02,GBP,BoE\n")
+    assert calendar.blocked("GBP", datetime(2026, 3, 2, 9, 0))
+    for _ in range(100):
+        calendar.blocked("GBP", datetime(2026, 3, 2, 9, 0))
+    assert calendar.stats()["loads"] == 1
+
+    write(path, "date,currency,reason,start,end\n2026-03-02,GBP,BoE,12:00,12:30\n")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    assert not calendar.blocked("GBP", datetime(2026, 3, 2, 9, 0))
+    assert calendar.blocked("GBP", datetime(2026, 3, 2, 12, 10))
+    assert calendar.stats()["loads"] == 2
+
+
+def test_news_allows_trade_checks_both_currencies(tmp_path, monkeypatch):
+    path = str(tmp_path / "calendar.csv")
+    write(path, CSV)
+    monkeypatch.setattr(news_manual, "CALENDAR", NewsCalendar(path))
+
+    assert not news_filter.news_allows_trade("EURUSD", datetime(2026, 2, 1, 10, 0))
+    assert not news_filter.news_allows_trade("GBPUSD", datetime(2026, 2, 1, 10, 0))
+    assert not news_filter.news_allows_trade("EURGBP", datetime(2026, 2, 3, 12, 30))
+    assert news_filter.news_allows_trade("EURGBP", datetime(2026, 2, 3, 15, 0))
+    assert news_filter.news_allows_trade("GBPJPY", datetime(2026, 2, 4, 12, 0))
+
+
+def test_a_broken_file_keeps_the_previous_calendar(tmp_path):
+    path = str(tmp_path / "calendar.csv")
+    write(path, CSV)
+    calendar = NewsCalendar(path, check_every=0)
+    assert calendar.blocked("USD", datetime(2026, 2, 1, 10, 0))
+
+    with open(path, "ab") as f:
+        f.write(b"2026-02-05,GBP,\xff\n")  # caught mid-edit
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    assert calendar.blocked("USD", datetime(2026, 2, 1, 10, 0))
+    stats = calendar.stats()
+    assert stats["loads"] == 1 and "decode" in stats["last_error"]
@@ -0,0 +1,83 @@
+"""
+Tests for the backtest optimizer
+Pool workers must agree with the in-process run!
+"""
+
+import numpy as np
+import pytest
+
+from backtest import optimizer
+from backtest.vectorized import aggregate_bars, run_vector_backtest
+from tests.test_vectorized_backtest import m15_history
+
+
+@pytest.fixture(scope="module")
+def bars():
+    m15 = m15_history(96 * 200, seed=11)
+    return {"htf": aggregate_bars(m15, "H4"), "mtf": aggregate_bars(m15, "H1"), "ltf": m15}
+
+
+def test_search_spaces():
+    params = optimizer.grid({"rr": [2, 3], "cooldown": [None, 1800, 3600]})
+    assert len(params) == 6
+    assert {"rr": 3, "cooldown": 3600} in params
+
+    draws = optimizer.random_search({"rr": (1.5, 4.0), "swing_lookback": (1, 3),
+                                     "cooldown": [None, 900]}, 50, seed=1)
+    assert len(draws) == 50
+    assert all(1.5 <= d["rr"] <= 4.0 for d in draws)
+    assert {d["swing_lookback"] for d in draws} <= {1, 2, 3}
+    assert draws == optimizer.random_search({"rr": (1.5, 4.0), "swing_lookback": (1, 3),
+                                             "cooldown": [None, 900]}, 50, seed=1)
+
+    with pytest.raises(ValueError):
+        optimizer.grid({"lookback": [3]})
+
+
+def test_pool_matches_in_process(bars):
+    params = optimizer.grid({"rr": [2, 3], "tolerance": [0.0003, 0.0006]})
+    local = optimizer.optimize(bars, params, workers=1, min_trades=1)
+    pooled = optimizer.optimize(bars, params, workers=2, min_trades=1)
+    assert local == pooled
+    assert [row["rank"] for row in local] == [1, 2, 3, 4]
+    assert local[0]["expectancy"] >= local[-1]["expectancy"]
+
+    # the full-range row is the plain backtest
+    row = next(r for r in local if r["rr"] == 3 and r["tolerance"] == 0.0003)
+    result = run_vector_backtest(bars["htf"], bars["mtf"], bars["ltf"], rr=3, tolerance=0.0003)
+    assert row["trades"] == len(result["trades"])
+    assert row["net_profit"] == pytest.approx(sum(t["result"] for t in result["trades"]))
+
+
+def test_cooldown_and_trade_from(bars):
+    htf, mtf, ltf = bars["htf"], bars["mtf"], bars["ltf"]
+    once = run_vector_backtest(htf, mtf, ltf, cooldown=None)
+    again = run_vector_backtest(htf, mtf, ltf, cooldown=0)
+    assert len(again["trades"]) >= len(once["trades"])
+    assert len({t["ob_index"] for t in once["trades"]}) == len(once["trades"])
+
+    cut = int(ltf["time"][len(ltf) // 2])
+    late = run_vector_backtest(htf, mtf, ltf, trade_from=cut)
+    assert late["trades"]
+    assert all(t["time"] >= cut for t in late["trades"])
+
+
+def test_walk_forward(bars, tmp_path):
+    windows = optimizer.walk_forward_windows(bars, 60, 20)
+    assert len(windows) >= 3
+    for (a, b, c), (next_a, _, _) in zip(windows, windows[1:]):
+        assert b - a == 60 * 86400 and c - b == 20 * 86400
+        assert next_a - a == 20 * 86400
+
+    params = optimizer.grid({"rr": [2, 3]})
+    folds = optimizer.walk_forward(bars, params, 60, 20, workers=1, min_trades=1)
+    assert [f["fold"] for f in folds] == list(range(1, len(windows) + 1))
+    for fold, (a, b, c) in zip(folds, windows):
+        assert (fold["is_start"], fold["is_end"], fold["oos_end"]) == (a, b, c)
+        assert fold["rr"] in (2, 3)
+        assert "oos_expectancy" in fold
+
+    table = optimizer.write_results(folds, tmp_path / "wf.csv")
+    assert (tmp_path / "wf.csv").exists()
+    assert table["is_start"].iloc[0].endswith("+00:00")
+    assert np.isfinite(table["oos_trades"]).all()
@@ -0,0 +1,83 @@
+"""
+Tests for vectorized Order Block detection
+Same order blocks as the old per-bar loop, in the same order!
+"""
+
+import numpy as np
+import pandas as pd
+
+from ict_concepts.order_blocks import detect_order_blocks, htf_order_blocks_from_arrays
+from strategy.entry_model import check_entry
+
+
+def reference_htf_order_blocks(df):
+    """The original per-bar loop from detect_htf_order_blocks."""
+    obs = []
+    if len(df) < 5:
+        return obs
+    for i in range(2, len(df) - 2):
+        hi = float(df['high'].iloc[i])
+        lo = float(df['low'].iloc[i])
+        prev_hi = float(df['high'].iloc[i-1])
+        prev_lo = float(df['low'].iloc[i-1])
+        next_hi = float(df['high'].iloc[i+1])
+        next_lo = float(df['low'].iloc[i+1])
+        if hi > prev_hi and hi > next_hi:
+            obs.append({'type': 'bearish', 'high': prev_hi, 'low': prev_lo, 'index': i})
+        if lo < prev_lo and lo < next_lo:
+            obs.append({'type': 'bullish', 'high': prev_hi, 'low': prev_lo, 'index': i})
+    return obs
+
+
+def reference_order_blocks(df, structure_points):
+    """The original BOS loop from detect_order_blocks."""
+    obs = []
+    for tag, idx, price in structure_points:
+        if tag == "BOS":
+            prev = df.iloc[idx-1]
+            obs.append({
+                "type": "bullish" if df['close'][idx] > df['open'][idx] else "bearish",
+                "high": prev['high'],
+                "low": prev['low'],
+                "index": idx
+            })
+    return obs
+
+
+def random_bars(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0008, n))
+    open_ = np.roll(close, 1)
+    high = np.round(np.maximum(open_, close) + rng.uniform(0, 0.0006, n), 4)
+    low = np.round(np.minimum(open_, close) - rng.uniform(0, 0.0006, n), 4)
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close})
+
+
+def test_htf_order_blocks_match_reference():
+    for seed in range(5):
+        df = random_bars(500, seed)
+        expected = reference_htf_order_blocks(df)
+        assert expected
+        assert htf_order_blocks_from_arrays(df['high'], df['low']) == expected
+
+    assert htf_order_blocks_from_arrays([1.0, 2.0, 1.0, 2.0], [0.5, 1.5, 0.5, 1.5]) == []
+
+
+def test_bos_order_blocks_match_reference():
+    df = random_bars(300, 11)
+    rng = np.random.default_rng(11)
+    bos = sorted(rng.choice(np.arange(1, 300), 40, replace=False).tolist())
+    points = [("BOS", i, 0.0) for i in bos] + [("CHOCH", 5, 0.0), ("bad",)]
+
+    expected = reference_order_blocks(df, points[:40])
+    assert detect_order_blocks(df, points) == expected
+    assert detect_order_blocks(df, bos_indices=np.array(bos)) == expected
+
+
+def test_order_blocks_feed_check_entry():
+    obs = [{"type": "bullish", "high": 1.1050, "low": 1.0950, "index": 3}]
+    fvgs = [{"type": "bullish", "low": 1.0990, "high": 1.1010, "index": 4}]
+    fib = {"0.25": 1.0950, "0.5": 1.1050, "0.75": 1.1100}
+
+    signal = check_entry("bullish", 1.1000, fib, fvgs, obs)
+    assert signal["htf_ob"] is obs[0]
@@ -0,0 +1,127 @@
+"""
+Tests for the background position manager
+BE, partial and trail happen off the scan thread, one order at a time!
+"""
+
+from execution.position_manager import PositionManager
+
+
+class FakeBroker:
+    def __init__(self):
+        self.prices = {"EURUSD": 1.1000}
+        self.tickets = {1}
+        self.sent = []
+        self.fail = False
+
+    def get_price(self, symbol):
+        return self.prices[symbol]
+
+    def modify_sl(self, ticket, symbol, sl, tp):
+        self.sent.append(("sl", ticket, round(sl, 5)))
+        return None if self.fail else {"retcode": 10009}
+
+    def close_partial(self, ticket, symbol, direction, volume):
+        self.sent.append(("partial", ticket, volume))
+        return None if self.fail else {"retcode": 10009}
+
+    def open_tickets(self):
+        return set(self.tickets)
+
+
+def make_manager(broker, direction="buy", **kwargs):
+    manager = PositionManager(
+        get_price=broker.get_price,
+        modify_sl=broker.modify_sl,
+        close_partial=broker.close_partial,
+        open_tickets=broker.open_tickets,
+        reconcile_every=1,
+        **kwargs,
+    )
+    if direction == "buy":
+        manager.add({"ticket": 1, "symbol": "EURUSD", "direction": "buy",
+                     "entry": 1.1000, "sl": 1.0980, "tp": 1.1060, "lot": 0.2})
+    else:
+        manager.add({"ticket": 1, "symbol": "EURUSD", "direction": "sell",
+                     "entry": 1.1000, "sl": 1.1020, "tp": 1.0940, "lot": 0.2})
+    return manager
+
+
+def poll_and_wait(manager):
+    manager.poll()
+    # wait for the order pool to drain
+    manager._orders.submit(lambda: None).result()
+
+
+def test_break_even_partial_and_trail():
+    broker = FakeBroker()
+    manager = make_manager(broker)
+
+    poll_and_wait(manager)
+    assert broker.sent == []
+
+    broker.prices["EURUSD"] = 1.1020
+    poll_and_wait(manager)
+    assert broker.sent == [("sl", 1, 1.1)]
+
+    broker.prices["EURUSD"] = 1.1040
+    poll_and_wait(manager)
+    assert broker.sent[-1] == ("partial", 1, 0.1)
+    assert manager.open_trades()[0]["lot"] == 0.1
+
+    broker.prices["EURUSD"] = 1.1050
+    poll_and_wait(manager)
+    assert broker.sent[-1] == ("sl", 1, 1.103)
+
+    # trailing returns an action every tick; unchanged stops are not resent
+    poll_and_wait(manager)
+    assert len(broker.sent) == 3
+    assert manager.stats()["modifications"] == 3
+
+
+def test_failed_stop_is_retried_and_closed_trades_dropped():
+    broker = FakeBroker()
+    manager = make_manager(broker, retry_base=0)
+
+    broker.fail = True
+    broker.prices["EURUSD"] = 1.1020
+    poll_and_wait(manager)
+    broker.fail = False
+    poll_and_wait(manager)
+    assert broker.sent == [("sl", 1, 1.1), ("sl", 1, 1.1)]
+    assert manager.stats()["failures"] == 1
+
+    broker.tickets.clear()
+    poll_and_wait(manager)
+    assert manager.open_trades() == []
+
+
+def test_rejected_stop_backs_off_then_is_abandoned():
+    broker = FakeBroker()
+    manager = make_manager(broker, retry_base=60)
+    broker.fail = True
+    broker.prices["EURUSD"] = 1.1020
+    for _ in range(5):
+        poll_and_wait(manager)
+    # backing off: one order_send, not one per poll
+    assert broker.sent == [("sl", 1, 1.1)]
+
+    broker = FakeBroker()
+    manager = make_manager(broker, retry_base=0, max_retries=3)
+    broker.fail = True
+    broker.prices["EURUSD"] = 1.1020
+    for _ in range(10):
+        poll_and_wait(manager)
+    assert broker.sent == [("sl", 1, 1.1)] * 3
+    assert manager.stats()["abandoned"] == 1
+
+
+def test_adverse_move_does_not_trigger_break_even():
+    for direction, adverse, favourable in (("buy", 1.0980, 1.1020), ("sell", 1.1020, 1.0980)):
+        broker = FakeBroker()
+        manager = make_manager(broker, direction)
+        broker.prices["EURUSD"] = adverse
+        poll_and_wait(manager)
+        assert broker.sent == [], direction
+        broker.prices["EURUSD"] = favourable
+        poll_and_wait(manager)
+        assert broker.sent == [("sl", 1, 1.1)], direction
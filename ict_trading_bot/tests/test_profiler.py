@@ -0,0 +1,81 @@
+"""
+Tests for the sampling profiler
+Busy threads show up in the collapsed stacks and the caps hold!
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.profiler import TRUNCATED, SamplingProfiler
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(200))
+
+
+@pytest.fixture
+def worker():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker", daemon=True)
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def test_collapsed_stacks_and_file(worker, tmp_path):
+    profiler = SamplingProfiler(interval=0.002, max_overhead=0.5, out_dir=str(tmp_path))
+    profiler.start(duration=0.3)
+    with pytest.raises(RuntimeError):
+        profiler.start(duration=0.3)
+    time.sleep(0.35)
+    summary = profiler.stop()
+
+    assert not profiler.running
+    assert summary["samples"] > 10 and summary["dropped_stacks"] == 0
+    lines = open(summary["path"]).read().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any(line.startswith("busy-worker;") and "test_profiler.py:busy_loop" in line
+               for line in lines)
+    assert not any("sampling-profiler" in line for line in lines)
+    assert profiler.stop() == summary
+
+
+def test_overhead_and_size_caps(worker):
+    with pytest.raises(ValueError):
+        SamplingProfiler(max_duration=10).start(duration=60)
+
+    profiler = SamplingProfiler(interval=0.0001, max_overhead=0.01, max_stacks=1)
+    profiler.start(duration=5)
+    time.sleep(0.3)
+    summary = profiler.stop()
+
+    # stopped early, sampling kept near its budget despite the tiny interval
+    assert summary["wall_s"] < 2
+    assert summary["overhead"] < 0.05
+    assert summary["path"] is None
+    stacks = profiler.collapsed().splitlines()
+    assert len(stacks) <= 1 + len({s.split(";", 1)[0] for s in stacks})
+    assert summary["dropped_stacks"] > 0 and any(TRUNCATED in s for s in stacks)
+
+
+def test_byte_budget_folds_the_lightest_stacks(tmp_path):
+    profiler = SamplingProfiler(max_bytes=10_000, out_dir=str(tmp_path))
+    frames = ";".join(f"module_{d}.py:function_{d}" for d in range(100))
+    profiler.counts = {f"MainThread;{frames};leaf_{i}": 1000 - i for i in range(500)}
+    profiler.counts["MainThread;" + TRUNCATED] = 7
+    profiler.started = time.time()
+    summary = profiler._finish(1.0)
+
+    text = open(summary["path"]).read()
+    assert text == profiler.collapsed() and summary["bytes"] == len(text.encode()) <= 10_000
+    lines = text.splitlines()
+    kept = [line for line in lines if TRUNCATED not in line]
+    # heaviest first, every sample still accounted for
+    assert kept and kept[0].endswith(";leaf_0 1000")
+    assert summary["folded_stacks"] == 500 - len(kept)
+    assert lines[-1].startswith(f"MainThread;{TRUNCATED} ")
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == sum(profiler.counts.values())
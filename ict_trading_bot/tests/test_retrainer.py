@@ -0,0 +1,127 @@
+"""
+Tests for background retraining
+Better models are hot-swapped into the registry, worse ones never reach it!
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from data.feature_store import COLUMNS, FeatureStore
+from ml.model_registry import ModelRegistry
+from ml.retrainer import Retrainer
+from ml.tree_export import TreeEnsemble
+
+START = 1_600_000_000
+
+
+def add_labels(store, n, seed, offset=0):
+    """n labelled candidates whose win depends on fvg_size - fib_distance."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    time = START + (offset + np.arange(n)) * 900
+    rows = {column: np.zeros(n, dtype=dtype) for column, dtype in COLUMNS.items()}
+    rows.update(time=time, exit_time=time + 900, direction=np.ones(n))
+    for k, name in enumerate(("atr", "fvg_size", "ob_size", "fib_distance")):
+        rows[name] = X[:, k]
+    rows["win"] = X[:, 1] - X[:, 3] + rng.normal(scale=0.8, size=n) > 0
+    store.append("EURUSD", rows)
+
+
+def retrainer(tmp_path, store, **kw):
+    kw = {"min_new_labels": 500, "rounds": 30, **kw}
+    return Retrainer(store, str(tmp_path / "live" / "model.npz"), str(tmp_path / "work"), **kw)
+
+
+def test_retrain_on_new_labels_and_hot_swap(tmp_path):
+    store = FeatureStore(str(tmp_path / "features"))
+    add_labels(store, 2000, seed=0)
+    job = retrainer(tmp_path, store, tolerance=0.05)
+    assert job.due() == (True, "2000 new labels")
+
+    report = job.run_once()
+    assert report["decision"] == "published" and report["current"] is None
+    assert report["candidate"]["auc"] > 0.7
+    registry = ModelRegistry(job.model_path, check_every=0)
+    first = registry.load()
+    assert isinstance(first, TreeEnsemble)
+    assert job.run_once() is None and job.due()[1] == "no new labels"
+
+    add_labels(store, 300, seed=1, offset=2000)
+    assert job.run_once() is None  # 300/500
+    add_labels(store, 300, seed=2, offset=2300)
+    report = job.run_once()
+    # newest 20%: rows the live model never saw
+    assert report["holdout_rows"] == 520 and report["holdout_start"] == START + 2080 * 900
+    assert report["current"]["rows"] == report["candidate"]["rows"] == 520
+    assert report["decision"] == "published"
+    assert os.path.exists(str(tmp_path / "live" / "model.prev.npz"))
+    assert registry.load() is not first
+    assert job.state()["labels"] == 2600
+
+
+def test_worse_candidate_is_not_published(tmp_path):
+    store = FeatureStore(str(tmp_path / "features"))
+    add_labels(store, 2000, seed=0)
+    retrainer(tmp_path, store).run_once()
+    live = open(tmp_path / "live" / "model.npz", "rb").read()
+
+    add_labels(store, 600, seed=3, offset=2000)
+    # two tiny steps: barely better than a coin flip
+    weak = retrainer(tmp_path, store, rounds=2, params={"eta": 0.01})
+    report = weak.run_once()
+    assert report["decision"] == "rejected"
+    assert report["candidate"]["logloss"] > report["current"]["logloss"]
+    assert open(tmp_path / "live" / "model.npz", "rb").read() == live
+    assert not os.path.exists(str(tmp_path / "live" / "model.prev.npz"))
+    # the rejected labels are not retried until more arrive
+    assert weak.due()[0] is False
+
+
+def test_schedule_retrains_with_few_new_labels(tmp_path):
+    store = FeatureStore(str(tmp_path / "features"))
+    add_labels(store, 1000, seed=0)
+    job = retrainer(tmp_path, store, min_new_labels=10_000, every=3600)
+    assert job.due() == (True, "schedule")
+    job.run_once()
+    trained_at = job.state()["trained_at"]
+
+    add_labels(store, 50, seed=1, offset=1000)
+    assert job.due(now=trained_at + 60) == (False, "50/10000 new labels")
+    assert job.due(now=trained_at + 3600) == (True, "schedule")
+    # the holdout never reaches back into rows the live model trained on
+    report = job.run_once(force=True)
+    assert report["holdout_rows"] == 50 and report["decision"] == "skipped: holdout too small"
+
+
+def test_purge_defaults_to_the_longest_trade(tmp_path):
+    store = FeatureStore(str(tmp_path / "features"))
+    add_labels(store, 2000, seed=0)
+    assert retrainer(tmp_path, store).run_once()["purge"] == 900
+    assert retrainer(tmp_path, store, purge=0).run_once(force=True)["purge"] == 0
+
+
+def test_thread_caps_are_set_before_numpy_loads(tmp_path):
+    # the script's env caps only work if nothing imported numpy first
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probe = (
+        "import runpy, sys\n"
+        f"sys.argv = ['retrain.py', '--threads', '3', '--nice', '0', '--once',"
+        f" '--features', {str(tmp_path / 'features')!r}, '--model', {str(tmp_path / 'model.npz')!r},"
+        f" '--work-dir', {str(tmp_path / 'work')!r}]\n"
+        "import builtins, os\n"
+        "real = builtins.__import__\n"
+        "def guard(name, *a, **kw):\n"
+        "    if name == 'numpy' and 'numpy' not in sys.modules:\n"
+        "        assert os.environ['OPENBLAS_NUM_THREADS'] == '3', 'numpy before caps'\n"
+        "    return real(name, *a, **kw)\n"
+        "builtins.__import__ = guard\n"
+        f"runpy.run_path({os.path.join(root, 'scripts', 'retrain.py')!r}, run_name='__main__')\n"
+    )
+    env = {k: v for k, v in os.environ.items() if not k.endswith("_NUM_THREADS")}
+    result = subprocess.run([sys.executable, "-c", probe], cwd=root, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert "not due" in result.stdout
@@ -0,0 +1,41 @@
+"""
+Tests for the concurrent symbol scanner
+Many symbols analysed at once, results handed back one by one!
+"""
+
+import time
+
+from strategy.scanner import SymbolScanner
+
+
+def test_symbols_are_scanned_concurrently():
+    scanner = SymbolScanner(workers=8)
+    symbols = [f"SYM{i}" for i in range(8)]
+
+    def slow_analysis(symbol):
+        time.sleep(0.1)
+        return symbol.lower()
+
+    started = time.perf_counter()
+    results = dict(scanner.scan(symbols, slow_analysis))
+    elapsed = time.perf_counter() - started
+
+    assert results == {s: s.lower() for s in symbols}
+    assert elapsed < 0.4
+    assert scanner.stats()["cycle_time"]["8"]["cycles"] == 1
+    scanner.shutdown()
+
+
+def test_failing_symbol_does_not_stop_the_cycle():
+    scanner = SymbolScanner(workers=2)
+
+    def analysis(symbol):
+        if symbol == "BAD":
+            raise RuntimeError("no tick data")
+        return symbol
+
+    results = list(scanner.scan(["EURUSD", "BAD", "GBPUSD"], analysis))
+
+    assert sorted(r for _, r in results) == ["EURUSD", "GBPUSD"]
+    assert scanner.stats()["errors"] == 1
+    scanner.shutdown()
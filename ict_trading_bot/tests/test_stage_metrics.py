@@ -0,0 +1,75 @@
+"""
+Tests for the main-loop stage metrics
+Histograms, rejection counters and the Prometheus text are consistent!
+"""
+
+import threading
+
+import pytest
+
+from utils.stage_metrics import StageMetrics, render_gauges
+
+
+def test_histogram_buckets_and_counters():
+    metrics = StageMetrics(buckets=(0.001, 0.01, 0.1))
+    for seconds in (0.0005, 0.001, 0.005, 0.05, 3.0):
+        metrics.observe("liquidity", "EURUSD", seconds)
+
+    with metrics.time("smt", "EURUSD") as stage:
+        stage.reject()
+    with pytest.raises(ValueError):
+        with metrics.time("smt", "EURUSD"):
+            raise ValueError("boom")
+
+    snap = metrics.snapshot()
+    counts, total, n = snap["histograms"][("liquidity", "EURUSD")]
+    assert counts == [2, 3, 4, 5]  # cumulative, le=0.001 is inclusive
+    assert n == 5 and total == pytest.approx(3.0565)
+    assert snap["histograms"][("smt", "EURUSD")][2] == 2
+    assert snap["counters"] == {
+        "rejections": {("smt", "EURUSD"): 1},
+        "errors": {("smt", "EURUSD"): 1},
+    }
+
+    stats = metrics.stats()
+    assert stats["liquidity"]["calls"] == 5
+    assert stats["smt"]["rejections"] == 1 and stats["smt"]["errors"] == 1
+
+
+def test_render_prometheus():
+    metrics = StageMetrics(buckets=(0.01, 0.1))
+    metrics.observe("entry", "EURUSD", 0.05)
+    metrics.observe("entry", 'we"ird', 0.5)
+    metrics.observe("session", None, 0.001)
+    metrics.count("rejections", "entry", "EURUSD")
+
+    text = metrics.render()
+    assert "# TYPE ict_stage_seconds histogram" in text
+    assert 'ict_stage_seconds_bucket{stage="entry",symbol="EURUSD",le="0.01"} 0' in text
+    assert 'ict_stage_seconds_bucket{stage="entry",symbol="EURUSD",le="0.1"} 1' in text
+    assert 'ict_stage_seconds_bucket{stage="entry",symbol="EURUSD",le="+Inf"} 1' in text
+    assert 'ict_stage_seconds_count{stage="entry",symbol="we\\"ird"} 1' in text
+    assert 'ict_stage_seconds_sum{stage="session"} 0.001' in text
+    assert 'ict_stage_rejections_total{stage="entry",symbol="EURUSD"} 1' in text
+    assert text.endswith("\n")
+
+    assert render_gauges("ict_scheduler", {"ran": {"M15": 3}, "skip_rate": 0.5, "ok": True}) == [
+        "ict_scheduler_ran_M15 3", "ict_scheduler_skip_rate 0.5",
+    ]
+
+
+def test_concurrent_observations():
+    metrics = StageMetrics()
+
+    def work(symbol):
+        for _ in range(2000):
+            with metrics.time("price", symbol):
+                pass
+
+    threads = [threading.Thread(target=work, args=(s,)) for s in ("EURUSD", "GBPUSD") * 2]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    hist = metrics.snapshot()["histograms"]
+    assert hist[("price", "EURUSD")][2] == hist[("price", "GBPUSD")][2] == 4000
@@ -0,0 +1,67 @@
+"""
+Tests for the linear-time swing engine
+Both old swing finders must give the same answers through the new engine!
+"""
+
+import numpy as np
+import pandas as pd
+
+from ict_concepts.market_structure import get_swings
+from market_structure.swing_points import find_swings, fractal_swings, rolling_max
+
+
+def reference_find_swings(df, lookback=3):
+    swings = []
+    for i in range(lookback, len(df) - lookback):
+        high = df['high'][i]
+        low = df['low'][i]
+        if high == max(df['high'][i-lookback:i+lookback]):
+            swings.append(("high", i, high))
+        if low == min(df['low'][i-lookback:i+lookback]):
+            swings.append(("low", i, low))
+    return swings
+
+
+def reference_get_swings(rates):
+    swings = []
+    for i in range(2, len(rates) - 2):
+        high = rates[i]['high']
+        low = rates[i]['low']
+        if high > rates[i-1]['high'] and high > rates[i+1]['high']:
+            swings.append({"type": "high", "price": high, "index": i})
+        if low < rates[i-1]['low'] and low < rates[i+1]['low']:
+            swings.append({"type": "low", "price": low, "index": i})
+    return swings
+
+
+def random_bars(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0008, n))
+    high = np.round(close + rng.uniform(0, 0.0006, n), 4)
+    low = np.round(close - rng.uniform(0, 0.0006, n), 4)
+    return pd.DataFrame({"high": high, "low": low})
+
+
+def test_rolling_max_matches_naive():
+    x = np.random.default_rng(0).normal(size=103)
+    for window in (1, 2, 5, 17, 103):
+        naive = [x[j:j + window].max() for j in range(len(x) - window + 1)]
+        assert np.array_equal(rolling_max(x, window), naive)
+
+
+def test_find_swings_matches_reference():
+    df = random_bars(400, 1)
+    for lookback in (1, 2, 3, 5, 10):
+        assert find_swings(df, lookback) == reference_find_swings(df, lookback)
+
+
+def test_get_swings_matches_reference(monkeypatch):
+    df = random_bars(200, 2)
+    rates = np.zeros(len(df), dtype=[("time", "i8"), ("high", "f8"), ("low", "f8")])
+    rates["high"] = df["high"]
+    rates["low"] = df["low"]
+    monkeypatch.setattr("ict_concepts.market_structure.get_rates", lambda s, tf, bars: rates)
+
+    assert get_swings("EURUSD", "H1") == reference_get_swings(rates)
+    assert fractal_swings(rates["high"], rates["low"]) == reference_get_swings(rates)
+    assert fractal_swings([], []) == []
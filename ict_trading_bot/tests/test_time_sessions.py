@@ -0,0 +1,46 @@
+"""
+Tests for the session calendar
+London and New York follow their own clocks, summer and winter!
+"""
+
+from datetime import datetime
+
+import pytz
+
+from utils.time_sessions import SessionCalendar
+
+
+def ts(*args):
+    return datetime(*args, tzinfo=pytz.UTC).timestamp()
+
+
+def test_windows_follow_dst():
+    calendar = SessionCalendar()
+
+    # winter: London 08:00-16:00 UTC, New York 13:00-21:00 UTC
+    assert calendar.in_session("london", ts(2026, 1, 14, 8, 0))
+    assert not calendar.in_session("london", ts(2026, 1, 14, 7, 59))
+    assert calendar.in_session("newyork", ts(2026, 1, 14, 20, 59))
+
+    # summer: both open an hour earlier in UTC
+    assert calendar.in_session("london", ts(2026, 7, 15, 7, 0))
+    assert not calendar.in_session("london", ts(2026, 7, 15, 15, 0))
+    assert calendar.in_session("newyork", ts(2026, 7, 15, 12, 0))
+    assert not calendar.in_session("newyork", ts(2026, 7, 15, 20, 0))
+
+
+def test_asia_session_crosses_midnight_utc():
+    calendar = SessionCalendar()
+    # Monday's Tokyo session opens Sunday 22:00 UTC
+    assert calendar.in_session("asia", ts(2026, 1, 11, 23, 0))
+    assert calendar.active(ts(2026, 1, 12, 3, 0)) == ["asia"]
+
+
+def test_seconds_until_next_open():
+    calendar = SessionCalendar()
+
+    assert calendar.seconds_until_open(now=ts(2026, 1, 14, 9, 0)) == 0
+    assert calendar.seconds_until_open(now=ts(2026, 1, 14, 22, 0)) == 10 * 3600
+    # Friday after New York closes -> Monday London open
+    assert calendar.seconds_until_open(now=ts(2026, 1, 16, 21, 0)) == (2 * 24 + 11) * 3600
+    assert not calendar.is_open(now=ts(2026, 1, 17, 12, 0))
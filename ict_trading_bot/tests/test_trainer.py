@@ -0,0 +1,107 @@
+"""
+Tests for the ML training pipeline
+Walk-forward folds never train on the future and the saved model loads!
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml import trainer
+from ml.model_registry import ModelRegistry
+from ml.tree_export import TreeEnsemble
+
+
+def write_dataset(path, n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    y = (X[:, 1] - X[:, 3] + rng.normal(scale=0.8, size=n) > 0).astype(int)
+    df = pd.DataFrame(X, columns=["atr", "fvg_size", "ob_size", "fib_distance"])
+    df.insert(0, "symbol", "EURUSD")
+    df.insert(0, "time", 1_600_000_000 + np.arange(n) * 900)
+    df["win"] = y
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_purged_walk_forward_splits():
+    times = np.arange(0, 6000, 10)
+    splits = trainer.walk_forward_splits(times, n_folds=5, purge=100)
+    assert [s["fold"] for s in splits] == list(range(5))
+    for a, b in zip(splits, splits[1:]):
+        assert a["test_end"] == b["test_start"]
+    for s in splits:
+        assert s["train_end"] == s["test_start"] - 100 < s["test_end"]
+    assert splits[0]["test_start"] == 1000 and splits[-1]["test_end"] == 5991
+    with pytest.raises(ValueError):
+        trainer.walk_forward_splits(times[:5], n_folds=5)
+
+
+def test_streaming_matches_pandas(tmp_path):
+    path = str(tmp_path / "features.csv")
+    df = write_dataset(path, n=1000)
+    features = trainer.read_schema(path)
+    assert features == ["atr", "fvg_size", "ob_size", "fib_distance"]
+
+    start, end = df["time"][100], df["time"][700]
+    chunks = list(trainer.iter_chunks(path, features, chunksize=128, start=start, end=end))
+    X = np.concatenate([c[0] for c in chunks])
+    assert len(chunks) == 6 and np.array_equal(X, df[features][100:700].to_numpy(np.float32))
+    matrix = trainer.training_matrix(path, features, start, end, chunksize=128)
+    assert matrix.num_row() == 600
+
+
+@pytest.mark.parametrize("workers,external_memory", [(1, False), (2, True)])
+def test_pipeline_saves_model_schema_and_metrics(tmp_path, workers, external_memory):
+    path = str(tmp_path / "features.csv")
+    df = write_dataset(path)
+    out = str(tmp_path / "models")
+    booster, meta = trainer.train_pipeline(path, out, n_folds=3, purge=3600, rounds=30,
+                                           workers=workers, chunksize=500,
+                                           external_memory=external_memory, cache_dir=str(tmp_path))
+
+    assert len(meta["folds"]) == 3 and meta["rows"] == len(df)
+    for fold in meta["folds"]:
+        train_times = df["time"][df["time"] < fold["train_end"]]
+        assert fold["train_rows"] == len(train_times)
+        assert train_times.max() < fold["test_start"] - 3600 + 1
+        assert fold["test_auc"] > 0.7 and fold["peak_rss_mb"] > 0
+    assert meta["metrics"]["rows"] == sum(f["test_rows"] for f in meta["folds"])
+    assert meta["wall_s"] > 0
+
+    saved = json.load(open(meta["paths"]["meta"]))
+    assert saved["features"] == ["atr", "fvg_size", "ob_size", "fib_distance"]
+    assert saved["metrics"] == pytest.approx(meta["metrics"])
+    model = ModelRegistry(meta["paths"]["trees"]).load()
+    assert isinstance(model, TreeEnsemble)
+    X = df[saved["features"]].to_numpy()[:50]
+    import xgboost as xgb
+    assert model.predict_proba(X)[:, 1] == pytest.approx(booster.predict(xgb.DMatrix(X)), abs=1e-6)
+
+
+def test_purge_defaults_to_the_longest_trade(tmp_path):
+    path = str(tmp_path / "features.csv")
+    df = write_dataset(path, n=600)
+    with pytest.raises(ValueError, match="exit_time"):
+        trainer.walk_forward(path, n_folds=2, rounds=5)
+
+    df["exit_time"] = df["time"] + 900 * (1 + np.arange(len(df)) % 8)
+    df.to_csv(path, index=False)
+    assert trainer.read_schema(path) == ["atr", "fvg_size", "ob_size", "fib_distance"]
+    folds = trainer.walk_forward(path, n_folds=2, rounds=5, workers=1)
+    assert [f["train_end"] for f in folds] == [f["test_start"] - 8 * 900 for f in folds]
+    assert trainer.walk_forward(path, n_folds=2, purge=0, rounds=5, workers=1)[0]["train_end"] == \
+        folds[0]["test_start"]
+
+
+def test_train_model_returns_a_classifier(tmp_path):
+    import xgboost as xgb
+
+    path = str(tmp_path / "features.csv")
+    df = write_dataset(path, n=600)
+    model = trainer.train_model(path, n_folds=2, purge=0, rounds=10, workers=1)
+    assert isinstance(model, xgb.XGBClassifier)
+    X = df[["atr", "fvg_size", "ob_size", "fib_distance"]].to_numpy()[:20]
+    assert model.predict_proba(X).shape == (20, 2)
@@ -0,0 +1,58 @@
+"""
+Tests for the NumPy tree export
+The flattened trees score exactly like XGBClassifier.predict_proba!
+"""
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from ml.ml_filter import ml_quality_filter_batch
+from ml.model_registry import ModelRegistry
+from ml.tree_export import TreeEnsemble, export_booster, export_model
+
+
+def dataset(n, seed, missing=0.0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    y = (X[:, 1] + 0.5 * X[:, 0] ** 2 - X[:, 3] + rng.normal(scale=0.7, size=n) > 0).astype(int)
+    X[rng.random(X.shape) < missing] = np.nan
+    return X, y
+
+
+@pytest.mark.parametrize("depth,trees,missing", [(1, 5, 0.0), (5, 200, 0.0), (8, 50, 0.1)])
+def test_parity_with_predict_proba(depth, trees, missing):
+    X, y = dataset(3000, seed=depth, missing=missing)
+    model = xgb.XGBClassifier(n_estimators=trees, max_depth=depth,
+                              learning_rate=0.05, subsample=0.8).fit(X, y)
+    ensemble = export_booster(model)
+    assert ensemble.n_trees == trees and ensemble.max_depth <= depth
+
+    test, _ = dataset(2000, seed=99, missing=missing)
+    expected = model.predict_proba(test)
+    assert np.abs(ensemble.predict_proba(test) - expected).max() < 1e-6
+    assert ensemble.predict_proba(test[0]) == pytest.approx(expected[:1], abs=1e-6)
+    assert ensemble.predict_proba(np.empty((0, 4))).shape == (0, 2)
+    with pytest.raises(ValueError):
+        ensemble.predict_proba(test[:, :3])
+
+
+def test_saved_trees_drive_the_ml_filter(tmp_path):
+    X, y = dataset(2000, seed=3)
+    model = xgb.XGBClassifier(n_estimators=30, max_depth=4).fit(X, y)
+    path = str(tmp_path / "model.npz")
+    export_model(model, path)
+
+    loaded = TreeEnsemble.load(path)
+    assert np.array_equal(loaded.left, export_booster(model).left)
+
+    registry = ModelRegistry(path)
+    assert isinstance(registry.load(), TreeEnsemble)
+    rows = X[:5].tolist()
+    verdicts = ml_quality_filter_batch(rows, registry, threshold=0.5)
+    expected = model.predict_proba(X[:5])[:, 1]
+    assert [p for _, p in verdicts] == pytest.approx(expected.tolist(), abs=1e-6)
+
+    regressor = xgb.XGBRegressor(n_estimators=3).fit(X, y)
+    with pytest.raises(ValueError):
+        export_booster(regressor)
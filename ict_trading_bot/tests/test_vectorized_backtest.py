@@ -0,0 +1,153 @@
+"""
+Tests for the vectorized backtest
+Array signals must match the live pipeline replayed candle by candle!
+"""
+
+import numpy as np
+import pytest
+
+from backtest.vectorized import aggregate_bars, entry_signals, run_vector_backtest
+from ict_concepts.ict_state import ICTState
+from risk.sl_tp_engine import calculate_sl_tp
+from strategy.entry_model import check_entry
+from strategy.liquidity_filter import liquidity_taken
+
+DTYPE = [("time", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"), ("close", "f8")]
+
+
+def m15_history(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0006, n))
+    open_ = np.r_[close[0], close[:-1]]
+    rates = np.zeros(n, dtype=DTYPE)
+    # start on an H4 boundary so every higher-timeframe bucket is whole
+    rates["time"] = 1_600_000_000 // 14400 * 14400 + np.arange(n) * 900
+    rates["open"] = open_
+    rates["close"] = close
+    rates["high"] = np.maximum(open_, close) + rng.uniform(0, 0.0004, n)
+    rates["low"] = np.minimum(open_, close) - rng.uniform(0, 0.0004, n)
+    return rates
+
+
+def live_signals(h4, h1, m15, window, ob_window, tolerance, rr=3):
+    """What main.scan_symbol decides after each M15 close, via ICTState."""
+    states = {tf: ICTState(window=window, ob_window=ob_window, tolerance=tolerance)
+              for tf in ("H4", "H1", "M15")}
+    fed = {"H4": 0, "H1": 0}
+    out = []
+    for t in range(len(m15)):
+        now = m15["time"][t] + 900
+        for tf, rates, period in (("H4", h4, 14400), ("H1", h1, 3600)):
+            while fed[tf] < len(rates) and rates["time"][fed[tf]] + period <= now:
+                states[tf].update(rates[fed[tf]])
+                fed[tf] += 1
+        states["M15"].update(m15[t])
+
+        price = float(m15["close"][t])
+        trend = states["H4"].trend()
+        direction = "buy" if trend == "bullish" else "sell"
+        signal = None
+        if liquidity_taken(price, states["H1"].liquidity(), direction):
+            signal = check_entry(trend, price, states["H1"].fib(),
+                                 states["M15"].fvgs(), states["H1"].order_blocks())
+        if signal:
+            sl, tp = calculate_sl_tp(signal["direction"], price, signal["htf_ob"], rr=rr)
+            out.append((1 if signal["direction"] == "buy" else -1, sl, tp))
+        else:
+            out.append((0, None, None))
+    return out
+
+
+@pytest.mark.parametrize("seed, window, ob_window, tolerance", [
+    (0, 50, 120, 0.0005),
+    (2, 50, 120, 0.0005),
+    (5, 30, 60, 0.001),
+])
+def test_signals_match_live_pipeline(seed, window, ob_window, tolerance):
+    m15 = m15_history(3000, seed)
+    h1, h4 = aggregate_bars(m15, "H1"), aggregate_bars(m15, "H4")
+
+    expected = live_signals(h4, h1, m15, window, ob_window, tolerance)
+    signals = entry_signals(h4, h1, m15, tolerance=tolerance, window=window, ob_window=ob_window)
+
+    assert any(d for d, _, _ in expected)
+    for t, (direction, sl, tp) in enumerate(expected):
+        assert signals["direction"][t] == direction
+        if direction:
+            assert signals["sl"][t] == sl
+            assert signals["tp"][t] == tp
+
+
+def test_aggregate_bars():
+    m15 = m15_history(16, 1)
+    h1 = aggregate_bars(m15, "H1")
+    assert len(h1) == 4
+    assert h1["high"][1] == m15["high"][4:8].max()
+    assert h1["low"][1] == m15["low"][4:8].min()
+    assert h1["open"][1] == m15["open"][4]
+    assert h1["close"][1] == m15["close"][7]
+
+
+def test_trade_walk_exits_and_equity(monkeypatch):
+    import backtest.vectorized as vec
+
+    m15 = np.zeros(8, dtype=DTYPE)
+    m15["time"] = np.arange(8) * 900
+    m15["close"] = 1.0
+    m15["high"] = [1.0, 1.0, 1.01, 1.0, 1.0, 1.0, 1.0, 1.0]
+    m15["low"] = [1.0, 1.0, 1.0, 1.0, 1.0, 0.99, 1.0, 1.0]
+
+    # a buy at bar 0 (1R = 0.01, TP at 3R) and a sell at bar 4 on another OB
+    signals = {
+        "direction": np.array([1, 1, 0, 0, -1, 0, 0, 0], dtype=np.int8),
+        "entry": np.full(8, 1.0),
+        "sl": np.array([0.99, 0.99, 0, 0, 1.01, 0, 0, 0]),
+        "tp": np.array([1.01, 1.03, 0, 0, 0.99, 0, 0, 0]),
+        "fvg_index": np.zeros(8, dtype=np.int64),
+        "ob_index": np.array([7, 7, 0, 0, 8, 0, 0, 0]),
+    }
+    monkeypatch.setattr(vec, "entry_signals", lambda *args, **kwargs: signals)
+
+    result = run_vector_backtest(None, None, m15, risk_percent=1.0, initial_equity=10000.0)
+    trades = result["trades"]
+
+    # bar 1 is skipped: the first trade is still open
+    assert [(t["direction"], t["exit_reason"], t["bars_held"]) for t in trades] == [
+        ("buy", "tp", 2), ("sell", "tp", 1)]
+    assert trades[0]["result"] == pytest.approx(100.0)
+    assert trades[1]["result"] == pytest.approx(101.0)
+    assert result["equity_curve"][-1] == pytest.approx(10201.0)
+    assert result["metrics"]["trades"] == 2
+
+    from backtest.engine import run_backtest
+    assert run_backtest(None, None, m15, risk_percent=1.0) == result["metrics"]
+
+
+def test_order_block_cooldown_follows_can_trade(monkeypatch):
+    import backtest.vectorized as vec
+
+    n = 12
+    m5 = np.zeros(n, dtype=DTYPE)
+    m5["time"] = np.arange(n) * 300
+    m5["close"] = m5["high"] = m5["low"] = 1.0
+    m5["high"][[1, 3, 8]] = 1.01
+
+    # the same OB signals at bars 0, 2 (10 min after the first entry) and 7
+    signals = {
+        "direction": np.zeros(n, dtype=np.int8),
+        "entry": np.full(n, 1.0),
+        "sl": np.full(n, 0.99),
+        "tp": np.full(n, 1.01),
+        "fvg_index": np.zeros(n, dtype=np.int64),
+        "ob_index": np.full(n, 7),
+    }
+    signals["direction"][[0, 2, 7]] = 1
+    monkeypatch.setattr(vec, "entry_signals", lambda *args, **kwargs: signals)
+
+    def entries(**kwargs):
+        return [t["time"] // 300 for t in run_vector_backtest(None, None, m5, **kwargs)["trades"]]
+
+    # live default: 1800 s between entries on one order block
+    assert entries() == [0, 7]
+    assert entries(cooldown=0) == [0, 2, 7]
+    assert entries(cooldown=None) == [0]
@@ -0,0 +1,219 @@
+"""
+Tests for the Supabase write-behind queue
+A local HTTP server stands in for the PostgREST endpoint!
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dashboard.outbox import Outbox
+from dashboard.write_behind import WriteBehindQueue
+
+
+class StubSupabase:
+    """
+    Records every POST /rest/v1/<table> body; optionally slow or down.
+    Rows whose idempotency key was seen before are ignored, like
+    ON CONFLICT DO NOTHING.
+    """
+
+    def __init__(self, delay=0.0):
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(stub.delay)
+                if stub.down:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                stub.requests.append((self.path.split("?")[0], body))
+                for row in body:
+                    stub.stored.setdefault(row.get("idempotency_key"), row)
+                self.send_response(201)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(json.dumps(body).encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.delay = delay
+        self.down = False
+        self.stored = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def stub():
+    server = StubSupabase()
+    yield server
+    server.close()
+
+
+def test_rows_are_coalesced_per_table():
+    batches = []
+    writer = WriteBehindQueue(lambda table, rows: batches.append((table, list(rows))) or True,
+                              batch_size=3, flush_interval=60)
+    for i in range(7):
+        writer.put("bot_logs", {"i": i})
+    writer.put("bot_signals", {"i": 0})
+
+    # two full log batches go out on size; the rest waits for a flush
+    assert writer.flush()
+    assert [len(rows) for table, rows in batches if table == "bot_logs"] == [3, 3, 1]
+    assert [len(rows) for table, rows in batches if table == "bot_signals"] == [1]
+    assert writer.stats()["flushed_rows"] == 8
+
+
+def test_flushes_on_time():
+    batches = []
+    writer = WriteBehindQueue(lambda table, rows: batches.append(rows) or True,
+                              batch_size=100, flush_interval=0.05)
+    writer.put("bot_logs", {"i": 1})
+    deadline = time.time() + 2
+    while not batches and time.time() < deadline:
+        time.sleep(0.01)
+    assert batches == [[{"i": 1}]]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    writer = WriteBehindQueue(lambda table, rows: release.wait(), max_queue=2, batch_size=1)
+
+    started = time.perf_counter()
+    results = [writer.put("bot_logs", {"i": i}) for i in range(10)]
+    assert time.perf_counter() - started < 0.5
+    assert not all(results)
+    assert writer.stats()["dropped"] == results.count(False)
+    release.set()
+
+
+def test_outbox_replays_in_order_after_restart(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    seqs = [outbox.append("bot_logs", {"i": i})[0] for i in range(5)]
+    outbox.ack(seqs[:2])
+    outbox.close()
+
+    reopened = Outbox(path, compact_every=1)
+    pending = reopened.pending()
+    assert [row["i"] for _, _, row in pending] == [2, 3, 4]
+    assert len({row["idempotency_key"] for _, _, row in pending}) == 3
+
+    reopened.ack(seq for seq, _, _ in pending)
+    assert len(reopened) == 0
+    assert reopened.stats()["compactions"] == 1
+
+
+def test_failed_inserts_stay_in_outbox(tmp_path):
+    up = threading.Event()
+    batches = []
+
+    def sink(table, rows):
+        if not up.is_set():
+            return None
+        batches.append([row["i"] for row in rows])
+        return True
+
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    writer = WriteBehindQueue(sink, batch_size=2, flush_interval=0.01, outbox=outbox)
+    for i in range(5):
+        writer.put("bot_logs", {"i": i})
+    assert writer.flush()
+    assert batches == [] and len(outbox) == 5
+
+    up.set()
+    assert writer.flush()
+    assert [i for batch in batches for i in batch] == [0, 1, 2, 3, 4]
+    assert len(outbox) == 0
+    assert writer.stats()["replayed_rows"] == 5
+
+
+def _bridge(monkeypatch, tmp_path, stub):
+    bridge = pytest.importorskip("dashboard.bridge")
+    monkeypatch.setenv("SUPABASE_URL", stub.url)
+    monkeypatch.setenv("SUPABASE_KEY", "test-key")
+    monkeypatch.setattr(bridge, "_SUPABASE_CLIENT", None)
+    # no backoff sleeps inside the test
+    monkeypatch.setattr(bridge, "_with_retries", lambda func: _once(func))
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    monkeypatch.setattr(bridge, "OUTBOX", outbox)
+    monkeypatch.setattr(bridge, "WRITER", WriteBehindQueue(bridge._insert_rows, outbox=outbox))
+    return bridge
+
+
+def _once(func):
+    try:
+        return func()
+    except Exception:
+        return None
+
+
+def test_bridge_batches_into_supabase(stub, monkeypatch, tmp_path):
+    bridge = _bridge(monkeypatch, tmp_path, stub)
+    stub.delay = 0.2
+
+    started = time.perf_counter()
+    for i in range(5):
+        bridge.persist_signal_to_supabase({"symbol": "EURUSD", "direction": "buy", "entry": 1.1 + i})
+    bridge.push_trade({"symbol": "EURUSD", "lot": 0.1})
+    # the slow endpoint is not on the caller's path
+    assert time.perf_counter() - started < 0.2
+
+    assert bridge.WRITER.flush()
+    tables = {path.rsplit("/", 1)[-1]: body for path, body in stub.requests}
+    assert len(tables["bot_signals"]) == 5
+    assert tables["bot_logs"][0]["event"] == "trade"
+    assert bridge.WRITER.stats()["last_flush_ms"] >= 200
+
+
+def test_bridge_survives_supabase_outage(stub, monkeypatch, tmp_path):
+    bridge = _bridge(monkeypatch, tmp_path, stub)
+    stub.down = True
+    for i in range(3):
+        bridge.persist_signal_to_supabase({"symbol": "EURUSD", "direction": "buy", "entry": 1.1 + i})
+    assert bridge.WRITER.flush()
+    assert stub.stored == {} and len(bridge.OUTBOX) == 3
+
+    stub.down = False
+    assert bridge.WRITER.flush()
+    assert len(stub.stored) == 3
+    assert len(bridge.OUTBOX) == 0
+
+
+def test_bridge_builds_the_client_off_the_caller_thread(stub, monkeypatch, tmp_path):
+    bridge = _bridge(monkeypatch, tmp_path, stub)
+    real = bridge.create_client
+    threads = []
+
+    def slow_create_client(url, key):
+        threads.append(threading.current_thread().name)
+        time.sleep(0.3)  # a cold client: TLS context, HTTP pool
+        return real(url, key)
+
+    monkeypatch.setattr(bridge, "create_client", slow_create_client)
+    started = time.perf_counter()
+    bridge.persist_log_to_supabase("trade", {"symbol": "EURUSD"})
+    assert time.perf_counter() - started < 0.2
+
+    assert bridge.WRITER.flush()
+    assert threads == ["write-behind"]
+    assert len(stub.stored) == 1
+
+    # not configured: nothing is queued and no client is built
+    monkeypatch.delenv("SUPABASE_URL")
+    monkeypatch.setattr(bridge, "_SUPABASE_CLIENT", None)
+    bridge.persist_log_to_supabase("trade", {"symbol": "EURUSD"})
+    assert bridge.WRITER.stats()["enqueued"] == 1 and len(threads) == 1
@@ -0,0 +1,96 @@
+"""
+Bar-close driven scheduling for the main loop.
+
+The top-down analysis only changes when a candle closes, so each
+(symbol, timeframe) stage is re-run once per bar.  Between closes the loop
+takes the tick-only path: live price against the cached analysis for the
+liquidity and entry checks.
+"""
+import threading
+
+from data.mt5_connector import BAR_CACHE, TIMEFRAME_SECONDS
+from utils import clock
+
+
+class BarCloseScheduler:
+    """
+    Tracks the next close of every timeframe per symbol.
+
+    now(symbol) -> broker server time in epoch seconds (bar times are server
+    time, so H4/D1 boundaries line up with the broker's candles)
+    """
+
+    def __init__(self, timeframes=("H4", "H1", "M15"), now=None, tick_interval=1.0, close_delay=1.0):
+        self.timeframes = tuple(timeframes)
+        self.tick_interval = tick_interval
+        # the terminal needs a moment to publish the new candle
+        self.close_delay = close_delay
+        self._now = now or BAR_CACHE.now
+        self._next_close = {}
+        self._lock = threading.Lock()
+        self.ran = {tf: 0 for tf in self.timeframes}
+        self.skipped = {tf: 0 for tf in self.timeframes}
+        self.full_passes = 0
+        self.tick_passes = 0
+
+    def due(self, symbol):
+        """Timeframes whose bar closed since they were last analysed."""
+        now = self._now(symbol)
+        due = []
+        for tf in self.timeframes:
+            next_close = self._next_close.get((symbol, tf))
+            if next_close is None or now >= next_close + self.close_delay:
+                due.append(tf)
+
+        with self._lock:
+            for tf in self.timeframes:
+                if tf in due:
+                    self.ran[tf] += 1
+                else:
+                    self.skipped[tf] += 1
+            if due:
+                self.full_passes += 1
+            else:
+                self.tick_passes += 1
+        return due
+
+    def mark_ran(self, symbol, timeframe, bar_time=None):
+        """
+        Record that `timeframe` was analysed up to the closed bar opened at
+        `bar_time`.  The stage becomes due again when the following bar
+        closes; if the analysis saw a stale bar that moment is already past,
+        so it is retried on the next pass.
+        """
+        period = TIMEFRAME_SECONDS.get(timeframe)
+        if period is None:
+            self._next_close.pop((symbol, timeframe), None)
+            return
+        if bar_time is None:
+            now = self._now(symbol)
+            self._next_close[(symbol, timeframe)] = (now // period + 1) * period
+        else:
+            self._next_close[(symbol, timeframe)] = int(bar_time) + 2 * period
+
+    def sleep_until_next_pass(self, started):
+        """Sleep out the rest of the tick interval that began at `started`."""
+        remaining = self.tick_interval - (clock.monotonic() - started)
+        if remaining > 0:
+            clock.sleep(remaining)
+
+    def stats(self):
+        with self._lock:
+            return self._stats()
+
+    def _stats(self):
+        ran = sum(self.ran.values())
+        skipped = sum(self.skipped.values())
+        return {
+            "ran": dict(self.ran),
+            "skipped": dict(self.skipped),
+            "skip_rate": skipped / (ran + skipped) if ran + skipped else 0.0,
+            "full_passes": self.full_passes,
+            "tick_passes": self.tick_passes,
+        }
+
+
+SCHEDULER = BarCloseScheduler()
@@ -0,0 +1,85 @@
+"""
+Process-wide clock.
+
+Everything that schedules on wall time (main loop sleeps, bar-close and
+session timing, trade cooldowns) asks this module instead of `time`, so a
+replay can install a VirtualClock and run the live loop faster than real
+time.  Elapsed-time measurements (latency stats) keep using
+time.perf_counter directly.
+"""
+import threading
+import time as _time
+
+
+class SystemClock:
+    def now(self):
+        return _time.time()
+
+    def monotonic(self):
+        return _time.monotonic()
+
+    def sleep(self, seconds):
+        _time.sleep(seconds)
+
+
+class ReplayFinished(BaseException):
+    """
+    Raised by VirtualClock.sleep once the replay window is exhausted.  A
+    BaseException so the main loop's `except Exception` does not swallow it.
+    """
+
+
+class VirtualClock:
+    """
+    Epoch-seconds clock that only moves when someone sleeps: sleep(s)
+    advances it by s and returns immediately.
+    """
+
+    def __init__(self, start, end=None):
+        self._now = float(start)
+        self.end = end
+        self.slept = 0.0
+        self._lock = threading.Lock()
+
+    def now(self):
+        return self._now
+
+    def monotonic(self):
+        return self._now
+
+    def sleep(self, seconds):
+        with self._lock:
+            if self.end is not None and self._now >= self.end:
+                raise ReplayFinished()
+            seconds = max(0.0, float(seconds))
+            self._now += seconds
+            self.slept += seconds
+
+    def advance_to(self, t):
+        with self._lock:
+            self._now = max(self._now, float(t))
+
+
+_clock = SystemClock()
+
+
+def install(clock):
+    """Swap the process clock (None restores the system clock)."""
+    global _clock
+    _clock = clock or SystemClock()
+
+
+def current():
+    return _clock
+
+
+def now():
+    return _clock.now()
+
+
+def monotonic():
+    return _clock.monotonic()
+
+
+def sleep(seconds):
+    _clock.sleep(seconds)
@@ -7,6 +7,17 @@ logger = logging.getLogger(__name__)
 
 
 def fetch_mt5_credentials():
+    # the offline simulator (MT5_BACKEND=sim, scripts/replay.py) takes its
+    # credentials from the environment; a real terminal always logs in with
+    # the Supabase-managed ones
+    if (os.getenv("MT5_BACKEND", "").lower() == "sim"
+            and os.getenv("MT5_LOGIN") and os.getenv("MT5_PASSWORD") and os.getenv("MT5_SERVER")):
+        return {
+            "login": os.getenv("MT5_LOGIN"),
+            "password": os.getenv("MT5_PASSWORD"),
+            "server": os.getenv("MT5_SERVER"),
+        }
+
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_KEY")
 
@@ -0,0 +1,203 @@
+"""
+On-demand sampling profiler for the live process.
+
+A daemon thread snapshots every thread's stack with sys._current_frames()
+at a fixed interval and counts identical stacks.  The result is the
+"collapsed" format flamegraph.pl / speedscope / inferno read directly:
+
+    MainThread;main.py:<module>;main.py:scan_symbol;... 42
+
+It is safe to leave pointed at the live loop:
+  * overhead cap: after each sample the sampler waits long enough that
+    sampling stays under `max_overhead` of wall time, widening the
+    interval when stacks are deep or threads are many
+  * output cap: at most `max_stacks` distinct stacks of `max_depth`
+    frames while sampling, and at most `max_bytes` of collapsed output
+    (file and profile_stop response); stacks past either cap are counted
+    under "<thread>;[truncated]", the lightest ones first
+  * duration cap: a run stops itself after `duration` (<= max_duration)
+
+bot_api drives it through /control (profile_start / profile_stop).
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+TRUNCATED = "[truncated]"
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.01, max_overhead=0.02, max_stacks=10_000,
+                 max_depth=128, max_bytes=1 << 20, max_duration=600.0, out_dir=None):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+        self.out_dir = out_dir
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._labels = {}
+        self._reset()
+        self.result = None
+
+    def _reset(self):
+        self.counts = {}
+        self.samples = 0
+        self.dropped = 0
+        self.sample_s = 0.0
+        self.started = None
+        self.finished = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # -------------------------
+    # CONTROL
+    # -------------------------
+    def start(self, duration=30.0, interval=None):
+        """Start a run in the background; raises RuntimeError if one is active."""
+        duration = float(duration if duration is not None else 30.0)
+        interval = float(interval if interval is not None else self.interval)
+        if not 0 < duration <= self.max_duration:
+            raise ValueError(f"duration must be in (0, {self.max_duration}] seconds")
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        with self._lock:
+            if self.running:
+                raise RuntimeError("profiler already running")
+            self._reset()
+            self.result = None
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(duration, interval), name="sampling-profiler", daemon=True
+            )
+            self.started = time.time()
+            self._thread.start()
+        return {"duration_s": duration, "interval_s": interval}
+
+    def stop(self):
+        """Stop the active run (if any); returns the last run's summary or None."""
+        thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+        return self.result
+
+    # -------------------------
+    # SAMPLING
+    # -------------------------
+    def _run(self, duration, interval):
+        own = threading.get_ident()
+        wall_started = time.perf_counter()
+        deadline = wall_started + duration
+        # cost/(cost + wait) <= max_overhead
+        stretch = 1.0 / self.max_overhead - 1.0
+        while True:
+            began = time.perf_counter()
+            if began >= deadline:
+                break
+            self._sample(own)
+            cost = time.perf_counter() - began
+            self.sample_s += cost
+            wait = max(interval - cost, cost * stretch)
+            if self._stop.wait(min(wait, max(deadline - time.perf_counter(), 0.0))):
+                break
+        self.finished = time.time()
+        wall = time.perf_counter() - wall_started
+        self.result = self._finish(wall)
+
+    def _sample(self, own):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        counts = self.counts
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}").replace(";", ":"))
+            key = ";".join(reversed(stack))
+            if key not in counts and len(counts) >= self.max_stacks:
+                self.dropped += 1
+                key = f"{stack[-1]};{TRUNCATED}"
+            counts[key] = counts.get(key, 0) + 1
+        self.samples += 1
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    # -------------------------
+    # OUTPUT
+    # -------------------------
+    def collapsed(self):
+        """Collapsed stacks of the current/last run, heaviest first, within max_bytes."""
+        return self._render()[0]
+
+    def _render(self):
+        """(text, stacks folded into [truncated] to fit max_bytes)."""
+        counts = sorted(dict(self.counts).items(), key=lambda kv: -kv[1])
+        # room for one [truncated] line per thread, whatever gets folded
+        total = sum(n for _, n in counts)
+        threads = {stack.split(";", 1)[0] for stack, _ in counts}
+        budget = self.max_bytes - sum(len(f"{t};{TRUNCATED} {total}\n".encode()) for t in threads)
+        lines, folded, used, rest = [], 0, 0, {}
+        for stack, n in counts:
+            line = f"{stack} {n}\n"
+            size = len(line.encode())
+            thread, _, frames = stack.partition(";")
+            if frames == TRUNCATED or used + size > budget:
+                rest[thread] = rest.get(thread, 0) + n
+                folded += frames != TRUNCATED
+                continue
+            lines.append(line)
+            used += size
+        lines += [f"{thread};{TRUNCATED} {n}\n" for thread, n in sorted(rest.items(), key=lambda kv: -kv[1])]
+        return "".join(lines), folded
+
+    def _finish(self, wall):
+        path, error = None, None
+        text, folded = self._render()
+        if self.out_dir:
+            stamp = datetime.fromtimestamp(self.started, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            path = os.path.join(self.out_dir, f"profile-{stamp}.collapsed")
+            try:
+                os.makedirs(self.out_dir, exist_ok=True)
+                with open(path + ".tmp", "w") as f:
+                    f.write(text)
+                os.replace(path + ".tmp", path)
+            except OSError as e:
+                # the counts are still served inline by profile_stop
+                path, error = None, str(e)
+        return {
+            "path": path,
+            "error": error,
+            "samples": self.samples,
+            "stacks": len(self.counts),
+            "dropped_stacks": self.dropped,
+            "folded_stacks": folded,
+            "bytes": len(text.encode()),
+            "wall_s": wall,
+            "overhead": self.sample_s / wall if wall else 0.0,
+        }
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "stacks": len(self.counts),
+            "last": self.result,
+        }
+
+
+PROFILER = SamplingProfiler(out_dir=os.getenv("PROFILE_DIR", "profiles"))
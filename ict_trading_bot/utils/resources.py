@@ -0,0 +1,19 @@
+"""
+CPU limits for background jobs that share the machine with the bot.
+
+Deliberately free of numpy/xgboost imports: OpenBLAS, MKL and OpenMP read
+their *_NUM_THREADS variables once, when the library loads, so
+limit_resources() has to run before the first numpy import.
+"""
+import os
+
+THREADS = 1
+NICENESS = 10
+
+
+def limit_resources(threads=THREADS, niceness=NICENESS):
+    """Lower this process's CPU priority and cap the OpenMP/BLAS pools."""
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if niceness and hasattr(os, "nice"):  # not on Windows
+        os.nice(niceness)
@@ -1,10 +1,9 @@
-from datetime import datetime
-import pytz
+from utils.time_sessions import SESSIONS
 
-def in_london_session():
-    now = datetime.now(pytz.UTC).hour
-    return 7 <= now <= 11
 
-def in_newyork_session():
-    now = datetime.now(pytz.UTC).hour
-    return 12 <= now <= 17
+def in_london_session(now=None):
+    return SESSIONS.in_session("london", now)
+
+
+def in_newyork_session(now=None):
+    return SESSIONS.in_session("newyork", now)
@@ -0,0 +1,189 @@
+"""
+Per-stage latency histograms and counters for the main loop.
+
+Each pipeline stage in main.py runs inside `STAGE_METRICS.time(stage,
+symbol)`; the elapsed time lands in a fixed-bucket histogram per (stage,
+symbol), and `stage.reject()` counts the candidates a stage turned away.
+An observation is two perf_counter reads, a bisect and a short locked
+update (a few microseconds), so the timers stay on in production.
+bot_api serves everything as Prometheus text on /metrics.
+
+    with STAGE_METRICS.time("liquidity", symbol) as stage:
+        if not liquidity_taken(...):
+            return stage.reject()
+"""
+import bisect
+import threading
+import time
+
+# upper bounds in seconds; the +Inf bucket is implicit
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_key", "_started")
+
+    def __init__(self, metrics, key):
+        self._metrics = metrics
+        self._key = key
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics.observe(*self._key, time.perf_counter() - self._started)
+        if exc_type is not None:
+            self._metrics.count("errors", *self._key)
+        return False
+
+    def reject(self):
+        """Count a candidate turned away by this stage; returns None."""
+        self._metrics.count("rejections", *self._key)
+        return None
+
+
+class StageMetrics:
+    """Histograms and counters keyed by (stage, symbol); symbol may be None."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}
+        # counter name -> {(stage, symbol): n}
+        self._counters = {}
+
+    def time(self, stage, symbol=None):
+        return _Timer(self, (stage, symbol))
+
+    def observe(self, stage, symbol, seconds):
+        slot = bisect.bisect_left(self.buckets, seconds)
+        key = (stage, symbol)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(len(self.buckets) + 1)
+            hist.counts[slot] += 1
+            hist.sum += seconds
+            hist.count += 1
+
+    def count(self, name, stage, symbol=None, n=1):
+        key = (stage, symbol)
+        with self._lock:
+            counters = self._counters.setdefault(name, {})
+            counters[key] = counters.get(key, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    # -------------------------
+    # EXPORT
+    # -------------------------
+    def snapshot(self):
+        """{ histograms: {(stage, symbol): (cumulative counts, sum, count)}, counters }"""
+        with self._lock:
+            histograms = {k: (list(h.counts), h.sum, h.count) for k, h in self._histograms.items()}
+            counters = {name: dict(c) for name, c in self._counters.items()}
+        for key, (counts, total, n) in histograms.items():
+            running = 0
+            for i, c in enumerate(counts):
+                running += c
+                counts[i] = running
+        return {"histograms": histograms, "counters": counters}
+
+    def stats(self):
+        """Per-stage totals across symbols, for /status."""
+        snap = self.snapshot()
+        stages = {}
+        for (stage, _), (_, total, n) in snap["histograms"].items():
+            entry = stages.setdefault(stage, {"calls": 0, "total_s": 0.0})
+            entry["calls"] += n
+            entry["total_s"] += total
+        for name, counters in snap["counters"].items():
+            for (stage, _), n in counters.items():
+                stages.setdefault(stage, {"calls": 0, "total_s": 0.0})
+                stages[stage][name] = stages[stage].get(name, 0) + n
+        return {
+            stage: {**{k: v for k, v in e.items() if k != "total_s"},
+                    "avg_ms": 1000 * e["total_s"] / e["calls"] if e["calls"] else 0.0}
+            for stage, e in stages.items()
+        }
+
+    def render(self, prefix="ict"):
+        """Prometheus text exposition of the stage histograms and counters."""
+        snap = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent in each main-loop stage.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        bounds = [_number(b) for b in self.buckets] + ["+Inf"]
+        for key in sorted(snap["histograms"], key=_sort_key):
+            counts, total, n = snap["histograms"][key]
+            labels = _labels(*key)
+            for le, c in zip(bounds, counts):
+                lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="{le}"}} {c}')
+            lines.append(f"{prefix}_stage_seconds_sum{{{labels}}} {_number(total)}")
+            lines.append(f"{prefix}_stage_seconds_count{{{labels}}} {n}")
+
+        for name in sorted(snap["counters"]):
+            metric = f"{prefix}_stage_{name}_total"
+            lines.append(f"# HELP {metric} Main-loop stage {name}.")
+            lines.append(f"# TYPE {metric} counter")
+            counters = snap["counters"][name]
+            for key in sorted(counters, key=_sort_key):
+                lines.append(f"{metric}{{{_labels(*key)}}} {counters[key]}")
+        return "\n".join(lines) + "\n"
+
+
+def render_gauges(prefix, stats):
+    """Numeric leaves of a stats() dict (one level of nesting) as Prometheus gauges."""
+    lines = []
+    for key, value in sorted(stats.items()):
+        if isinstance(value, dict):
+            for sub, inner in sorted(value.items()):
+                if _is_number(inner):
+                    lines.append(f"{prefix}_{_name(key)}_{_name(sub)} {_number(inner)}")
+        elif _is_number(value):
+            lines.append(f"{prefix}_{_name(key)} {_number(value)}")
+    return lines
+
+
+def _labels(stage, symbol):
+    if symbol is None:
+        return f'stage="{_escape(stage)}"'
+    return f'stage="{_escape(stage)}",symbol="{_escape(symbol)}"'
+
+
+def _sort_key(key):
+    return key[0], key[1] or ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _name(value):
+    return "".join(ch if ch.isalnum() else "_" for ch in str(value))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+STAGE_METRICS = StageMetrics()
@@ -0,0 +1,117 @@
+"""
+Trading session calendar.
+
+BotConfig gives the London / New York / Asia hours in UTC as they are in
+winter.  The markets themselves keep local time, so each session is pinned
+to its exchange timezone and the UTC windows shift with DST.  Windows are
+precomputed for a rolling horizon and looked up with bisect, so the main
+loop can ask "is anything open?" or "how long until the next open?" once
+per cycle without touching datetime/pytz.
+"""
+import bisect
+from datetime import datetime, timedelta
+
+import pytz
+
+from config.bot_config import BotConfig
+from utils import clock as _clock
+
+SESSION_TIMEZONES = {
+    "london": "Europe/London",
+    "newyork": "America/New_York",
+    "asia": "Asia/Tokyo",
+}
+
+TRADING_SESSIONS = ("london", "newyork")
+
+
+def _winter_offset_hours(tz):
+    # BotConfig hours are UTC under standard (winter) time
+    return int(tz.utcoffset(datetime(2021, 1, 15)).total_seconds() // 3600)
+
+
+def sessions_from_config(config=BotConfig):
+    """{ name: (timezone, local_start_hour, local_end_hour) }"""
+    hours = {
+        "london": (config.LONDON_START, config.LONDON_END),
+        "newyork": (config.NY_START, config.NY_END),
+        "asia": (getattr(config, "ASIA_START", 22), getattr(config, "ASIA_END", 6)),
+    }
+    sessions = {}
+    for name, (start, end) in hours.items():
+        tz = pytz.timezone(SESSION_TIMEZONES[name])
+        offset = _winter_offset_hours(tz)
+        sessions[name] = (tz, (start + offset) % 24, (end + offset) % 24)
+    return sessions
+
+
+class SessionCalendar:
+    """
+    Precomputed per-session (open_ts, close_ts) windows in UTC epoch
+    seconds, sorted by open.  Sessions only run on local weekdays.
+    """
+
+    def __init__(self, sessions=None, horizon_days=14, clock=_clock.now):
+        self.sessions = sessions or sessions_from_config()
+        self.horizon_days = horizon_days
+        self._clock = clock
+        self._windows = {}
+        self._opens = {}
+        self._built_from = None
+        self._built_until = None
+
+    def _build(self, now):
+        base = datetime.fromtimestamp(now, tz=pytz.UTC).date() - timedelta(days=2)
+        windows = {name: [] for name in self.sessions}
+
+        for day in range(self.horizon_days + 3):
+            date = base + timedelta(days=day)
+            if date.weekday() >= 5:
+                continue
+            for name, (tz, start, end) in self.sessions.items():
+                local_open = tz.localize(datetime(date.year, date.month, date.day, start))
+                close_date = date if end > start else date + timedelta(days=1)
+                local_close = tz.localize(datetime(close_date.year, close_date.month, close_date.day, end))
+                windows[name].append((local_open.timestamp(), local_close.timestamp()))
+
+        self._windows = {name: sorted(w) for name, w in windows.items()}
+        self._opens = {name: [w[0] for w in ws] for name, ws in self._windows.items()}
+        self._built_from = now - 86400
+        self._built_until = now + (self.horizon_days - 2) * 86400
+
+    def _now(self, now):
+        now = self._clock() if now is None else now
+        if self._built_until is None or not self._built_from <= now < self._built_until:
+            self._build(now)
+        return now
+
+    def in_session(self, name, now=None):
+        now = self._now(now)
+        opens = self._opens.get(name, [])
+        i = bisect.bisect_right(opens, now) - 1
+        return i >= 0 and now < self._windows[name][i][1]
+
+    def active(self, now=None):
+        now = self._now(now)
+        return [name for name in self.sessions if self.in_session(name, now)]
+
+    def is_open(self, sessions=TRADING_SESSIONS, now=None):
+        now = self._now(now)
+        return any(self.in_session(name, now) for name in sessions)
+
+    def seconds_until_open(self, sessions=TRADING_SESSIONS, now=None):
+        """0 while any of `sessions` is open, else seconds to the next open."""
+        now = self._now(now)
+        best = None
+        for name in sessions:
+            if self.in_session(name, now):
+                return 0.0
+            opens = self._opens.get(name, [])
+            i = bisect.bisect_right(opens, now)
+            if i < len(opens):
+                wait = opens[i] - now
+                best = wait if best is None else min(best, wait)
+        return best if best is not None else float(self.horizon_days * 86400)
+
+
+SESSIONS = SessionCalendar()
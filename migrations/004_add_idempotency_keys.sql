@@ -0,0 +1,9 @@
+-- Migration 004: Idempotency keys for bot-written rows
+-- The bot replays unacknowledged rows from its local outbox; the unique key
+-- lets a replayed insert (ON CONFLICT DO NOTHING) leave the first copy alone.
+
+ALTER TABLE bot_signals ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bot_signals_idempotency_key ON bot_signals(idempotency_key);
+
+ALTER TABLE bot_logs ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bot_logs_idempotency_key ON bot_logs(idempotency_key);